@@ -21,6 +21,10 @@ from models.user import User, UserToken
 from models.emotion_log import EmotionLog
 from models.feedback import Feedback
 from models.emotion_vote import EmotionVote
+from models.role import Role
+from models.session_summary import SessionSummary
+from models.analysis_job import AnalysisJob, AnalysisJobItem
+from models.api_key import ApiKey
 
 target_metadata = Base.metadata
 
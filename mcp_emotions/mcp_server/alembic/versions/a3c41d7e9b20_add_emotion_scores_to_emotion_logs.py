@@ -0,0 +1,30 @@
+"""add emotion_scores to emotion_logs
+
+Revision ID: a3c41d7e9b20
+Revises: add_language_id_feedback
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c41d7e9b20'
+down_revision: Union[str, None] = 'add_language_id_feedback'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('emotion_logs', sa.Column('emotion_scores', sa.LargeBinary(), nullable=True))
+    op.add_column('emotion_logs', sa.Column('score_labels', sa.String(length=8), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('emotion_logs', 'score_labels')
+    op.drop_column('emotion_logs', 'emotion_scores')
@@ -0,0 +1,115 @@
+"""partition emotion_logs by month on created_at
+
+Revision ID: a8d4f2c6e317
+Revises: f3c7a2e9d164
+Create Date: 2026-10-19 21:00:00.000000
+
+The existing table is renamed, a range-partitioned emotion_logs with primary key
+(id, created_at) is created with one partition per month from the oldest row to three months
+ahead (or the newest row, if later), the rows are copied over and the old table is dropped.
+There is no default partition, so that retention can detach partitions concurrently.
+The single-column session_id index is not recreated: (session_id, created_at) covers it.
+The copy runs in the migration's transaction: plan a maintenance window for large tables.
+Later partitions are created by services/emotion_log_partitions.py.
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d4f2c6e317'
+down_revision: Union[str, None] = 'f3c7a2e9d164'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+COLUMNS = ("id, session_id, message, emotions, context, user_id, created_at, "
+           "sarcasm_detected, emotion_scores, score_labels")
+COLUMN_DEFINITIONS = """
+    id UUID NOT NULL,
+    session_id VARCHAR NOT NULL,
+    message VARCHAR NOT NULL,
+    emotions VARCHAR NOT NULL,
+    context VARCHAR NOT NULL,
+    user_id UUID NOT NULL CONSTRAINT emotion_logs_user_id_fkey REFERENCES users(id),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    sarcasm_detected BOOLEAN DEFAULT false NOT NULL,
+    emotion_scores BYTEA,
+    score_labels VARCHAR(8)
+"""
+
+
+def month_start(value) -> date:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_indexes(session_id_index: bool) -> None:
+    if session_id_index:
+        op.create_index('ix_emotion_logs_session_id', 'emotion_logs', ['session_id'], unique=False)
+    op.create_index('ix_emotion_logs_user_id_created_at', 'emotion_logs', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_emotion_logs_session_id_created_at', 'emotion_logs', ['session_id', 'created_at'], unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    op.execute("ALTER TABLE emotion_logs RENAME TO emotion_logs_unpartitioned")
+    op.execute("ALTER INDEX emotion_logs_pkey RENAME TO emotion_logs_unpartitioned_pkey")
+    # Frees the name for the new table's foreign key
+    op.execute("ALTER TABLE emotion_logs_unpartitioned RENAME CONSTRAINT emotion_logs_user_id_fkey "
+               "TO emotion_logs_unpartitioned_user_id_fkey")
+    op.execute(f"""
+        CREATE TABLE emotion_logs ({COLUMN_DEFINITIONS},
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+    """)
+
+    oldest, newest = bind.execute(
+        sa.text("SELECT min(created_at), max(created_at) FROM emotion_logs_unpartitioned")
+    ).one()
+    current = month_start(datetime.now(timezone.utc))
+    month = min(month_start(oldest), current) if oldest is not None else current
+    last = add_months(current, MONTHS_AHEAD)
+    if newest is not None:
+        last = max(last, month_start(newest))
+    while month <= last:
+        upper = add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE emotion_logs_p{month:%Y%m} PARTITION OF emotion_logs "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00');"
+        )
+        month = upper
+
+    op.execute(f"INSERT INTO emotion_logs ({COLUMNS}) SELECT {COLUMNS} FROM emotion_logs_unpartitioned;")
+    op.execute("DROP TABLE emotion_logs_unpartitioned;")
+    # Created after the copy: one index build per partition instead of per-row maintenance
+    create_indexes(session_id_index=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE emotion_logs RENAME TO emotion_logs_partitioned")
+    op.execute("ALTER INDEX emotion_logs_pkey RENAME TO emotion_logs_partitioned_pkey")
+    # The partitions' copies of the foreign key keep their name; it is given explicitly below
+    op.execute("ALTER TABLE emotion_logs_partitioned RENAME CONSTRAINT emotion_logs_user_id_fkey "
+               "TO emotion_logs_partitioned_user_id_fkey")
+    op.execute(f"""
+        CREATE TABLE emotion_logs ({COLUMN_DEFINITIONS},
+            PRIMARY KEY (id)
+        );
+    """)
+    op.execute(f"INSERT INTO emotion_logs ({COLUMNS}) SELECT {COLUMNS} FROM emotion_logs_partitioned;")
+    # Drops every partition with it
+    op.execute("DROP TABLE emotion_logs_partitioned;")
+    create_indexes(session_id_index=True)
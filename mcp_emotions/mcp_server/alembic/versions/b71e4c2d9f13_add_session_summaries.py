@@ -0,0 +1,44 @@
+"""add session_summaries
+
+Revision ID: b71e4c2d9f13
+Revises: a3c41d7e9b20
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4c2d9f13'
+down_revision: Union[str, None] = 'a3c41d7e9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'session_summaries',
+        sa.Column('session_id', sa.String(), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('message_count', sa.Integer(), nullable=False),
+        sa.Column('sarcasm_count', sa.Integer(), nullable=False),
+        sa.Column('label_counts', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('ewma_scores', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('recent_messages', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('session_id')
+    )
+    op.create_index(op.f('ix_session_summaries_user_id'), 'session_summaries', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_session_summaries_user_id'), table_name='session_summaries')
+    op.drop_table('session_summaries')
@@ -0,0 +1,30 @@
+"""add (user_id, created_at) and (session_id, created_at) indexes to emotion_logs
+
+Revision ID: d2f8a6b3c519
+Revises: c4a9e1f27b58
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f8a6b3c519'
+down_revision: Union[str, None] = 'c4a9e1f27b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_emotion_logs_user_id_created_at', 'emotion_logs', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_emotion_logs_session_id_created_at', 'emotion_logs', ['session_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_emotion_logs_session_id_created_at', table_name='emotion_logs')
+    op.drop_index('ix_emotion_logs_user_id_created_at', table_name='emotion_logs')
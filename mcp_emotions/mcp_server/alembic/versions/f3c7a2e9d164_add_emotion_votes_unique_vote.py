@@ -0,0 +1,57 @@
+"""ensure emotion_votes and its (feedback_id, user_id, label) unique index exist
+
+Revision ID: f3c7a2e9d164
+Revises: e5b1c8d4a027
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a2e9d164'
+down_revision: Union[str, None] = 'e5b1c8d4a027'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The table has so far only been created from sql/emotion_votes.sql
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS emotion_votes (
+            id SERIAL PRIMARY KEY,
+            feedback_id BIGINT NOT NULL REFERENCES feedback(id) ON DELETE CASCADE,
+            user_id UUID NOT NULL REFERENCES users(id),
+            label VARCHAR NOT NULL,
+            score FLOAT NOT NULL,
+            vote BOOLEAN NOT NULL,
+            comment TEXT,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL
+        );
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_emotion_votes_feedback_id ON emotion_votes(feedback_id);")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_emotion_votes_user_id ON emotion_votes(user_id);")
+
+    # Keep the first vote where the old check-then-insert let concurrent duplicates through
+    op.execute("""
+        DELETE FROM emotion_votes newer
+        USING emotion_votes older
+        WHERE newer.feedback_id = older.feedback_id
+          AND newer.user_id = older.user_id
+          AND newer.label = older.label
+          AND newer.id > older.id;
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_emotion_votes_unique_vote
+        ON emotion_votes(feedback_id, user_id, label);
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The table predates this revision (sql/emotion_votes.sql); only the index is owned here
+    op.execute("DROP INDEX IF EXISTS idx_emotion_votes_unique_vote;")
@@ -0,0 +1,75 @@
+from typing import Optional
+from fastapi import Depends, HTTPException, Request, Security, status
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import get_settings
+from db.session import get_db
+from models.user import User
+from auth.jwt import get_user_from_token
+from services.api_keys import api_key_store, is_api_key, ApiKeyEntry
+from utils.logger import jwt_logger
+
+settings = get_settings()
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/users/login", auto_error=False)
+
+async def verify_api_key(key: str, scope: str, db: AsyncSession) -> ApiKeyEntry:
+    """Entry of a valid, unexpired key carrying ``scope``; raises 401, 403 or 429 otherwise."""
+    if not api_key_store.loaded:
+        # First key seen before the refresh task ran (e.g. serverless): load the table
+        await api_key_store.refresh(db)
+    elif api_key_store.stale(settings.API_KEY_REFRESH_SECONDS):
+        # No refresh task keeping it current (serverless, lifespan off): check for changes here
+        try:
+            await api_key_store.refresh(db, max_age=settings.API_KEY_REFRESH_SECONDS)
+        except Exception as e:
+            # Keep serving the last loaded table, as the refresh task does
+            print(f"❌ API key refresh failed: {e}")
+    entry = api_key_store.verify(key)
+    if entry is None or entry.expired():
+        jwt_logger.error("API key validation failed")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if scope not in entry.scopes:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"API key lacks the '{scope}' scope")
+    retry_after = entry.bucket.take()
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"API key rate limit of {entry.rate_limit} requests per minute exceeded",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+        )
+    return entry
+
+def get_current_user_or_api_key(scope: str):
+    """
+    Dependency accepting either a bearer access token or a service API key with ``scope``.
+
+    API keys are sent as ``X-API-Key: mcp_...`` or ``Authorization: Bearer mcp_...`` and are
+    checked against the in-memory key table (services/api_keys.py): no database query per request.
+    """
+    async def dependency(
+        request: Request,
+        token: Optional[str] = Depends(optional_oauth2_scheme),
+        api_key: Optional[str] = Security(api_key_header),
+        db: AsyncSession = Depends(get_db)
+    ) -> User:
+        if api_key is None and token is not None and is_api_key(token):
+            api_key = token
+        if api_key is not None:
+            entry = await verify_api_key(api_key, scope, db)
+            request.state.api_key = entry.key_id
+            request.state.user = entry.user
+            return entry.user
+        if token is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return await get_user_from_token(token, db)
+
+    return dependency
@@ -9,8 +9,10 @@ from sqlalchemy import select
 from core.config import get_settings
 from db.session import get_db
 from models.user import User
+from models.role import Role
 from schemas.token import TokenData
 from utils.logger import jwt_logger
+from auth.token_cache import token_cache
 
 settings = get_settings()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -28,7 +30,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     jwt_logger.info(f"Creating access token for user: {data.get('sub')}")
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
@@ -36,20 +38,39 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def create_refresh_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     jwt_logger.info(f"Creating refresh token for user: {data.get('sub')}")
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+def decode_token(token: str) -> dict:
+    """
+    Verified claims of ``token``; raises JWTError.
+
+    Claims come from the verified-token cache (auth/token_cache.py) when this exact token
+    was verified before; the signature is only checked on a miss.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        jwt_logger.info("Validating JWT token")
+        claims = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        if token_cache.is_revoked(token, claims):
+            raise JWTError("Token has been revoked")
+        token_cache.put(token, claims)
+    return claims
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    return await get_user_from_token(token, db)
+
+async def get_user_from_token(token: str, db: AsyncSession) -> User:
+    """Validate an access token and return its active user; raises 401 otherwise."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        jwt_logger.info("Validating JWT token")
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        payload = decode_token(token)
         email: str = payload.get("sub")
         if email is None:
             jwt_logger.error("Token validation failed: email not found in token")
@@ -70,4 +91,15 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
         raise credentials_exception
     
     jwt_logger.info(f"Token validation successful for user: {email}")
-    return user 
\ No newline at end of file
+    return user
+
+async def get_current_admin_user(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Role.code).where(Role.id == current_user.role_id))
+    role_code = result.scalar_one_or_none()
+    if role_code != "admin":
+        jwt_logger.warning(f"Admin access denied for user: {current_user.email}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
@@ -0,0 +1,113 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from jose import JWTError, jwt
+from core.config import get_settings
+
+settings = get_settings()
+
+# Verified-token cache.
+#
+# Maps the SHA-256 of the complete token string to the claims python-jose returned after a
+# successful signature check. Only verified tokens are ever stored, and a lookup needs the
+# exact same token bytes, so a forged or modified token always misses and goes through the
+# full verification. Entries expire at the token's ``exp`` and the cache is an LRU bounded by
+# JWT_CACHE_SIZE (0 disables it).
+#
+# Revocation: revoke_token() denies one token until it expires, revoke_subject() denies every
+# token of a subject issued before the current second. ``iat`` has whole-second precision, so
+# a token issued in the second of the revocation stays valid: that is what lets a user log in
+# again right after a password change. Both are process-local: call them in every worker (or
+# keep access tokens short-lived) for revocation to take effect everywhere.
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[dict, float]]" = OrderedDict()
+        self._revoked_tokens: Dict[bytes, float] = {}  # digest -> exp
+        self._revoked_subjects: Dict[str, int] = {}  # sub -> tokens issued before this second are denied
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        if not self.max_size:
+            return None
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[digest]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        """Cache the claims of a token that has just passed signature verification."""
+        expires_at = claims.get("exp")
+        if not self.max_size or not isinstance(expires_at, (int, float)):
+            return
+        digest = token_digest(token)
+        with self._lock:
+            self._entries[digest] = (claims, float(expires_at))
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, token: str, claims: dict) -> bool:
+        with self._lock:
+            if token_digest(token) in self._revoked_tokens:
+                return True
+            cutoff = self._revoked_subjects.get(claims.get("sub"))
+        # Tokens without iat cannot be told apart from older ones
+        return cutoff is not None and claims.get("iat", 0) < cutoff
+
+    def revoke_token(self, token: str) -> None:
+        """Deny ``token`` until it expires."""
+        digest = token_digest(token)
+        try:
+            expires_at = float(jwt.get_unverified_claims(token)["exp"])
+        except (JWTError, KeyError, TypeError, ValueError):
+            expires_at = time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        with self._lock:
+            self._entries.pop(digest, None)
+            self._revoked_tokens[digest] = expires_at
+            self._prune_revoked()
+
+    def revoke_subject(self, sub: str) -> None:
+        """Deny every token of ``sub`` issued before this second (e.g. on password change or deactivation)."""
+        now = int(time.time())
+        with self._lock:
+            self._revoked_subjects[sub] = now
+            for digest in [digest for digest, (claims, _) in self._entries.items() if claims.get("sub") == sub]:
+                del self._entries[digest]
+            self._prune_revoked()
+
+    def _prune_revoked(self) -> None:
+        # Called with the lock held; a denial is only needed while the token could still verify
+        now = time.time()
+        self._revoked_tokens = {digest: exp for digest, exp in self._revoked_tokens.items() if exp > now}
+        horizon = now - settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        self._revoked_subjects = {sub: cutoff for sub, cutoff in self._revoked_subjects.items() if cutoff > horizon}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache(settings.JWT_CACHE_SIZE)
@@ -16,9 +16,103 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    JWT_CACHE_SIZE: int = 10000  # Verified tokens whose claims are cached until exp (0: verify every request)
+    
+    # Service API Key Settings
+    API_KEY_SECRET: str = ""  # HMAC key for stored API key hashes; empty means JWT_SECRET_KEY
+    API_KEY_REFRESH_SECONDS: float = 10.0  # How often the in-memory key table checks for changes
+    API_KEY_DEFAULT_RATE_LIMIT: int = 6000  # Requests per minute for keys without their own limit
     
     # Database Settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "postgresql+asyncpg://postgres:postgres@db:5432/mcp_db")
+    DATABASE_REPLICA_URL: str = ""  # Read-only endpoints use this database; empty means DATABASE_URL
+    DB_ECHO: bool = False  # Log every SQL statement
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_READER_POOL_SIZE: int = 5
+    DB_READER_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection before failing
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # Server-side statement_timeout on the writer (0: none)
+    DB_READER_STATEMENT_TIMEOUT_MS: int = 15000  # Long history scans are cut off instead of piling up
+    
+    # Model Settings
+    PRELOAD_MODELS: bool = True  # Load and warm up every model on startup
+    MODEL_DIR: str = ""  # Model snapshots (see scripts/prefetch_models.py); empty means use the hub
+    MODEL_SNAPSHOT: str = ""  # Snapshot version inside MODEL_DIR; empty means the CURRENT pointer
+    MODEL_LOCAL_ONLY: bool = False  # Never contact the hub; missing local models are an error
+    MODEL_VERIFY_HASHES: bool = False  # Check weights against the snapshot manifest on load (skipped, with a warning, without a manifest)
+    SARCASM_MODE: str = "always"  # "always" runs the sarcasm model on every text, "cascade" pre-screens first
+    SARCASM_MIN_WORDS: int = 3  # Cascade: shorter texts without a sarcasm cue skip the model
+    SARCASM_CUES_DIR: str = ""  # Directory of <lang>.txt cue lists; empty means data/sarcasm_cues
+    MAX_MESSAGE_LENGTH: int = 1000  # Characters per message; long texts should use segmentation
+    SEGMENTATION: str = "off"  # Default segment mode: "off", "sentence" or "window" (see utils/segmentation.py)
+    SEGMENT_AGGREGATION: str = "max"  # Default strategy: "max", "mean" or "last"
+    SEGMENT_MAX_SEGMENTS: int = 16  # Segments per message; the tail is joined into the last one
+    SEGMENT_MIN_WORDS: int = 3  # Shorter sentences are joined to a neighbour
+    SEGMENT_WINDOW_WORDS: int = 64  # Window mode: words per segment
+    SEGMENT_WINDOW_STRIDE: int = 48  # Window mode: words between window starts (overlap = words - stride)
+    SEGMENT_LAST_DECAY: float = 0.5  # "last" strategy: weight ratio between a segment and the next
+    SPANISH_ENGINE_RETRY_SECONDS: float = 30.0  # Backoff after a pysentimiento failure (doubles each time)
+    SPANISH_ENGINE_MAX_RETRY_SECONDS: float = 600.0
+    SPANISH_ENGINE_MAX_FAILURES: int = 3  # Failed predictions in a row before the analyzer is rebuilt
+    EMOTION_THRESHOLDS_FILE: str = ""  # Calibrated per-label thresholds (scripts/evaluate_feedback.py)
+    THRESHOLDS_RELOAD_SECONDS: float = 30.0
+    
+    # Batched Inference Settings
+    DETECTION_BATCH_SIZE: int = 32  # Max messages per forward pass across all connections
+    DETECTION_BATCH_WAIT_MS: float = 10.0  # Max time a message waits for its batch to fill
+    DETECTION_COALESCE: bool = True  # Identical concurrent detections share one inference
+    WS_MAX_INFLIGHT: int = 8  # Unanswered messages per WebSocket before it stops being read
+
+    # Admission Control Settings (services/batch_scheduler.py)
+    ADMISSION_QUEUE_INTERACTIVE: int = 256  # Queued authenticated/WebSocket messages before 503s
+    ADMISSION_QUEUE_BATCH: int = 256  # Queued job items before job workers are pushed back
+    ADMISSION_QUEUE_PUBLIC: int = 64  # Queued anonymous messages before 503s
+    ADMISSION_TIMEOUT_INTERACTIVE: float = 10.0  # Default seconds a request may stay queued
+    ADMISSION_TIMEOUT_PUBLIC: float = 5.0
+    ADMISSION_MAX_TIMEOUT: float = 30.0  # Upper bound for client-supplied timeouts
+    REQUEST_TIMEOUT_HEADER: str = "X-Request-Timeout"  # Client timeout in seconds
+    
+    # Bulk Analysis Job Settings
+    JOB_WORKERS: int = 1  # Job workers started inside each API process (0: only scripts/job_worker.py)
+    JOB_CHUNK_SIZE: int = 64  # Items claimed per round trip
+    JOB_CLAIM_TIMEOUT_SECONDS: int = 300  # Claims older than this are taken over by another worker
+    JOB_POLL_SECONDS: float = 2.0  # Idle worker polling interval
+    JOB_MAX_MESSAGES: int = 50000  # Messages accepted per job
+    JOB_EVENTS_INTERVAL: float = 1.0  # Seconds between progress checks of the event stream
+    
+    # Feedback Settings
+    FEEDBACK_BATCH_MAX_ITEMS: int = 500  # Items accepted per /feedback/submit/batch call
+    LANGUAGE_MAP_REFRESH_SECONDS: float = 300.0  # Min interval between reloads of the languages table on a miss
+    
+    # Emotion Log Partitioning and Retention Settings
+    EMOTION_LOG_PARTITIONS_AHEAD: int = 3  # Monthly partitions created ahead of the current month
+    EMOTION_LOG_PARTITION_CHECK_SECONDS: float = 21600.0  # Interval of the partition maintenance task
+    EMOTION_LOG_RETENTION_MONTHS: int = 12  # Full months kept besides the current one (scripts/archive_emotion_logs.py)
+    EMOTION_LOG_ARCHIVE_DIR: str = "archive/emotion_logs"  # Where archived partitions are written
+    
+    # Similarity Index Settings
+    SIMILARITY_MAX_USERS: int = 1000  # Per-user partitions kept in memory (LRU)
+    SIMILARITY_ANN_MIN_ROWS: int = 5000  # Partitions this large use the approximate index
+    SIMILARITY_NPROBE: int = 8  # Buckets scored per approximate query
+    
+    # Session Summary Settings
+    SESSION_SUMMARY_ALPHA: float = 0.3  # Weight of the newest message in the moving average
+    SESSION_SUMMARY_RECENT: int = 10  # Messages kept in a summary
+    SESSION_SUMMARY_CACHE_SIZE: int = 10000
+    SESSION_SUMMARY_CACHE_TTL: float = 2.0  # Seconds a cached summary may lag writes from other workers
+    
+    # Recent History Cache Settings (services/recent_history.py)
+    RECENT_HISTORY_SIZE: int = 50  # Latest entries kept per user and per session (0 disables the cache)
+    RECENT_HISTORY_MAX_KEYS: int = 20000  # Users + sessions kept
+    RECENT_HISTORY_TTL: float = 2.0  # Seconds a buffer is served before it is re-checked against the database
+    RECENT_HISTORY_IDLE_SECONDS: float = 900.0  # Buffers unused this long are evicted
+    
+    # Response Compression Settings
+    COMPRESS_MIN_BYTES: int = 1024  # Smaller JSON bodies are sent uncompressed
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 5  # Used when the optional brotli package is installed
     
     # Rate Limit Settings
     RATE_LIMIT_WHITELIST_IPS: List[str] = [
@@ -1,3 +1,3 @@
-from .session import engine, Base, get_db
+from .session import engine, writer_engine, reader_engine, Base, get_db, get_read_db
 
-__all__ = ["engine", "Base", "get_db"] 
\ No newline at end of file
+__all__ = ["engine", "writer_engine", "reader_engine", "Base", "get_db", "get_read_db"] 
\ No newline at end of file
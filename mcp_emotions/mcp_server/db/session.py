@@ -1,25 +1,104 @@
+import time
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from core.config import get_settings
 from db.base import Base
+from utils.metrics import metrics
 
 settings = get_settings()
 
-# Ensure we're using asyncpg by explicitly setting the driver
-DATABASE_URL = settings.DATABASE_URL.replace('postgresql://', 'postgresql+asyncpg://')
-
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    future=True,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-    connect_args={"server_settings": {"application_name": "mcp_server"}}
+# Two engines: the writer (DATABASE_URL) serves every request that writes or must see its
+# own writes; the reader (DATABASE_REPLICA_URL, e.g. a streaming replica) serves read-only
+# endpoints such as history and feedback lists. Without a replica URL both names point at
+# the writer engine. Replica reads can lag the writer by the replication delay.
+
+pool_checkout_seconds = metrics.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled database connection"
+)
+pool_checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that gave up after DB_POOL_TIMEOUT"
+)
+pool_connections = metrics.gauge("db_pool_connections", "Pooled connections by state")
+pool_saturation = metrics.gauge("db_pool_saturation", "Checked-out connections / (pool_size + max_overflow)")
+
+
+def _async_url(url: str) -> str:
+    # Ensure we're using asyncpg by explicitly setting the driver
+    return url.replace('postgresql://', 'postgresql+asyncpg://')
+
+
+def instrumented_pool(name: str):
+    """Queue pool class that records checkout latency and timeouts under ``pool=name``."""
+    class InstrumentedPool(AsyncAdaptedQueuePool):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                pool_checkout_timeouts.inc(pool=name)
+                raise
+            finally:
+                pool_checkout_seconds.observe(time.perf_counter() - start, pool=name)
+
+    return InstrumentedPool
+
+
+def create_engine(name: str, url: str, pool_size: int, max_overflow: int, statement_timeout_ms: int):
+    server_settings = {"application_name": f"mcp_server-{name}"}
+    if statement_timeout_ms:
+        server_settings["statement_timeout"] = str(statement_timeout_ms)
+    engine = create_async_engine(
+        _async_url(url),
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=instrumented_pool(name),
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={"server_settings": server_settings}
+    )
+
+    pool = engine.sync_engine.pool
+    capacity = pool_size + max_overflow
+    pool_connections.set_function(pool.checkedout, pool=name, state="in_use")
+    pool_connections.set_function(pool.checkedin, pool=name, state="idle")
+    pool_connections.set_function(lambda: max(pool.overflow(), 0), pool=name, state="overflow")
+    pool_saturation.set_function(lambda: pool.checkedout() / capacity if capacity else 0.0, pool=name)
+    return engine
+
+
+writer_engine = create_engine(
+    "writer",
+    settings.DATABASE_URL,
+    settings.DB_POOL_SIZE,
+    settings.DB_MAX_OVERFLOW,
+    settings.DB_STATEMENT_TIMEOUT_MS
 )
+reader_engine = create_engine(
+    "reader",
+    settings.DATABASE_REPLICA_URL,
+    settings.DB_READER_POOL_SIZE,
+    settings.DB_READER_MAX_OVERFLOW,
+    settings.DB_READER_STATEMENT_TIMEOUT_MS
+) if settings.DATABASE_REPLICA_URL else writer_engine
+
+# Backwards-compatible name for the writer
+engine = writer_engine
 
 AsyncSessionLocal = sessionmaker(
-    engine,
+    writer_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
+ReadSessionLocal = sessionmaker(
+    reader_engine,
     class_=AsyncSession,
     expire_on_commit=False,
     autocommit=False,
@@ -31,4 +110,12 @@ async def get_db():
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
+
+async def get_read_db():
+    """Session on the reader engine, for endpoints that never write."""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, ForeignKey, TIMESTAMP, Index, func, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from db.base import Base
+import uuid
+
+# Job and item states
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+ITEM_PENDING = "pending"
+ITEM_RUNNING = "running"
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String(16), nullable=False, default=JOB_PENDING)
+    context = Column(String, nullable=True)
+    total = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)  # done + failed items
+    failed = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    completed_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+class AnalysisJobItem(Base):
+    __tablename__ = "analysis_job_items"
+    __table_args__ = (
+        Index("ix_analysis_job_items_job_position", "job_id", "position", unique=True),
+        # Workers claim the oldest pending items first
+        Index("ix_analysis_job_items_claimable", "id", postgresql_where=text("status IN ('pending', 'running')")),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("analysis_jobs.id", ondelete="CASCADE"), nullable=False)
+    position = Column(Integer, nullable=False)  # index of the message in the submitted list
+    message = Column(Text, nullable=False)
+    status = Column(String(16), nullable=False, default=ITEM_PENDING)
+    claimed_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
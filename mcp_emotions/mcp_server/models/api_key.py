@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, TIMESTAMP, func
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from db.base import Base
+import uuid
+
+# Scopes an API key can carry
+SCOPE_DETECT = "detect"  # emotion detector endpoints
+SCOPE_JOBS = "jobs"  # bulk analysis jobs
+SCOPE_HISTORY = "history"  # emotion history endpoints
+API_KEY_SCOPES = (SCOPE_DETECT, SCOPE_JOBS, SCOPE_HISTORY)
+
+class ApiKey(Base):
+    """
+    Service API key. Only a keyed hash of the secret is stored (HMAC-SHA256 with API_KEY_SECRET);
+    ``key_id`` is the public part of the key used to find the record.
+    """
+    __tablename__ = "api_keys"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    key_id = Column(String(32), unique=True, nullable=False)
+    key_hash = Column(String(64), nullable=False)  # hex HMAC-SHA256 of the secret part
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String, nullable=False)
+    scopes = Column(ARRAY(Text), nullable=False, default=list)
+    rate_limit_per_minute = Column(Integer, nullable=True)  # None: API_KEY_DEFAULT_RATE_LIMIT
+    is_active = Column(Boolean, nullable=False, server_default='true')
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    # Bumped on every change; the in-memory key table reloads when the newest value moves
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
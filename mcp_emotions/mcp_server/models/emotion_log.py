@@ -1,16 +1,26 @@
-from sqlalchemy import Column, String, ForeignKey, TIMESTAMP, func, Boolean
+from sqlalchemy import Column, String, ForeignKey, TIMESTAMP, func, Boolean, LargeBinary, Index
 from sqlalchemy.dialects.postgresql import UUID
 from db.base import Base
 import uuid
 
 class EmotionLog(Base):
     __tablename__ = "emotion_logs"
+    __table_args__ = (
+        # History reads and their validators (count, max(created_at)) are index-only on these
+        Index("ix_emotion_logs_user_id_created_at", "user_id", "created_at"),
+        Index("ix_emotion_logs_session_id_created_at", "session_id", "created_at"),
+        # Monthly partitions, managed by services/emotion_log_partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
+    # The partition key has to be part of the primary key; id alone is still unique
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    session_id = Column(String, nullable=False, index=True)
+    session_id = Column(String, nullable=False)  # indexed by ix_emotion_logs_session_id_created_at
     message = Column(String, nullable=False)
     emotions = Column(String, nullable=False)  # JSON string of emotions
     context = Column(String, nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
-    sarcasm_detected = Column(Boolean, nullable=False, default=False) 
\ No newline at end of file
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=func.now(), nullable=False)
+    sarcasm_detected = Column(Boolean, nullable=False, default=False)
+    emotion_scores = Column(LargeBinary, nullable=True)  # float16 probability per label (utils/score_codec.py)
+    score_labels = Column(String(8), nullable=True)  # label set of emotion_scores, see services/emotion_labels.py 
\ No newline at end of file
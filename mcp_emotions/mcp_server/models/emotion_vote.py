@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, ForeignKey, TIMESTAMP, func
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, ForeignKey, TIMESTAMP, Index, func
 from sqlalchemy.dialects.postgresql import UUID
 from db.base import Base
 
@@ -12,4 +12,9 @@ class EmotionVote(Base):
     score = Column(Float, nullable=False)
     vote = Column(Boolean, nullable=False)
     comment = Column(Text)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False) 
\ No newline at end of file
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # One vote per feedback item, user and label; the vote endpoints insert with ON CONFLICT on it
+        Index("idx_emotion_votes_unique_vote", "feedback_id", "user_id", "label", unique=True),
+    )
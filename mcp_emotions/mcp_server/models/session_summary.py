@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, TIMESTAMP, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from db.base import Base
+
+class SessionSummary(Base):
+    __tablename__ = "session_summaries"
+
+    session_id = Column(String, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    message_count = Column(Integer, nullable=False, default=0)
+    sarcasm_count = Column(Integer, nullable=False, default=0)
+    label_counts = Column(JSONB, nullable=False, default=dict)  # detected label -> messages
+    ewma_scores = Column(JSONB, nullable=False, default=dict)  # label -> exponentially-weighted score
+    recent_messages = Column(JSONB, nullable=False, default=list)  # last SESSION_SUMMARY_RECENT entries
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), nullable=False)
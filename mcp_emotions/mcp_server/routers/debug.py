@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from models.user import User
+from auth.jwt import get_current_admin_user
+from schemas.model_info import ModelsStatus
+from services.model_registry import model_registry
+from services.spanish_emotion import spanish_engine
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+def get_detector():
+    from services import emotion_detector
+    return emotion_detector
+
+@router.get("/models", response_model=ModelsStatus)
+async def list_loaded_models(current_user: User = Depends(get_current_admin_user)):
+    """List resident models with their memory footprint and usage statistics (admin only)."""
+    loaded = model_registry.snapshot()
+    return {
+        "spanish_backend": model_registry.get_backend("emotion:es"),
+        "spanish_engine": spanish_engine.health(),
+        "total_size_bytes": sum(m["size_bytes"] for m in loaded),
+        "models": loaded
+    }
+
+def load_spanish_model(detector) -> None:
+    # Same selection as detection: pysentimiento first, transformers on fallback
+    if detector.get_spanish_analyzer() == "fallback":
+        detector.load_model("es")
+
+def unload_emotion_model(detector, lang: str) -> bool:
+    unloaded = detector.unload_model(lang)
+    if lang == "es":
+        unloaded = detector.unload_spanish_analyzer() or unloaded
+    return unloaded
+
+# Loads and unloads run in the threadpool: they wait for the detector's model lock, which the
+# inference thread holds while it loads a model, and loading itself takes seconds
+@router.post("/models/{kind}/{lang}/load", response_model=ModelsStatus)
+async def preload_model(kind: str, lang: str, current_user: User = Depends(get_current_admin_user)):
+    """Load a model ahead of traffic. ``kind`` is ``emotion`` or ``sarcasm``."""
+    detector = get_detector()
+    lang = lang.lower()
+    try:
+        if kind == "emotion":
+            if lang not in detector.MODEL_MAP:
+                raise HTTPException(status_code=404, detail=f"No emotion model for language: {lang}")
+            if lang == "es":
+                await run_in_threadpool(load_spanish_model, detector)
+            else:
+                await run_in_threadpool(detector.load_model, lang)
+        elif kind == "sarcasm":
+            if lang not in detector.MODEL_MAP_SARCASM:
+                raise HTTPException(status_code=404, detail=f"No sarcasm model for language: {lang}")
+            await run_in_threadpool(detector.load_sarcasm_model, lang)
+        else:
+            raise HTTPException(status_code=404, detail=f"Unknown model kind: {kind}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error preloading {kind}/{lang} model: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load {kind}/{lang} model")
+    return await list_loaded_models(current_user)
+
+@router.delete("/models/{kind}/{lang}", response_model=ModelsStatus)
+async def unload_loaded_model(kind: str, lang: str, current_user: User = Depends(get_current_admin_user)):
+    """Release a resident model; it is loaded again on the next request that needs it."""
+    detector = get_detector()
+    lang = lang.lower()
+    if kind == "emotion":
+        unloaded = await run_in_threadpool(unload_emotion_model, detector, lang)
+    elif kind == "sarcasm":
+        unloaded = await run_in_threadpool(detector.unload_sarcasm_model, lang)
+    else:
+        raise HTTPException(status_code=404, detail=f"Unknown model kind: {kind}")
+    if not unloaded:
+        raise HTTPException(status_code=404, detail=f"Model {kind}/{lang} is not loaded")
+    return await list_loaded_models(current_user)
@@ -0,0 +1,323 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
+from jose import jwt
+from core.config import get_settings
+from db.session import get_db, AsyncSessionLocal
+from models.user import User
+from models.emotion_log import EmotionLog
+from auth.jwt import get_user_from_token
+from auth.api_key import get_current_user_or_api_key, verify_api_key
+from models.api_key import SCOPE_DETECT
+from services.api_keys import api_key_store, is_api_key
+from schemas.emotion import ToolInput, ToolOutput
+from utils.preprocessing import preprocess_input
+from utils.segmentation import SegmentOptions, resolve_options
+from utils.rate_limit import get_user_identifier, exempt_when
+from services.recommender import generate_recommendation
+from services.similarity_index import similarity_index
+from services.session_summary import record_message, summary_cache
+from services.recent_history import recent_history
+from services.batch_scheduler import submit_detection, Overloaded, PRIORITY_INTERACTIVE, PRIORITY_PUBLIC
+from services.emotion_log_partitions import create_missing_partitions, is_missing_partition
+from utils.score_codec import encode_scores
+from utils.metrics import metrics
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from slowapi.errors import RateLimitExceeded
+import asyncio
+import time
+import uuid
+import json
+
+settings = get_settings()
+router = APIRouter(prefix="/tools", tags=["emotion"])
+limiter = Limiter(key_func=get_remote_address)
+
+emotion_log_write_failures = metrics.counter(
+    "emotion_log_write_failures_total",
+    "Detections answered without their emotion log being saved, by reason (missing_partition, error)"
+)
+
+def segment_options(input: ToolInput) -> Optional[SegmentOptions]:
+    return resolve_options(input.segmentation, input.aggregation, input.include_segments)
+
+def request_timeout(headers, default: float) -> float:
+    """Seconds the client will wait (REQUEST_TIMEOUT_HEADER), capped at ADMISSION_MAX_TIMEOUT."""
+    try:
+        timeout = float(headers.get(settings.REQUEST_TIMEOUT_HEADER, default))
+    except ValueError:
+        timeout = default
+    if not timeout > 0:
+        timeout = default
+    return min(timeout, settings.ADMISSION_MAX_TIMEOUT)
+
+def overloaded_error(e: Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Emotion detection is overloaded, please retry later",
+        headers={"Retry-After": e.retry_after_header},
+    )
+
+async def save_emotion_log(db: AsyncSession, user: User, input: ToolInput, session_id: str, analysis: dict) -> None:
+    """
+    Persist a detection and update the session summary, similarity index and recent-history cache;
+    failures are logged and counted, not raised. An insert rejected for lack of a partition creates
+    the missing partitions and is retried once.
+    """
+    user_id = user.id  # read before a rollback expires it
+    try:
+        for attempt in range(2):
+            emotion_log = EmotionLog(
+                session_id=session_id,
+                message=input.message,
+                emotions=json.dumps(analysis["detected_emotions"]),
+                context=input.context or "general",
+                user_id=user_id,
+                sarcasm_detected=analysis["sarcasm_detected"],
+                emotion_scores=encode_scores(analysis["scores"]),
+                score_labels=analysis["score_labels"]
+            )
+            summary = await record_message(db, emotion_log, analysis["detected_emotions"], analysis["scores"])
+            db.add(emotion_log)
+            try:
+                await db.commit()
+                break
+            except IntegrityError as e:
+                await db.rollback()
+                if attempt or not is_missing_partition(e):
+                    raise
+                await create_missing_partitions()
+        if summary is not None:
+            summary_cache.put(summary)
+        similarity_index.add(user_id, emotion_log.id, emotion_log.emotion_scores, emotion_log.score_labels)
+        recent_history.record(emotion_log)
+    except Exception as e:
+        emotion_log_write_failures.inc(reason="missing_partition" if is_missing_partition(e) else "error")
+        print(f"❌ Emotion log not saved: {e}")
+        await db.rollback()
+
+@router.post("/emotion-detector")
+@limiter.limit("30/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def detect_emotion(
+    request: Request,
+    input: ToolInput,
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_DETECT)),
+    db: AsyncSession = Depends(get_db)
+) -> ToolOutput:
+    try:
+        try:
+            cleaned_text = preprocess_input(input.message)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            analysis = await submit_detection(
+                cleaned_text, input.strict_sarcasm, segment_options(input), PRIORITY_INTERACTIVE,
+                request_timeout(request.headers, settings.ADMISSION_TIMEOUT_INTERACTIVE)
+            )
+        except Overloaded as e:
+            raise overloaded_error(e)
+        detected_emotions = analysis["detected_emotions"]
+        is_sarcastic = analysis["sarcasm_detected"]
+
+        session_id = input.session_id or str(uuid.uuid4())
+
+        await save_emotion_log(db, current_user, input, session_id, analysis)
+
+        recommendation = generate_recommendation(detected_emotions, is_sarcastic)
+
+        return ToolOutput(
+            session_id=session_id,
+            detected_emotions=detected_emotions,
+            confidence_scores=analysis["confidence_scores"],
+            sarcasm_detected=is_sarcastic,
+            sarcasm_cues=analysis["sarcasm_cues"],
+            recommendation=recommendation,
+            segments=analysis["segments"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in emotion detection: {e}")
+        raise HTTPException(status_code=500, detail="Error processing emotion detection request")
+
+@router.post("/emotion-detector/public")
+@limiter.limit("5/hour")  # 5 tries per hour per IP
+async def detect_emotion_public(
+    request: Request,
+    input: ToolInput
+) -> ToolOutput:
+    try:
+        try:
+            cleaned_text = preprocess_input(input.message)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        try:
+            analysis = await submit_detection(
+                cleaned_text, input.strict_sarcasm, segment_options(input), PRIORITY_PUBLIC,
+                request_timeout(request.headers, settings.ADMISSION_TIMEOUT_PUBLIC)
+            )
+        except Overloaded as e:
+            raise overloaded_error(e)
+        detected_emotions = analysis["detected_emotions"]
+        is_sarcastic = analysis["sarcasm_detected"]
+
+        session_id = input.session_id or str(uuid.uuid4())
+
+        recommendation = generate_recommendation(detected_emotions, is_sarcastic)
+
+        return ToolOutput(
+            session_id=session_id,
+            detected_emotions=detected_emotions,
+            confidence_scores=analysis["confidence_scores"],
+            sarcasm_detected=is_sarcastic,
+            sarcasm_cues=analysis["sarcasm_cues"],
+            recommendation=recommendation,
+            segments=analysis["segments"]
+        )
+    except RateLimitExceeded:
+        raise HTTPException(
+            status_code=429,
+            detail="You have reached the free trial limit. Please register for unlimited access."
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in public emotion detection: {e}")
+        raise HTTPException(status_code=500, detail="Error processing emotion detection request")
+
+@router.websocket("/emotion-detector/ws")
+async def detect_emotion_ws(websocket: WebSocket):
+    """
+    Streaming emotion detection for live chat.
+
+    Authenticate once with ``Authorization: Bearer <token>``, ``?token=<token>`` or a service API
+    key (``X-API-Key``, or as the token), then send
+    ``{"id": ..., "message": ..., "context": ..., "session_id": ...}`` frames. Each message is
+    answered, possibly out of order, with ``{"id": ..., "type": "result", "result": ToolOutput}``
+    or ``{"id": ..., "type": "error", "status": ..., "detail": ...}``.
+
+    Messages from every connection share the detector's micro-batches. A connection with
+    WS_MAX_INFLIGHT unanswered messages is not read from until one completes, so a fast
+    client is slowed down by TCP flow control instead of queueing without bound. Messages not
+    started within the handshake's ``X-Request-Timeout`` get a 503 error frame with
+    ``retry_after``. The connection is closed when the token expires or the API key is revoked; API-key messages
+    count against the key's rate limit.
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    token = websocket.headers.get("x-api-key") or token
+    if not token:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    api_key = None
+    try:
+        async with AsyncSessionLocal() as db:
+            if is_api_key(token):
+                api_key = await verify_api_key(token, SCOPE_DETECT, db)
+                user = api_key.user
+            else:
+                user = await get_user_from_token(token, db)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if api_key is not None:
+        expires_at = api_key.expires_at.timestamp() if api_key.expires_at else None
+    else:
+        expires_at = jwt.get_unverified_claims(token).get("exp")
+
+    timeout = request_timeout(websocket.headers, settings.ADMISSION_TIMEOUT_INTERACTIVE)
+
+    await websocket.accept()
+    inflight = asyncio.Semaphore(settings.WS_MAX_INFLIGHT)
+    send_lock = asyncio.Lock()
+    tasks = set()
+
+    async def send(frame: dict):
+        """Send a frame; frames for a connection that closed in the meantime are dropped."""
+        async with send_lock:
+            try:
+                await websocket.send_json(frame)
+            except (WebSocketDisconnect, RuntimeError, OSError):
+                # Starlette raises RuntimeError after close, uvicorn ClientDisconnected (an OSError)
+                pass
+
+    async def handle(frame_id, input: ToolInput):
+        try:
+            try:
+                cleaned_text = preprocess_input(input.message)
+            except ValueError as e:
+                await send({"id": frame_id, "type": "error", "status": 400, "detail": str(e)})
+                return
+            try:
+                analysis = await submit_detection(
+                    cleaned_text, input.strict_sarcasm, segment_options(input), PRIORITY_INTERACTIVE, timeout
+                )
+            except Overloaded as e:
+                await send({"id": frame_id, "type": "error", "status": 503, "retry_after": int(e.retry_after_header),
+                            "detail": "Emotion detection is overloaded, please retry later"})
+                return
+            session_id = input.session_id or str(uuid.uuid4())
+            async with AsyncSessionLocal() as db:
+                await save_emotion_log(db, user, input, session_id, analysis)
+            output = ToolOutput(
+                session_id=session_id,
+                detected_emotions=analysis["detected_emotions"],
+                confidence_scores=analysis["confidence_scores"],
+                sarcasm_detected=analysis["sarcasm_detected"],
+                sarcasm_cues=analysis["sarcasm_cues"],
+                recommendation=generate_recommendation(analysis["detected_emotions"], analysis["sarcasm_detected"]),
+                segments=analysis["segments"]
+            )
+            await send({"id": frame_id, "type": "result", "result": output.model_dump()})
+        except Exception as e:
+            # Inference failures (torch raises RuntimeError, e.g. CUDA out of memory) included
+            print(f"Error in streaming emotion detection: {e}")
+            await send({"id": frame_id, "type": "error", "status": 500,
+                        "detail": "Error processing emotion detection request"})
+        finally:
+            inflight.release()
+
+    try:
+        while True:
+            # Backpressure: stop reading while this connection has too many open requests
+            await inflight.acquire()
+            if expires_at is not None and time.time() >= expires_at:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Token expired")
+                break
+            if api_key is not None and api_key_store.verify(token) is None:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="API key revoked")
+                break
+            try:
+                frame = await websocket.receive_json()
+            except (ValueError, KeyError):
+                inflight.release()
+                await send({"id": None, "type": "error", "status": 400, "detail": "Frames must be JSON objects"})
+                continue
+            frame_id = frame.get("id") if isinstance(frame, dict) else None
+            try:
+                input = ToolInput.model_validate(frame)
+            except ValidationError as e:
+                inflight.release()
+                await send({"id": frame_id, "type": "error", "status": 422, "detail": e.errors(include_url=False, include_context=False)})
+                continue
+            retry_after = api_key.bucket.take() if api_key is not None else None
+            if retry_after is not None:
+                inflight.release()
+                await send({"id": frame_id, "type": "error", "status": 429, "retry_after": round(retry_after, 1),
+                            "detail": f"API key rate limit of {api_key.rate_limit} requests per minute exceeded"})
+                continue
+            task = asyncio.create_task(handle(frame_id, input))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
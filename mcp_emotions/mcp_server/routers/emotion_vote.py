@@ -1,17 +1,58 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert
 from db.session import get_db
 from models.emotion_vote import EmotionVote
-from schemas.emotion_vote import EmotionVoteCreate, EmotionVoteResponse
+from schemas.emotion_vote import EmotionVoteCreate, EmotionVoteResponse, EmotionVoteBulkCreate, EmotionVoteBulkResponse
 from models.user import User
 from auth.jwt import get_current_user
-from sqlalchemy import select, and_
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 router = APIRouter(prefix="/feedback", tags=["feedback"])
 limiter = Limiter(key_func=get_remote_address)
 
+VOTE_COLUMNS = (
+    EmotionVote.id, EmotionVote.feedback_id, EmotionVote.user_id, EmotionVote.label,
+    EmotionVote.score, EmotionVote.vote, EmotionVote.comment, EmotionVote.created_at
+)
+
+def vote_response(row) -> dict:
+    return {
+        "id": row.id,
+        "feedback_id": row.feedback_id,
+        "user_id": str(row.user_id),  # Convert UUID to string
+        "label": row.label,
+        "score": row.score,
+        "vote": row.vote,
+        "comment": row.comment or "",
+        "created_at": row.created_at.isoformat() if row.created_at else None  # Convert datetime to string
+    }
+
+async def insert_votes(db: AsyncSession, rows: list) -> list:
+    """
+    Insert vote rows in one statement and return the inserted ones.
+
+    Rows that collide with an existing vote on the (feedback_id, user_id, label) unique index
+    are skipped by the database, so concurrent duplicates cannot slip in between a check and
+    the insert.
+    """
+    statement = (
+        insert(EmotionVote)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["feedback_id", "user_id", "label"])
+        .returning(*VOTE_COLUMNS)
+    )
+    try:
+        inserted = (await db.execute(statement)).all()
+        await db.commit()
+    except IntegrityError:
+        # The only other constraint a vote can violate is the feedback foreign key
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Feedback not found")
+    return inserted
+
 @router.post("/emotion-vote", response_model=EmotionVoteResponse)
 @limiter.limit("30/minute")
 async def emotion_vote(
@@ -20,41 +61,45 @@ async def emotion_vote(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Prevent duplicate votes per feedback/label/user
-    existing = await db.execute(
-        select(EmotionVote).where(
-            and_(
-                EmotionVote.feedback_id == vote.feedback_id,
-                EmotionVote.user_id == current_user.id,
-                EmotionVote.label == vote.label
-            )
-        )
-    )
-    if existing.scalar_one_or_none():
+    inserted = await insert_votes(db, [{
+        "feedback_id": vote.feedback_id,
+        "user_id": current_user.id,
+        "label": vote.label,
+        "score": vote.score,
+        "vote": vote.vote,
+        "comment": vote.comment
+    }])
+    if not inserted:
         raise HTTPException(status_code=400, detail="You have already voted for this emotion on this feedback.")
+    return vote_response(inserted[0])
 
-    db_vote = EmotionVote(
-        feedback_id=vote.feedback_id,
-        user_id=current_user.id,
-        label=vote.label,
-        score=vote.score,
-        vote=vote.vote,
-        comment=vote.comment
-    )
-    db.add(db_vote)
-    await db.commit()
-    await db.refresh(db_vote)
-    
-    # Convert the SQLAlchemy model to response format
-    response_data = {
-        "id": db_vote.id,
-        "feedback_id": db_vote.feedback_id,
-        "user_id": str(db_vote.user_id),  # Convert UUID to string
-        "label": db_vote.label,
-        "score": db_vote.score,
-        "vote": db_vote.vote,
-        "comment": db_vote.comment or "",
-        "created_at": db_vote.created_at.isoformat() if db_vote.created_at else None  # Convert datetime to string
+@router.post("/emotion-votes", response_model=EmotionVoteBulkResponse)
+@limiter.limit("30/minute")
+async def emotion_votes(
+    request: Request,
+    votes: EmotionVoteBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Record the votes for several labels of one feedback item in a single statement.
+
+    Labels this user already voted on are listed in ``skipped`` and keep their earlier vote.
+    """
+    inserted = await insert_votes(db, [
+        {
+            "feedback_id": votes.feedback_id,
+            "user_id": current_user.id,
+            "label": item.label,
+            "score": item.score,
+            "vote": item.vote,
+            "comment": item.comment
+        }
+        for item in votes.votes
+    ])
+    created_labels = {row.label for row in inserted}
+    return {
+        "feedback_id": votes.feedback_id,
+        "created": [vote_response(row) for row in inserted],
+        "skipped": [item.label for item in votes.votes if item.label not in created_labels]
     }
-    
-    return response_data 
\ No newline at end of file
@@ -1,11 +1,15 @@
+from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, text
+from sqlalchemy import select, insert, text
 from langdetect import detect
-from db.session import get_db
+from db.session import get_db, get_read_db
 from models.feedback import Feedback
 from models.language import Language
-from schemas.feedback import FeedbackCreate, FeedbackResponse
+from schemas.feedback import FeedbackCreate, FeedbackResponse, FeedbackBatchCreate, FeedbackBatchResponse
+from services.languages import detect_language_code, language_map
+from utils.http_cache import FastJSONResponse
 from models.user import User
 from auth.jwt import get_current_user
 from slowapi import Limiter
@@ -25,14 +29,22 @@ async def get_language_id(db: AsyncSession, language_code: str) -> int:
     except Exception:
         return None
 
-@router.post("/submit", response_model=FeedbackResponse)
-@limiter.limit("10/minute")  # 10 feedbacks per minute per IP
-async def submit_feedback(
-    request: Request,
-    feedback: FeedbackCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+def feedback_response(feedback, language_code) -> dict:
+    """Response dict for a Feedback entity or a row with the same columns."""
+    return {
+        "id": feedback.id,
+        "user_id": str(feedback.user_id),
+        "language_id": feedback.language_id,
+        "text": feedback.text,
+        "predicted_emotions": feedback.predicted_emotions,
+        "suggested_emotions": feedback.suggested_emotions or [],
+        "comment": feedback.comment or "",
+        "language_code": language_code,
+        "created_at": feedback.created_at.isoformat() if feedback.created_at else None
+    }
+
+async def create_feedback(db: AsyncSession, current_user: User, feedback: FeedbackCreate) -> dict:
+    """Store one feedback item: language detection, language lookup, insert, commit and refresh."""
     # Detect language from text or use provided language_code
     detected_language = None
     language_id = None
@@ -64,57 +76,78 @@ async def submit_feedback(
     await db.refresh(db_feedback)
     
     # Convert the SQLAlchemy model to response format
-    response_data = {
-        "id": db_feedback.id,
-        "user_id": str(db_feedback.user_id),
-        "language_id": db_feedback.language_id,
-        "text": db_feedback.text,
-        "predicted_emotions": db_feedback.predicted_emotions,
-        "suggested_emotions": db_feedback.suggested_emotions or [],
-        "comment": db_feedback.comment or "",
-        "language_code": detected_language,
-        "created_at": db_feedback.created_at.isoformat() if db_feedback.created_at else None
-    }
-    
-    return response_data
+    return feedback_response(db_feedback, detected_language)
+
+async def create_feedback_batch(db: AsyncSession, current_user: User, items: List[FeedbackCreate]) -> List[dict]:
+    """
+    Store many feedback items with one language-detection pass and one INSERT ... RETURNING.
+
+    Languages are detected off the event loop in a single threadpool call, language ids come
+    from the in-memory language map, and all rows go to the database in one multi-row
+    statement (all or nothing). Results are in the order of ``items``.
+    """
+    codes = await run_in_threadpool(
+        lambda: [item.language_code.lower() if item.language_code else detect_language_code(item.text) for item in items]
+    )
+    language_ids = await language_map.resolve(db, codes)
+    rows = [
+        {
+            "user_id": current_user.id,
+            "language_id": language_ids.get(code),
+            "text": item.text,
+            "predicted_emotions": item.predicted_emotions,
+            "suggested_emotions": item.suggested_emotions or None,
+            "comment": item.comment or None
+        }
+        for item, code in zip(items, codes)
+    ]
+    result = await db.execute(
+        insert(Feedback).returning(
+            Feedback.id, Feedback.user_id, Feedback.language_id, Feedback.text, Feedback.predicted_emotions,
+            Feedback.suggested_emotions, Feedback.comment, Feedback.created_at,
+            sort_by_parameter_order=True
+        ),
+        rows
+    )
+    inserted = result.all()
+    await db.commit()
+    return [feedback_response(row, code) for row, code in zip(inserted, codes)]
+
+@router.post("/submit", response_model=FeedbackResponse)
+@limiter.limit("10/minute")  # 10 feedbacks per minute per IP
+async def submit_feedback(
+    request: Request,
+    feedback: FeedbackCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await create_feedback(db, current_user, feedback)
+
+@router.post("/submit/batch", response_model=FeedbackBatchResponse)
+@limiter.limit("10/minute")
+async def submit_feedback_batch(
+    request: Request,
+    batch: FeedbackBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Submit up to FEEDBACK_BATCH_MAX_ITEMS feedback items in one call; stored all or nothing."""
+    return {"items": await create_feedback_batch(db, current_user, batch.items)}
 
 @router.get("/list", response_model=list[FeedbackResponse])
 @limiter.limit("30/minute")
 async def list_feedback(
     request: Request,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """List all feedback records for the current user"""
+    # Projected columns with the language code joined in: one query, no ORM entities
     result = await db.execute(
-        select(Feedback)
+        select(Feedback.id, Feedback.user_id, Feedback.language_id, Feedback.text, Feedback.predicted_emotions,
+               Feedback.suggested_emotions, Feedback.comment, Feedback.created_at, Language.code)
+        .outerjoin(Language, Language.id == Feedback.language_id)
         .where(Feedback.user_id == current_user.id)
         .order_by(Feedback.created_at.desc())
     )
-    feedbacks = result.scalars().all()
-    
-    # Convert to response format and include language_code for each feedback
-    response_feedbacks = []
-    for feedback in feedbacks:
-        # Get language code if language_id exists
-        language_code = None
-        if feedback.language_id:
-            lang_result = await db.execute(
-                select(Language.code).where(Language.id == feedback.language_id)
-            )
-            language_code = lang_result.scalar_one_or_none()
-        
-        response_data = {
-            "id": feedback.id,
-            "user_id": str(feedback.user_id),
-            "language_id": feedback.language_id,
-            "text": feedback.text,
-            "predicted_emotions": feedback.predicted_emotions,
-            "suggested_emotions": feedback.suggested_emotions or [],
-            "comment": feedback.comment or "",
-            "language_code": language_code,
-            "created_at": feedback.created_at.isoformat() if feedback.created_at else None
-        }
-        response_feedbacks.append(response_data)
-    
-    return response_feedbacks 
\ No newline at end of file
+    return FastJSONResponse([feedback_response(row, row.code) for row in result.all()])
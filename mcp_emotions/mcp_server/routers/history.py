@@ -0,0 +1,302 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from db.session import get_db, get_read_db
+from models.user import User
+from models.emotion_log import EmotionLog
+from auth.api_key import get_current_user_or_api_key
+from models.api_key import SCOPE_HISTORY
+from utils.rate_limit import get_user_identifier, exempt_when
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+from services.emotion_labels import scores_to_confidence
+from services.thresholds import threshold_store
+from services.similarity_index import similarity_index
+from services.session_summary import get_summary
+from services.recent_history import recent_history, history_cache_requests, user_key, session_key, RECENT_COLUMNS
+from utils.score_codec import decode_scores
+from utils.http_cache import Validator, not_modified, not_modified_response, json_response
+from datetime import datetime
+from typing import Optional, Tuple
+import uuid
+import orjson
+
+router = APIRouter(prefix="/tools/emotion-history", tags=["emotion-history"])
+limiter = Limiter(key_func=get_remote_address)
+
+def stored_confidence_scores(log) -> dict:
+    """Confidence scores from the stored probability vector; empty for rows not yet backfilled."""
+    if not log.emotion_scores:
+        return {}
+    label_key = log.score_labels or "en"
+    return scores_to_confidence(decode_scores(log.emotion_scores), label_key, threshold_store.for_label_set(label_key))
+
+def parse_emotions(value: str) -> list:
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return []
+
+# History entry fields: the columns each one is built from, and how
+HISTORY_FIELDS = {
+    "session_id": ((EmotionLog.session_id,), lambda row: row.session_id),
+    "message": ((EmotionLog.message,), lambda row: row.message),
+    "emotions": ((EmotionLog.emotions,), lambda row: parse_emotions(row.emotions)),
+    "context": ((EmotionLog.context,), lambda row: row.context),
+    "sarcasm_detected": ((EmotionLog.sarcasm_detected,), lambda row: row.sarcasm_detected),
+    "timestamp": ((EmotionLog.created_at,), lambda row: row.created_at),
+    "confidence_scores": ((EmotionLog.emotion_scores, EmotionLog.score_labels), stored_confidence_scores),
+}
+USER_FIELDS = ("session_id", "message", "emotions", "context", "sarcasm_detected", "timestamp")
+SESSION_FIELDS = ("message", "emotions", "context", "sarcasm_detected", "timestamp")
+
+def history_fields(fields: Optional[str], default: Tuple[str, ...], include_scores: bool) -> Tuple[str, ...]:
+    """
+    Entry fields of a history response: the comma-separated ``fields`` parameter (sparse
+    fieldset, e.g. ``emotions,timestamp``), or the endpoint's default fields.
+    """
+    if fields is None:
+        return default + ("confidence_scores",) if include_scores else default
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in HISTORY_FIELDS]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields {', '.join(unknown) or '(none given)'}; choose from {', '.join(HISTORY_FIELDS)}"
+        )
+    return requested
+
+def history_query(fields: Tuple[str, ...], *extra):
+    """SELECT of only the columns behind ``fields`` (and ``extra``), loaded as plain rows instead of ORM entities."""
+    columns = list(dict.fromkeys([column for name in fields for column in HISTORY_FIELDS[name][0]] + list(extra)))
+    return select(*columns)
+
+def history_entries(rows, fields: Tuple[str, ...]) -> list:
+    getters = [(name, HISTORY_FIELDS[name][1]) for name in fields]
+    return [{name: get(row) for name, get in getters} for row in rows]
+
+async def history_validator(db: AsyncSession, condition, variant: str) -> Validator:
+    """Row count and newest created_at of a history, answered from the (user_id|session_id, created_at) indexes."""
+    result = await db.execute(select(func.count(), func.max(EmotionLog.created_at)).where(condition))
+    count, last_modified = result.one()
+    return Validator(count, last_modified, variant)
+
+def history_variant(request: Request, fields: Tuple[str, ...], limit: Optional[int] = None,
+                    before: Optional[datetime] = None) -> str:
+    # Stored scores are rendered with the current thresholds, so their version is part of the ETag
+    include_scores = "confidence_scores" in fields
+    variant = f"{request.url.path}|{','.join(fields)}|{threshold_store.current_version() if include_scores else ''}"
+    if limit is not None or before is not None:
+        variant += f"|{limit or ''}|{before.isoformat() if before else ''}"
+    return variant
+
+async def history_page(request: Request, db: AsyncSession, key, condition, fields: Tuple[str, ...],
+                       limit: Optional[int], before: Optional[datetime]):
+    """
+    Rows of a history page, newest first, and its validator; rows is None when the client's
+    copy is current.
+
+    Without ``limit`` every entry (older than ``before``) is read. First pages of up to
+    RECENT_HISTORY_SIZE entries, and whole histories no longer than that, are served from the
+    recent-history cache: without a query while it is fresh, with the validator query alone
+    while it matches the database, and reloaded otherwise (see services/recent_history.py).
+    """
+    variant = history_variant(request, fields, limit, before)
+    validator = None
+    if recent_history.cacheable(limit, before):
+        cached = recent_history.page(key, limit)
+        if cached is not None:
+            rows, count, last_modified = cached
+            history_cache_requests.inc(result="hit")
+            validator = Validator(count, last_modified, variant)
+            return (None if not_modified(request, validator) else rows), validator
+
+        validator = await history_validator(db, condition, variant)
+
+    if validator is not None and (limit is not None or validator.count <= recent_history.size):
+        rows = recent_history.check(key, validator.count, validator.last_modified, limit)
+        if rows is not None:
+            history_cache_requests.inc(result="checked")
+            return (None if not_modified(request, validator) else rows), validator
+        if not_modified(request, validator):
+            return None, validator
+
+        recent_history.begin_load(key)
+        try:
+            result = await db.execute(
+                select(*RECENT_COLUMNS)
+                .where(condition)
+                .order_by(EmotionLog.created_at.desc())
+                # One more row than a buffer holds tells a whole history from a longer one
+                .limit(recent_history.size + 1)
+            )
+            rows = result.all()
+        except BaseException:
+            recent_history.abort_load(key)
+            raise
+        recent_history.finish_load(key, rows, validator.count, validator.last_modified)
+        if limit is not None or len(rows) == validator.count:
+            history_cache_requests.inc(result="loaded")
+            return rows[:limit], validator
+
+    # A whole history longer than a buffer, or one that changed since the validator query, is
+    # read from the database
+    if validator is not None and validator.count > recent_history.size:
+        history_cache_requests.inc(result="too_long")
+    else:
+        if validator is not None:
+            history_cache_requests.inc(result="changed")
+        validator = await history_validator(db, condition, variant)
+    if not_modified(request, validator):
+        return None, validator
+    query = history_query(fields, EmotionLog.created_at).where(condition)
+    if before is not None:
+        query = query.where(EmotionLog.created_at < before)
+    query = query.order_by(EmotionLog.created_at.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    result = await db.execute(query)
+    return result.all(), validator
+
+def history_body(body: dict, rows, fields: Tuple[str, ...], limit: Optional[int], chronological: bool = False) -> dict:
+    """Response body of a page of newest-first ``rows``, with the ``before`` cursor of the next page."""
+    body["history"] = history_entries(rows[::-1] if chronological else rows, fields)
+    if limit is not None:
+        # Older entries may remain only when the page is full
+        body["next_before"] = rows[-1].created_at if rows and len(rows) == limit else None
+    return body
+
+@router.get("/user")
+@limiter.limit("30/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def get_user_emotion_history(
+    request: Request,
+    include_scores: bool = False,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_HISTORY)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    fields = history_fields(fields, USER_FIELDS, include_scores)
+    rows, validator = await history_page(
+        request, db, user_key(current_user.id), EmotionLog.user_id == current_user.id, fields, limit, before
+    )
+    if rows is None:
+        return not_modified_response(validator)
+    return json_response(request, history_body({"user_id": str(current_user.id)}, rows, fields, limit), validator)
+
+async def load_similarity_partition(db: AsyncSession, user_id: uuid.UUID):
+    partition = similarity_index.get(user_id)
+    if partition is None:
+        similarity_index.begin_load(user_id)
+        try:
+            result = await db.execute(
+                select(EmotionLog.id, EmotionLog.emotion_scores, EmotionLog.score_labels)
+                .where(EmotionLog.user_id == user_id, EmotionLog.emotion_scores.isnot(None))
+                .order_by(EmotionLog.created_at)
+            )
+            rows = result.all()
+        except BaseException:
+            similarity_index.abort_load(user_id)
+            raise
+        partition = similarity_index.finish_load(user_id, rows)
+    return partition
+
+# Declared before /{session_id} so "similar" is not taken for a session id. Served from the
+# writer: a partition loaded from a lagging replica would miss rows committed before the load.
+@router.get("/similar")
+@limiter.limit("60/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def get_similar_moments(
+    request: Request,
+    log_id: Optional[uuid.UUID] = None,
+    k: int = Query(5, ge=1, le=50),
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_HISTORY)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Earlier entries of the current user whose emotion vectors are closest to ``log_id`` (default: latest entry)."""
+    partition = await load_similarity_partition(db, current_user.id)
+    if not len(partition):
+        return json_response(request, {"user_id": str(current_user.id), "log_id": None, "matches": []})
+
+    log_id = log_id or partition.ids[-1]
+    query = partition.vector(log_id)
+    if query is None:
+        raise HTTPException(status_code=404, detail="Entry not found or has no emotion scores")
+
+    matches = partition.search(query, k, exclude=log_id)
+    result = await db.execute(
+        select(EmotionLog.id, EmotionLog.session_id, EmotionLog.message, EmotionLog.emotions,
+               EmotionLog.context, EmotionLog.sarcasm_detected, EmotionLog.created_at)
+        .where(EmotionLog.id.in_([match_id for match_id, _ in matches]))
+    )
+    rows = {row.id: row for row in result.all()}
+    similar = []
+    for match_id, similarity in matches:
+        row = rows.get(match_id)
+        if row is None:
+            continue
+        similar.append({
+            "log_id": str(row.id),
+            "session_id": row.session_id,
+            "message": row.message,
+            "emotions": parse_emotions(row.emotions),
+            "context": row.context,
+            "sarcasm_detected": row.sarcasm_detected,
+            "timestamp": row.created_at,
+            "similarity": round(similarity, 4)
+        })
+    return json_response(request, {"user_id": str(current_user.id), "log_id": str(log_id), "matches": similar})
+
+@router.get("/{session_id}")
+@limiter.limit("30/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def get_emotion_history(
+    request: Request,
+    session_id: str,
+    include_scores: bool = False,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_HISTORY)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Entries of a session in chronological order; with ``limit``, its latest ``limit`` entries."""
+    fields = history_fields(fields, SESSION_FIELDS, include_scores)
+    rows, validator = await history_page(
+        request, db, session_key(session_id), EmotionLog.session_id == session_id, fields, limit, before
+    )
+    if rows is None:
+        return not_modified_response(validator)
+    return json_response(request, history_body({"session_id": session_id}, rows, fields, limit, chronological=True), validator)
+
+@router.get("/{session_id}/summary")
+@limiter.limit("120/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def get_session_summary(
+    request: Request,
+    session_id: str,
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_HISTORY)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Running aggregates of a session, maintained on every write (see services/session_summary.py)."""
+    summary = await get_summary(db, session_id, current_user.id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return summary
+
+# Example of a user-based rate limit
+@router.get("/user/detailed")
+@limiter.limit("100/hour", key_func=get_user_identifier)  # Rate limit: 100 requests per hour per user
+async def get_detailed_user_emotion_history(
+    request: Request,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[datetime] = None,
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_HISTORY)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    fields = history_fields(fields, USER_FIELDS, True)
+    rows, validator = await history_page(
+        request, db, user_key(current_user.id), EmotionLog.user_id == current_user.id, fields, limit, before
+    )
+    if rows is None:
+        return not_modified_response(validator)
+    return json_response(request, history_body({"user_id": str(current_user.id)}, rows, fields, limit), validator)
@@ -0,0 +1,169 @@
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert
+from typing import List, Optional
+from core.config import get_settings
+from db.session import get_db, AsyncSessionLocal
+from models.user import User
+from models.analysis_job import AnalysisJob, AnalysisJobItem, JOB_PENDING, JOB_COMPLETED, ITEM_PENDING
+from auth.api_key import get_current_user_or_api_key
+from models.api_key import SCOPE_JOBS
+from schemas.job import JobCreate, JobCreated
+from services.job_worker import job_progress, job_to_dict
+from utils.rate_limit import get_user_identifier, exempt_when
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+import asyncio
+import csv
+import io
+import json
+import uuid
+
+settings = get_settings()
+router = APIRouter(prefix="/tools/jobs", tags=["jobs"])
+limiter = Limiter(key_func=get_remote_address)
+
+# Rows per INSERT statement when storing a job's messages
+INSERT_BATCH = 1000
+
+async def create_job(db: AsyncSession, user: User, messages: List[str], context: Optional[str]) -> JobCreated:
+    if not messages:
+        raise HTTPException(status_code=400, detail="No messages to analyze")
+    if len(messages) > settings.JOB_MAX_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"A job accepts at most {settings.JOB_MAX_MESSAGES} messages")
+
+    job = AnalysisJob(id=uuid.uuid4(), user_id=user.id, status=JOB_PENDING, context=context,
+                      total=len(messages), processed=0, failed=0)
+    db.add(job)
+    await db.flush()
+    for start in range(0, len(messages), INSERT_BATCH):
+        await db.execute(
+            insert(AnalysisJobItem),
+            [
+                {"job_id": job.id, "position": start + i, "message": message, "status": ITEM_PENDING}
+                for i, message in enumerate(messages[start:start + INSERT_BATCH])
+            ]
+        )
+    await db.commit()
+    return JobCreated(job_id=str(job.id), status=job.status, total=job.total)
+
+def parse_upload(filename: str, content: bytes, text_field: str) -> List[str]:
+    """Messages from a .jsonl (``text_field`` key), .csv (``text_field`` column) or plain text (one per line) file."""
+    text = content.decode("utf-8-sig")
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return [str(json.loads(line).get(text_field) or "") for line in text.splitlines() if line.strip()]
+    if name.endswith(".csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        if text_field not in (reader.fieldnames or []):
+            raise ValueError(f"CSV has no '{text_field}' column")
+        return [row[text_field] or "" for row in reader]
+    return [line for line in text.splitlines() if line.strip()]
+
+async def get_user_job(db: AsyncSession, job_id: uuid.UUID, user: User) -> AnalysisJob:
+    job = await db.get(AnalysisJob, job_id)
+    if job is None or job.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("", response_model=JobCreated, status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("10/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def submit_job(
+    request: Request,
+    job: JobCreate,
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_JOBS)),
+    db: AsyncSession = Depends(get_db)
+):
+    return await create_job(db, current_user, job.messages, job.context)
+
+@router.post("/upload", response_model=JobCreated, status_code=status.HTTP_202_ACCEPTED)
+@limiter.limit("10/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def submit_job_file(
+    request: Request,
+    file: UploadFile = File(...),
+    context: Optional[str] = Form(None),
+    text_field: str = Form("message"),
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_JOBS)),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        messages = parse_upload(file.filename, await file.read(), text_field)
+    except (ValueError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not parse {file.filename}: {e}")
+    too_long = next((i for i, message in enumerate(messages) if len(message) > settings.MAX_MESSAGE_LENGTH), None)
+    if too_long is not None:
+        raise HTTPException(status_code=400, detail=f"Message {too_long} is longer than {settings.MAX_MESSAGE_LENGTH} characters")
+    return await create_job(db, current_user, messages, context)
+
+@router.get("/{job_id}")
+@limiter.limit("120/minute", key_func=get_user_identifier, exempt_when=lambda: exempt_when)
+async def get_job(
+    request: Request,
+    job_id: uuid.UUID,
+    after: int = Query(-1, ge=-1, description="return results with a position greater than this"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_JOBS)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Job progress plus one page of results in submission order (keyset pagination on position)."""
+    job = await get_user_job(db, job_id, current_user)
+    result = await db.execute(
+        select(AnalysisJobItem.position, AnalysisJobItem.message, AnalysisJobItem.status,
+               AnalysisJobItem.result, AnalysisJobItem.error)
+        .where(AnalysisJobItem.job_id == job.id, AnalysisJobItem.position > after)
+        .order_by(AnalysisJobItem.position)
+        .limit(limit)
+    )
+    items = [
+        {
+            "position": row.position,
+            "message": row.message,
+            "status": row.status,
+            "result": row.result,
+            "error": row.error
+        }
+        for row in result.all()
+    ]
+    return {
+        **job_to_dict(job),
+        "results": items,
+        "next_after": items[-1]["position"] if len(items) == limit else None
+    }
+
+@router.get("/{job_id}/events")
+async def stream_job_events(
+    request: Request,
+    job_id: uuid.UUID,
+    current_user: User = Depends(get_current_user_or_api_key(SCOPE_JOBS)),
+    db: AsyncSession = Depends(get_db)
+):
+    """Server-Sent Events: a ``progress`` event whenever the counters change, ``done`` at the end."""
+    await get_user_job(db, job_id, current_user)
+    # Do not hold the request's connection for the lifetime of the stream
+    await db.close()
+
+    async def events():
+        last = None
+        while not await request.is_disconnected():
+            async with AsyncSessionLocal() as poll_db:
+                progress = await job_progress(poll_db, job_id)
+            if progress is None:
+                break
+            snapshot = (progress["status"], progress["processed"], progress["failed"])
+            if snapshot != last:
+                last = snapshot
+                event = "done" if progress["status"] == JOB_COMPLETED else "progress"
+                yield f"event: {event}\ndata: {json.dumps(progress, default=str)}\n\n"
+                if event == "done":
+                    break
+            else:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(settings.JOB_EVENTS_INTERVAL)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
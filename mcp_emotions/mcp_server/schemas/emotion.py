@@ -0,0 +1,29 @@
+from typing import Literal, Optional, List, Dict
+from pydantic import BaseModel, constr
+from core.config import get_settings
+
+settings = get_settings()
+
+class ToolInput(BaseModel):
+    message: constr(min_length=1, max_length=settings.MAX_MESSAGE_LENGTH)
+    context: Optional[str] = None
+    session_id: Optional[str] = None
+    strict_sarcasm: bool = False  # Always run the sarcasm model, even in cascade mode
+    segmentation: Optional[Literal["off", "sentence", "window"]] = None  # Default: SEGMENTATION setting
+    aggregation: Optional[Literal["max", "mean", "last"]] = None  # Default: SEGMENT_AGGREGATION setting
+    include_segments: bool = False  # Return per-segment results when segmentation is on
+
+class SegmentOutput(BaseModel):
+    text: str
+    detected_emotions: List[str]
+    confidence_scores: Dict[str, int]
+    sarcasm_detected: bool
+
+class ToolOutput(BaseModel):
+    session_id: str
+    detected_emotions: List[str]
+    confidence_scores: Dict[str, int]
+    sarcasm_detected: bool
+    sarcasm_cues: List[str] = []  # Sarcasm cues found in the message
+    recommendation: Optional[str] = None
+    segments: Optional[List[SegmentOutput]] = None
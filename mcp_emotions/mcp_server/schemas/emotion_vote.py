@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, validator
+from typing import List, Optional
 from uuid import UUID
 
 class EmotionVoteCreate(BaseModel):
@@ -15,4 +15,26 @@ class EmotionVoteResponse(EmotionVoteCreate):
     created_at: str
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class EmotionVoteItem(BaseModel):
+    label: str
+    score: float
+    vote: bool
+    comment: Optional[str] = Field(None, max_length=500)
+
+class EmotionVoteBulkCreate(BaseModel):
+    feedback_id: int
+    votes: List[EmotionVoteItem] = Field(..., min_length=1, max_length=64)
+
+    @validator('votes')
+    def unique_labels(cls, v):
+        labels = [item.label for item in v]
+        if len(set(labels)) != len(labels):
+            raise ValueError("Each label can only be voted once per request")
+        return v
+
+class EmotionVoteBulkResponse(BaseModel):
+    feedback_id: int
+    created: List[EmotionVoteResponse]
+    skipped: List[str]  # Labels this user had already voted on; their votes are unchanged
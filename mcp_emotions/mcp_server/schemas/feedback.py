@@ -2,6 +2,9 @@ from typing import List, Dict, Optional
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
 from uuid import UUID
+from core.config import get_settings
+
+settings = get_settings()
 
 class FeedbackBase(BaseModel):
     text: str
@@ -26,4 +29,10 @@ class FeedbackResponse(FeedbackBase):
     created_at: str  # Will be converted from datetime to string
     
     class Config:
-        from_attributes = True  # Allow conversion from SQLAlchemy model 
\ No newline at end of file
+        from_attributes = True  # Allow conversion from SQLAlchemy model
+
+class FeedbackBatchCreate(BaseModel):
+    items: List[FeedbackCreate] = Field(..., min_length=1, max_length=settings.FEEDBACK_BATCH_MAX_ITEMS)
+
+class FeedbackBatchResponse(BaseModel):
+    items: List[FeedbackResponse]  # In the order they were submitted
@@ -0,0 +1,14 @@
+from typing import List, Optional
+from pydantic import BaseModel, constr
+from core.config import get_settings
+
+settings = get_settings()
+
+class JobCreate(BaseModel):
+    messages: List[constr(min_length=1, max_length=settings.MAX_MESSAGE_LENGTH)]
+    context: Optional[str] = None
+
+class JobCreated(BaseModel):
+    job_id: str
+    status: str
+    total: int
@@ -0,0 +1,30 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class ModelInfo(BaseModel):
+    key: str
+    identifier: str
+    backend: str
+    device: str
+    parameters: int
+    size_bytes: int
+    load_seconds: float
+    loaded_at: str
+    last_used_at: Optional[str] = None
+    request_count: int  # texts inferred
+    avg_inference_ms: Optional[float] = None  # per text
+    batch_count: int = 0  # forward passes
+    avg_batch_ms: Optional[float] = None  # per forward pass
+
+class SpanishEngineHealth(BaseModel):
+    state: str  # "ready", "degraded", "backoff" or "not_loaded"
+    consecutive_failures: int
+    retry_in_seconds: Optional[float] = None
+    last_error: Optional[str] = None
+    last_error_at: Optional[str] = None
+
+class ModelsStatus(BaseModel):
+    spanish_backend: str  # "pysentimiento", "fallback" or "not_loaded"
+    spanish_engine: SpanishEngineHealth
+    total_size_bytes: int
+    models: List[ModelInfo]
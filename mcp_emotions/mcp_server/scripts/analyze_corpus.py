@@ -0,0 +1,280 @@
+"""
+Score an archived message corpus offline with the same pipeline as the detector endpoint.
+
+Reads JSONL, CSV or Parquet, splits it into fixed-size chunks and fans the chunks out to a
+process pool. Every worker loads the models once and runs preprocessing, language
+detection, sarcasm and emotion detection as batched forward passes. Results are appended
+to JSONL (or written as one Parquet part file per chunk) strictly in input order, and a
+checkpoint is updated after each chunk, so an interrupted run resumes with --resume
+without rescoring or duplicating anything.
+
+Usage (from the mcp_server directory):
+    python -m scripts.analyze_corpus messages.jsonl --output scored.jsonl --workers 4
+    python -m scripts.analyze_corpus archive.parquet --output scored/ --text-field body --resume
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from multiprocessing import get_context
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# ---------------------------------------------------------------------------
+# Input
+# ---------------------------------------------------------------------------
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".csv":
+        return "csv"
+    if ext == ".parquet":
+        return "parquet"
+    raise SystemExit(f"Cannot infer the input format of {path}; pass --format")
+
+
+def iter_rows(path: str, fmt: str) -> Iterator[Dict]:
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet input requires pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=10000):
+            yield from batch.to_pylist()
+
+
+def iter_chunks(rows: Iterator[Dict], text_field: str, id_field: Optional[str],
+                chunk_size: int, skip_chunks: int) -> Iterator[Tuple[int, List[Tuple[str, str]]]]:
+    """Yield ``(chunk_index, [(row_id, text), ...])``; chunk boundaries only depend on row order."""
+    chunk: List[Tuple[str, str]] = []
+    chunk_index = 0
+    for row_number, row in enumerate(rows):
+        if chunk_index >= skip_chunks:
+            row_id = str(row.get(id_field)) if id_field else str(row_number)
+            chunk.append((row_id, row.get(text_field) or ""))
+        if (row_number + 1) % chunk_size == 0:
+            if chunk:
+                yield chunk_index, chunk
+            chunk = []
+            chunk_index += 1
+    if chunk:
+        yield chunk_index, chunk
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+_detector = None
+
+
+def init_worker(torch_threads: int):
+    """Load every model once per worker process."""
+    global _detector
+    import torch
+    torch.set_num_threads(torch_threads)
+    from services import emotion_detector
+    emotion_detector.load_model("en")
+    _detector = emotion_detector
+
+
+def score_chunk(chunk_index: int, chunk: List[Tuple[str, str]]) -> Tuple[int, List[Dict], int, float]:
+    from utils.preprocessing import preprocess_input
+    from services.recommender import generate_recommendation
+
+    start = time.perf_counter()
+    results: List[Optional[Dict]] = [None] * len(chunk)
+    valid_indices, cleaned = [], []
+    for i, (row_id, text) in enumerate(chunk):
+        try:
+            cleaned.append(preprocess_input(text))
+            valid_indices.append(i)
+        except ValueError as e:
+            results[i] = {"id": row_id, "error": str(e)}
+
+    for i, analysis in zip(valid_indices, _detector.analyze_batch(cleaned) if cleaned else []):
+        results[i] = {
+            "id": chunk[i][0],
+            "language": analysis["language"],
+            "detected_emotions": analysis["detected_emotions"],
+            "confidence_scores": analysis["confidence_scores"],
+            "score_labels": analysis["score_labels"],
+            "scores": [round(score, 4) for score in analysis["scores"]],
+            "sarcasm_detected": analysis["sarcasm_detected"],
+            "sarcasm_cues": analysis["sarcasm_cues"],
+            "recommendation": generate_recommendation(analysis["detected_emotions"], analysis["sarcasm_detected"])
+        }
+    return chunk_index, results, os.getpid(), time.perf_counter() - start
+
+# ---------------------------------------------------------------------------
+# Output and checkpointing
+# ---------------------------------------------------------------------------
+
+class JsonlWriter:
+    def __init__(self, path: str, truncate_to: int):
+        self.path = path
+        mode = "r+b" if os.path.exists(path) else "wb"
+        self.file = open(path, mode)
+        # Drop anything written after the last checkpoint (a partially written chunk)
+        self.file.truncate(truncate_to)
+        self.file.seek(truncate_to)
+
+    def write(self, chunk_index: int, results: List[Dict]) -> int:
+        self.file.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in results).encode("utf-8"))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def result_schema():
+    """Schema of every Parquet part file, so error rows and result rows share the same columns."""
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.string()),
+        ("error", pa.string()),
+        ("language", pa.string()),
+        ("detected_emotions", pa.list_(pa.string())),
+        ("confidence_scores", pa.string()),  # JSON object
+        ("score_labels", pa.string()),
+        ("scores", pa.list_(pa.float64())),
+        ("sarcasm_detected", pa.bool_()),
+        ("sarcasm_cues", pa.list_(pa.string())),
+        ("recommendation", pa.string()),
+    ])
+
+
+class ParquetWriter:
+    def __init__(self, path: str):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)")
+        self.path = path
+        self.schema = result_schema()
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, chunk_index: int, results: List[Dict]) -> int:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        rows = [
+            {**r, "confidence_scores": json.dumps(r["confidence_scores"]) if "confidence_scores" in r else None}
+            for r in results
+        ]
+        part = os.path.join(self.path, f"part-{chunk_index:08d}.parquet")
+        # Columns a row lacks (all result columns of an error row, ``error`` of a result row) are null
+        pq.write_table(pa.Table.from_pylist(rows, schema=self.schema), part + ".tmp")
+        os.replace(part + ".tmp", part)
+        return 0
+
+    def close(self):
+        pass
+
+
+def load_checkpoint(path: str) -> Dict:
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"next_chunk": 0, "rows_done": 0, "output_bytes": 0}
+
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def report_throughput(worker_stats: Dict[int, List[float]], rows_done: int, elapsed: float):
+    print(f"{rows_done} rows in {elapsed:.1f}s ({rows_done / elapsed if elapsed else 0:.1f} rows/s overall)")
+    for pid, (rows, seconds) in sorted(worker_stats.items()):
+        print(f"  worker {pid}: {int(rows)} rows, {rows / seconds if seconds else 0:.1f} rows/s")
+
+
+def run(args):
+    fmt = args.format or detect_format(args.input)
+    output_is_parquet = args.output.endswith(".parquet") or args.output.endswith("/")
+    checkpoint_path = args.checkpoint or args.output.rstrip("/") + ".checkpoint.json"
+
+    if args.resume:
+        checkpoint = load_checkpoint(checkpoint_path)
+        print(f"Resuming at chunk {checkpoint['next_chunk']} ({checkpoint['rows_done']} rows done)")
+    else:
+        if os.path.exists(checkpoint_path):
+            raise SystemExit(f"{checkpoint_path} exists; pass --resume or remove it")
+        checkpoint = {"next_chunk": 0, "rows_done": 0, "output_bytes": 0}
+
+    writer = ParquetWriter(args.output) if output_is_parquet else JsonlWriter(args.output, checkpoint["output_bytes"])
+    chunks = iter_chunks(iter_rows(args.input, fmt), args.text_field, args.id_field, args.batch_size, checkpoint["next_chunk"])
+
+    torch_threads = max(1, (os.cpu_count() or 1) // args.workers)
+    worker_stats: Dict[int, List[float]] = defaultdict(lambda: [0, 0.0])
+    start = time.perf_counter()
+    last_report = start
+    rows_at_start = checkpoint["rows_done"]
+
+    ctx = get_context(args.start_method)
+    with ctx.Pool(args.workers, initializer=init_worker, initargs=(torch_threads,)) as pool:
+        # Keep a bounded number of chunks in flight so the input is streamed, not slurped
+        pending = deque()
+        max_in_flight = args.workers * 2
+
+        def drain_one():
+            chunk_index, results, pid, seconds = pending.popleft().get()
+            checkpoint["output_bytes"] = writer.write(chunk_index, results)
+            checkpoint["next_chunk"] = chunk_index + 1
+            checkpoint["rows_done"] += len(results)
+            save_checkpoint(checkpoint_path, checkpoint)
+            worker_stats[pid][0] += len(results)
+            worker_stats[pid][1] += seconds
+
+        for chunk_index, chunk in chunks:
+            pending.append(pool.apply_async(score_chunk, (chunk_index, chunk)))
+            if len(pending) >= max_in_flight:
+                drain_one()
+            if time.perf_counter() - last_report >= args.report_every:
+                report_throughput(worker_stats, checkpoint["rows_done"] - rows_at_start, time.perf_counter() - start)
+                last_report = time.perf_counter()
+        while pending:
+            drain_one()
+
+    writer.close()
+    print("\n=== Done ===")
+    report_throughput(worker_stats, checkpoint["rows_done"] - rows_at_start, time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL, CSV or Parquet file")
+    parser.add_argument("--output", required=True, help="JSONL file, or a directory (trailing / or .parquet) for Parquet parts")
+    parser.add_argument("--format", choices=["jsonl", "csv", "parquet"], help="input format (default: from extension)")
+    parser.add_argument("--text-field", default="message")
+    parser.add_argument("--id-field", help="column to copy into the output (default: row number)")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--batch-size", type=int, default=512, help="rows per chunk handed to a worker")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint")
+    parser.add_argument("--report-every", type=float, default=30.0, help="seconds between throughput reports")
+    parser.add_argument("--start-method", default="fork" if sys.platform == "linux" else "spawn",
+                        choices=["fork", "spawn", "forkserver"])
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Create, list and revoke service API keys.
+
+The full key is printed once on creation; only its key id and a keyed hash are stored.
+Running servers pick up new and revoked keys within API_KEY_REFRESH_SECONDS.
+
+Usage (from the mcp_server directory):
+    python -m scripts.api_keys create --email svc@example.com --name ingest --scopes detect jobs --rate-limit 12000
+    python -m scripts.api_keys list --email svc@example.com
+    python -m scripts.api_keys revoke 3f9a1c2b7d4e
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from db.session import AsyncSessionLocal
+from models.api_key import ApiKey, API_KEY_SCOPES
+from models.user import User
+from services.api_keys import generate_key
+
+
+async def create(args) -> None:
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.email == args.email))).scalar_one_or_none()
+        if user is None:
+            raise SystemExit(f"No user with email {args.email}")
+        full_key, key_id, key_hash = generate_key()
+        db.add(ApiKey(
+            key_id=key_id,
+            key_hash=key_hash,
+            user_id=user.id,
+            name=args.name,
+            scopes=args.scopes,
+            rate_limit_per_minute=args.rate_limit,
+            expires_at=datetime.now(timezone.utc) + timedelta(days=args.expires_days) if args.expires_days else None
+        ))
+        await db.commit()
+    print(f"Created key {key_id} ({', '.join(args.scopes)}) for {args.email}. Store it now, it is not shown again:")
+    print(full_key)
+
+
+async def list_keys(args) -> None:
+    async with AsyncSessionLocal() as db:
+        query = select(ApiKey, User.email).join(User, User.id == ApiKey.user_id).order_by(ApiKey.created_at)
+        if args.email:
+            query = query.where(User.email == args.email)
+        for key, email in (await db.execute(query)).all():
+            state = "active" if key.is_active else "revoked"
+            expires = key.expires_at.isoformat() if key.expires_at else "never"
+            limit = key.rate_limit_per_minute or "default"
+            print(f"{key.key_id}  {state:8} {email:30} {key.name:20} scopes={','.join(key.scopes)} "
+                  f"rate_limit={limit} expires={expires}")
+
+
+async def revoke(args) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(update(ApiKey).where(ApiKey.key_id == args.key_id).values(is_active=False))
+        await db.commit()
+    if not result.rowcount:
+        raise SystemExit(f"No key {args.key_id}")
+    print(f"Revoked key {args.key_id}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create_parser = commands.add_parser("create", help="create a key and print it once")
+    create_parser.add_argument("--email", required=True, help="user the key acts as")
+    create_parser.add_argument("--name", required=True, help="label, e.g. the calling service")
+    create_parser.add_argument("--scopes", nargs="+", choices=API_KEY_SCOPES, required=True)
+    create_parser.add_argument("--rate-limit", type=int, help="requests per minute (default: API_KEY_DEFAULT_RATE_LIMIT)")
+    create_parser.add_argument("--expires-days", type=int, help="expire after this many days (default: never)")
+    create_parser.set_defaults(handler=create)
+
+    list_parser = commands.add_parser("list", help="list keys")
+    list_parser.add_argument("--email", help="only keys of this user")
+    list_parser.set_defaults(handler=list_keys)
+
+    revoke_parser = commands.add_parser("revoke", help="deactivate a key")
+    revoke_parser.add_argument("key_id")
+    revoke_parser.set_defaults(handler=revoke)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
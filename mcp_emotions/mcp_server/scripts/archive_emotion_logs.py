@@ -0,0 +1,220 @@
+"""
+Archive and drop emotion_logs partitions that fell out of the retention window.
+
+Every monthly partition that ends before the first day of the month EMOTION_LOG_RETENTION_MONTHS
+(or --keep-months) months ago is:
+
+  1. detached with ALTER TABLE ... DETACH PARTITION ... CONCURRENTLY, which never blocks
+     inserts or reads on emotion_logs (it only waits for the queries already using the
+     partition); from then on it is a plain table no query of the API can reach;
+  2. streamed in batches of --batch-size rows, in primary key order, to
+     <archive dir>/emotion_logs_pYYYYMM.ndjson.gz (or .parquet with --format parquet, which
+     needs the optional pyarrow package), through a temporary file renamed once complete;
+  3. dropped after checking that it still holds exactly the archived number of rows.
+     Dropping its foreign key briefly locks the users table exclusively, so the drop gives
+     up after --lock-timeout instead of queueing every users query behind it, and retries.
+
+Dropping a whole table removes its files at once: no row-by-row DELETE and nothing left for
+vacuum. emotion_logs has no default partition (see services/emotion_log_partitions.py), so
+every row is in some month's partition and is covered by this job. The script also creates
+missing future partitions, so it can run as the only partition maintenance where the API's
+startup hook does not (serverless). It is safe to re-run: partitions left detached or
+half-detached by an interrupted run are finished first, and one archived but not dropped is
+archived again.
+
+Usage (from the mcp_server directory):
+    python -m scripts.archive_emotion_logs --dry-run
+    python -m scripts.archive_emotion_logs --keep-months 6 --archive-dir /backups/emotion_logs --format parquet
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from core.config import get_settings
+from db.session import writer_engine
+from services.emotion_log_partitions import (
+    COLUMNS, add_months, detach_partition, ensure_partitions, list_detached, list_partitions, month_start,
+    partition_name
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+settings = get_settings()
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class NdjsonWriter:
+    suffix = ".ndjson.gz"
+
+    def __init__(self, path: str):
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+
+    def write(self, rows) -> None:
+        for row in rows:
+            record = dict(row._mapping)
+            record["id"] = str(record["id"])
+            record["user_id"] = str(record["user_id"])
+            record["created_at"] = record["created_at"].isoformat()
+            if record["emotion_scores"] is not None:
+                record["emotion_scores"] = base64.b64encode(record["emotion_scores"]).decode("ascii")
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetWriter:
+    suffix = ".parquet"
+
+    def __init__(self, path: str):
+        self.schema = pyarrow.schema([
+            ("id", pyarrow.string()),
+            ("session_id", pyarrow.string()),
+            ("message", pyarrow.string()),
+            ("emotions", pyarrow.string()),
+            ("context", pyarrow.string()),
+            ("user_id", pyarrow.string()),
+            ("created_at", pyarrow.timestamp("us", tz="UTC")),
+            ("sarcasm_detected", pyarrow.bool_()),
+            ("emotion_scores", pyarrow.binary()),
+            ("score_labels", pyarrow.string()),
+        ])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows) -> None:
+        records = []
+        for row in rows:
+            record = dict(row._mapping)
+            record["id"] = str(record["id"])
+            record["user_id"] = str(record["user_id"])
+            records.append(record)
+        # One row group per batch
+        self.writer.write_table(pyarrow.Table.from_pylist(records, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+WRITERS = {"ndjson": NdjsonWriter, "parquet": ParquetWriter}
+
+
+async def archive_partition(name: str, path: str, writer_class, batch_size: int) -> int:
+    """Stream partition ``name`` to ``path``; returns the number of rows written."""
+    columns = ", ".join(COLUMNS)
+    tmp_path = path + ".tmp"
+    writer = writer_class(tmp_path)
+    count, last = 0, None
+    try:
+        while True:
+            # Keyset pagination on the partition's primary key index: each batch is one short query
+            query = f"SELECT {columns} FROM {name}"
+            params = {"limit": batch_size}
+            if last is not None:
+                query += " WHERE (id, created_at) > (:last_id, :last_created_at)"
+                params.update(last_id=last.id, last_created_at=last.created_at)
+            query += " ORDER BY id, created_at LIMIT :limit"
+            async with writer_engine.connect() as conn:
+                rows = (await conn.execute(text(query), params)).all()
+            if not rows:
+                break
+            writer.write(rows)
+            count += len(rows)
+            last = rows[-1]
+    except BaseException:
+        writer.close()
+        os.remove(tmp_path)
+        raise
+    writer.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+async def detach(month) -> None:
+    async with writer_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await detach_partition(conn, month)
+
+
+async def drop_detached(name: str, archived: int, lock_timeout_ms: int, attempts: int) -> None:
+    """Drop a detached partition once it is known to hold exactly the ``archived`` rows."""
+    for attempt in range(1, attempts + 1):
+        try:
+            async with writer_engine.begin() as conn:
+                await conn.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+                # Only this job uses the detached table: the lock is uncontended
+                await conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+                current = (await conn.execute(text(f"SELECT count(*) FROM {name}"))).scalar()
+                if current != archived:
+                    raise RuntimeError(f"{name} has {current} rows but {archived} were archived; not dropping it")
+                # Also removes the foreign key triggers on users, under a lock held until commit
+                await conn.execute(text(f"DROP TABLE {name}"))
+            return
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != LOCK_NOT_AVAILABLE or attempt == attempts:
+                raise
+            print(f"Dropping {name} timed out waiting for a lock (attempt {attempt}/{attempts}); retrying")
+            await asyncio.sleep(min(2 ** attempt, 30))
+
+
+async def run(args) -> None:
+    async with writer_engine.begin() as conn:
+        created = await ensure_partitions(conn)
+    if created:
+        print(f"✓ Created partitions {', '.join(created)}")
+
+    cutoff = add_months(month_start(datetime.now(timezone.utc)), -args.keep_months)
+    async with writer_engine.connect() as conn:
+        attached = [month for month in await list_partitions(conn) if month < cutoff]
+        # Left behind by an interrupted run
+        detached = [month for month in await list_detached(conn) if month < cutoff]
+    expired = sorted(set(attached) | set(detached))
+    if not expired:
+        print(f"No partitions before {cutoff.isoformat()}")
+        return
+
+    writer_class = WRITERS[args.format]
+    os.makedirs(args.archive_dir, exist_ok=True)
+    for month in expired:
+        name = partition_name(month)
+        path = os.path.join(args.archive_dir, name + writer_class.suffix)
+        if args.dry_run:
+            print(f"Would detach {name}, archive it to {path} and drop it")
+            continue
+        if month in attached:
+            await detach(month)
+        count = await archive_partition(name, path, writer_class, args.batch_size)
+        await drop_detached(name, count, args.lock_timeout_ms, args.drop_attempts)
+        print(f"✓ Archived {count} rows of {name} to {path} and dropped the partition")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-months", type=int, default=settings.EMOTION_LOG_RETENTION_MONTHS,
+                        help="full months kept besides the current one")
+    parser.add_argument("--archive-dir", default=settings.EMOTION_LOG_ARCHIVE_DIR)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="ndjson")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per query and per write")
+    parser.add_argument("--lock-timeout-ms", type=int, default=2000,
+                        help="how long dropping a partition may wait for its locks before retrying")
+    parser.add_argument("--drop-attempts", type=int, default=10)
+    parser.add_argument("--dry-run", action="store_true", help="only list the partitions that would be archived")
+    args = parser.parse_args()
+    if args.format == "parquet" and pyarrow is None:
+        parser.error("--format parquet needs the pyarrow package")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Backfill EmotionLog.emotion_scores for rows logged before probability vectors were stored.
+
+Rows are read in keyset order (created_at, id) in pages of --batch-size, re-scored with one
+batched forward pass per language and written back with a single executemany UPDATE per
+page. Only emotion_scores/score_labels are written; the labels the user saw at the time
+(emotions) are left untouched. Safe to interrupt and re-run: finished rows no longer match.
+
+Usage (from the mcp_server directory):
+    python -m scripts.backfill_emotion_scores --batch-size 256
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import select, update, and_, or_
+from db.session import AsyncSessionLocal
+from models.emotion_log import EmotionLog
+from utils.preprocessing import preprocess_input
+from utils.score_codec import encode_scores
+
+
+def score_messages(messages):
+    from services import emotion_detector
+
+    cleaned = []
+    for message in messages:
+        try:
+            cleaned.append(preprocess_input(message))
+        except ValueError:
+            cleaned.append(message or " ")
+    model_langs = [emotion_detector.model_language(emotion_detector.detect_language(text)) for text in cleaned]
+    return emotion_detector.detect_emotions_batch(cleaned, model_langs)
+
+
+async def backfill(batch_size: int, limit: int = None, dry_run: bool = False):
+    done = 0
+    last_key = None
+    start = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        while limit is None or done < limit:
+            query = (
+                select(EmotionLog.id, EmotionLog.created_at, EmotionLog.message)
+                .where(EmotionLog.emotion_scores.is_(None))
+                .order_by(EmotionLog.created_at, EmotionLog.id)
+                .limit(batch_size if limit is None else min(batch_size, limit - done))
+            )
+            if last_key is not None:
+                query = query.where(or_(
+                    EmotionLog.created_at > last_key[0],
+                    and_(EmotionLog.created_at == last_key[0], EmotionLog.id > last_key[1])
+                ))
+            rows = (await db.execute(query)).all()
+            if not rows:
+                break
+            last_key = (rows[-1].created_at, rows[-1].id)
+
+            # Inference is CPU bound; keep the event loop (and the DB connection) responsive
+            results = await asyncio.to_thread(score_messages, [row.message for row in rows])
+            if not dry_run:
+                # Bulk UPDATE by primary key; created_at also routes each row to its partition
+                await db.execute(
+                    update(EmotionLog),
+                    [
+                        {"id": row.id, "created_at": row.created_at, "emotion_scores": encode_scores(result["scores"]), "score_labels": result["score_labels"]}
+                        for row, result in zip(rows, results)
+                    ]
+                )
+                await db.commit()
+
+            done += len(rows)
+            elapsed = time.perf_counter() - start
+            print(f"{done} rows backfilled ({done / elapsed:.1f} rows/s)")
+    print(f"✓ Backfill finished: {done} rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--limit", type=int, help="stop after this many rows")
+    parser.add_argument("--dry-run", action="store_true", help="score but do not write")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.limit, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark feedback submission one item per call against /feedback/submit/batch.
+
+Runs the code behind both endpoints against the configured database, as the given user:
+"single" stores each item the way POST /feedback/submit does (language detection, language
+lookup query, insert, commit, refresh; one session per call), "batch" stores them in chunks
+of --batch-size the way POST /feedback/submit/batch does. Items are synthetic, half of them
+with a language code and half auto-detected. Every row the benchmark creates is deleted at
+the end.
+
+Usage (from the mcp_server directory):
+    python -m scripts.benchmark_feedback_batch --email labeler@example.com
+    python -m scripts.benchmark_feedback_batch --email labeler@example.com --items 2000 --batch-size 500
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import delete, select
+
+from db.session import AsyncSessionLocal
+from models.feedback import Feedback
+from models.user import User
+from routers.feedback import create_feedback, create_feedback_batch
+from schemas.feedback import FeedbackCreate
+
+TEXTS = [
+    "I can't believe they cancelled the show, this is so frustrating",
+    "Thank you so much, this made my day!",
+    "Estoy muy contento con el resultado, gracias a todos",
+    "No sé qué hacer, tengo miedo de equivocarme otra vez",
+    "Oh great, another Monday. Just what I needed.",
+    "Je suis vraiment déçu par ce service",
+]
+EMOTIONS = ["joy", "anger", "sadness", "fear", "gratitude", "annoyance", "neutral", "surprise"]
+
+
+def synthetic_items(count: int, rng: random.Random) -> list:
+    return [
+        FeedbackCreate(
+            text=f"{rng.choice(TEXTS)} #{i}",
+            predicted_emotions=rng.sample(EMOTIONS, 2),
+            suggested_emotions=rng.sample(EMOTIONS, 1),
+            language_code=rng.choice(["en", "es", None]) if i % 2 else None
+        )
+        for i in range(count)
+    ]
+
+
+async def run(args) -> None:
+    rng = random.Random(0)
+    items = synthetic_items(args.items, rng)
+    async with AsyncSessionLocal() as db:
+        user = (await db.execute(select(User).where(User.email == args.email))).scalar_one_or_none()
+    if user is None:
+        raise SystemExit(f"No user with email {args.email}")
+
+    created = []
+    try:
+        start = time.perf_counter()
+        for item in items:
+            async with AsyncSessionLocal() as db:
+                created.append((await create_feedback(db, user, item))["id"])
+        single_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for offset in range(0, len(items), args.batch_size):
+            async with AsyncSessionLocal() as db:
+                results = await create_feedback_batch(db, user, items[offset:offset + args.batch_size])
+            created.extend(result["id"] for result in results)
+        batch_seconds = time.perf_counter() - start
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Feedback).where(Feedback.id.in_(created)))
+            await db.commit()
+
+    print(f"{args.items} feedback items (batch size {args.batch_size})")
+    print(f"{'single-item calls':<18} {args.items / single_seconds:>9.0f} items/s  {single_seconds / args.items * 1e3:>7.2f} ms/item")
+    print(f"{'batch calls':<18} {args.items / batch_seconds:>9.0f} items/s  {batch_seconds / args.items * 1e3:>7.2f} ms/item")
+    print(f"{'speed-up':<18} {single_seconds / batch_seconds:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", required=True, help="existing user the feedback is stored for")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=250)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
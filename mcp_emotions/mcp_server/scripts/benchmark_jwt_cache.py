@@ -0,0 +1,63 @@
+"""
+Benchmark per-request JWT verification with and without the verified-token cache.
+
+A pool of access tokens (one per simulated user) is replayed in random order, as when every
+client reuses its token for many requests. "verify" runs what every request did before the
+cache (log line + python-jose decode with signature check); "cached" runs auth.jwt.decode_token,
+which verifies a token once and then serves its claims from the cache.
+
+Usage (from the mcp_server directory):
+    python -m scripts.benchmark_jwt_cache
+    python -m scripts.benchmark_jwt_cache --users 5000 --requests 200000
+"""
+import argparse
+import random
+import time
+
+from jose import jwt
+
+from auth.jwt import create_access_token, decode_token
+from auth.token_cache import token_cache
+from core.config import get_settings
+from utils.logger import jwt_logger
+
+settings = get_settings()
+
+
+def verify(token: str) -> dict:
+    jwt_logger.info("Validating JWT token")
+    return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+
+
+def timed(fn, tokens) -> float:
+    start = time.perf_counter()
+    for token in tokens:
+        fn(token)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="distinct tokens")
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pool = [create_access_token({"sub": f"user{i}@example.com"}) for i in range(args.users)]
+    requests = [rng.choice(pool) for _ in range(args.requests)]
+
+    token_cache.clear()
+    verify_seconds = timed(verify, requests)
+    hits, misses = token_cache.hits, token_cache.misses
+    cached_seconds = timed(decode_token, requests)
+    hits, misses = token_cache.hits - hits, token_cache.misses - misses
+
+    print(f"{args.requests} requests over {args.users} tokens (cache size {token_cache.max_size})")
+    print(f"{'verify every request':<22} {verify_seconds / args.requests * 1e6:>8.1f} us/request")
+    print(f"{'verified-token cache':<22} {cached_seconds / args.requests * 1e6:>8.1f} us/request"
+          f"  (hit rate {hits / max(hits + misses, 1):.1%})")
+    print(f"{'speed-up':<22} {verify_seconds / cached_seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
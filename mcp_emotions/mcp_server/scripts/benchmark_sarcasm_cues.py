@@ -0,0 +1,81 @@
+"""
+Benchmark the sarcasm cue matcher against the old linear scan as cue lists grow.
+
+For each cue-list size, synthetic cues (1-3 words from a fixed vocabulary, plus some emoji
+and punctuation cues) are matched against texts of several lengths. The compiled matcher
+should cost roughly the same per character whatever the list size; the linear scan
+(``any(cue in text for cue in cues)``, as used before) grows with the number of cues.
+
+Usage (from the mcp_server directory):
+    python -m scripts.benchmark_sarcasm_cues
+    python -m scripts.benchmark_sarcasm_cues --sizes 10 1000 100000 --lengths 200 5000
+"""
+import argparse
+import random
+import time
+
+from utils.sarcasm_cues import CueMatcher
+
+VOCABULARY = [
+    "yeah", "right", "sure", "great", "job", "totally", "classic", "nice", "try", "of", "course",
+    "as", "if", "they", "care", "oh", "now", "so", "the", "what", "a", "surprise", "wow", "amazing",
+    "love", "when", "always", "never", "again", "brilliant", "genius", "perfect", "thanks", "lot",
+]
+SYMBOL_CUES = ["🙄", "😒", "🤣", "...", "right...", "sure...", "!!!", "/s"]
+
+
+def synthetic_cues(count: int, rng: random.Random) -> list:
+    cues = set(SYMBOL_CUES[:min(count, len(SYMBOL_CUES))])
+    while len(cues) < count:
+        words = rng.choices(VOCABULARY, k=rng.randint(1, 3))
+        # Suffix keeps large lists distinct without making every cue share a prefix
+        cues.add(" ".join(words) + (str(rng.randint(0, count)) if len(cues) > 200 else ""))
+    return sorted(cues)
+
+
+def synthetic_text(length: int, rng: random.Random) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(rng.choice(VOCABULARY + ["🙄", "...", "!", ","]))
+    return " ".join(words)[:length]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = {length: [synthetic_text(length, rng) for _ in range(20)] for length in args.lengths}
+
+    print(f"{'cues':>8} {'chars':>7} {'compile ms':>11} {'matcher ns/char':>16} {'linear ns/char':>15}")
+    for size in args.sizes:
+        cues = synthetic_cues(size, rng)
+        start = time.perf_counter()
+        matcher = CueMatcher(cues)
+        compile_ms = (time.perf_counter() - start) * 1000
+        lowered_cues = [cue.lower() for cue in cues]
+        for length, samples in texts.items():
+            chars = sum(len(text) for text in samples)
+            matcher_seconds = best_of(lambda: [matcher.find(text) for text in samples], args.repeat)
+            # Linear scan: every cue searched in every text (all hits, for a like-for-like result)
+            linear_seconds = best_of(
+                lambda: [[cue for cue in lowered_cues if cue in text.lower()] for text in samples], args.repeat
+            )
+            print(f"{size:>8} {length:>7} {compile_ms:>11.1f} "
+                  f"{matcher_seconds / chars * 1e9:>16.1f} {linear_seconds / chars * 1e9:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Evaluate the emotion model against user feedback and calibrate per-label thresholds.
+
+Ground truth comes from two tables, both streamed from Postgres with server-side cursors
+in chunks of --chunk-size rows, so memory stays bounded no matter how many rows exist:
+
+  feedback       predicted_emotions vs. suggested_emotions -> per-label precision, recall
+                 and F1, overall and per language, plus a predicted->suggested confusion
+                 matrix per language
+  emotion_votes  (label, score, vote) -> per-label score histograms of correct/incorrect
+                 votes, from which the F1-optimal threshold of each label is picked
+
+Each chunk is turned into boolean label matrices / bin indices with NumPy; only fixed-size
+count arrays are kept between chunks.
+
+The thresholds file is written atomically; point EMOTION_THRESHOLDS_FILE at it and the
+detector picks it up without a restart.
+
+Usage (from the mcp_server directory):
+    python -m scripts.evaluate_feedback --thresholds thresholds.json --report evaluation.json
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import select
+
+from db.session import reader_engine
+from models.emotion_vote import EmotionVote
+from models.feedback import Feedback
+from models.language import Language
+from services.emotion_labels import emotion_labels_map, EMOTION_THRESHOLD
+
+# Union of every label set; feedback metrics are computed over this vocabulary
+VOCABULARY: List[str] = list(dict.fromkeys(emotion_labels_map["en"] + emotion_labels_map["es"]))
+LABEL_INDEX: Dict[str, int] = {label: i for i, label in enumerate(VOCABULARY)}
+
+
+def label_set_for(language: str) -> str:
+    return "es" if language == "es" else "en"
+
+
+class FeedbackStats:
+    """Per-language TP/FP/FN counts and predicted->suggested confusion counts."""
+
+    def __init__(self):
+        size = len(VOCABULARY)
+        self.counts: Dict[str, np.ndarray] = {}
+        self.confusion: Dict[str, np.ndarray] = {}
+        self.rows: Dict[str, int] = {}
+        self._size = size
+
+    def _label_matrix(self, label_lists) -> np.ndarray:
+        matrix = np.zeros((len(label_lists), self._size), dtype=bool)
+        rows, cols = [], []
+        for r, labels in enumerate(label_lists):
+            for label in labels or []:
+                i = LABEL_INDEX.get(label)
+                if i is not None:
+                    rows.append(r)
+                    cols.append(i)
+        matrix[rows, cols] = True
+        return matrix
+
+    def add_chunk(self, rows) -> None:
+        languages = np.array([row.language or "unknown" for row in rows])
+        predicted = self._label_matrix([row.predicted_emotions for row in rows])
+        truth = self._label_matrix([row.suggested_emotions for row in rows])
+
+        for language in np.unique(languages):
+            mask = languages == language
+            p, t = predicted[mask], truth[mask]
+            false_pos, false_neg = p & ~t, ~p & t
+            counts = self.counts.setdefault(language, np.zeros((3, self._size), dtype=np.int64))
+            counts[0] += (p & t).sum(axis=0)
+            counts[1] += false_pos.sum(axis=0)
+            counts[2] += false_neg.sum(axis=0)
+            confusion = self.confusion.setdefault(language, np.zeros((self._size, self._size), dtype=np.int64))
+            # confusion[i, j]: label i was predicted while the user said j instead
+            confusion += false_pos.T.astype(np.int64) @ false_neg.astype(np.int64)
+            self.rows[language] = self.rows.get(language, 0) + int(mask.sum())
+
+    @staticmethod
+    def _metrics(counts: np.ndarray) -> Dict[str, Dict]:
+        tp, fp, fn = counts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(tp + fp > 0, tp / (tp + fp), np.nan)
+            recall = np.where(tp + fn > 0, tp / (tp + fn), np.nan)
+            f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), np.nan)
+        return {
+            label: {
+                "precision": None if np.isnan(precision[i]) else round(float(precision[i]), 4),
+                "recall": None if np.isnan(recall[i]) else round(float(recall[i]), 4),
+                "f1": None if np.isnan(f1[i]) else round(float(f1[i]), 4),
+                "support": int(tp[i] + fn[i]),
+            }
+            for i, label in enumerate(VOCABULARY)
+            if tp[i] + fp[i] + fn[i] > 0
+        }
+
+    def report(self, top_confusions: int) -> Dict:
+        total = sum(self.counts.values()) if self.counts else np.zeros((3, self._size), dtype=np.int64)
+        per_language = {}
+        for language, counts in self.counts.items():
+            confusion = self.confusion[language]
+            flat = np.argsort(confusion, axis=None)[::-1][:top_confusions]
+            pairs = [
+                {"predicted": VOCABULARY[i], "suggested": VOCABULARY[j], "count": int(confusion[i, j])}
+                for i, j in zip(*np.unravel_index(flat, confusion.shape))
+                if confusion[i, j] > 0
+            ]
+            per_language[language] = {
+                "rows": self.rows[language],
+                "labels": self._metrics(counts),
+                "top_confusions": pairs,
+            }
+        return {"rows": sum(self.rows.values()), "labels": self._metrics(total), "languages": per_language}
+
+
+class VoteHistograms:
+    """Per label set: histograms of vote scores for correct and incorrect votes."""
+
+    def __init__(self, bins: int):
+        self.bins = bins
+        self.hist = {
+            key: np.zeros((2, len(labels), bins), dtype=np.int64)
+            for key, labels in emotion_labels_map.items()
+        }
+        self.index = {key: {label: i for i, label in enumerate(labels)} for key, labels in emotion_labels_map.items()}
+
+    def add_chunk(self, rows) -> None:
+        label_sets = np.array([label_set_for(row.language) for row in rows])
+        scores = np.array([row.score for row in rows], dtype=np.float64)
+        votes = np.array([bool(row.vote) for row in rows])
+        bins = np.clip((scores * self.bins).astype(np.int64), 0, self.bins - 1)
+
+        for key in np.unique(label_sets):
+            index = self.index[key]
+            mask = label_sets == key
+            label_idx = np.array([index.get(row.label, -1) for row, m in zip(rows, mask) if m], dtype=np.int64)
+            known = label_idx >= 0
+            flat = label_idx[known] * self.bins + bins[mask][known]
+            size = len(index) * self.bins
+            vote_ok = votes[mask][known]
+            self.hist[key][1] += np.bincount(flat[vote_ok], minlength=size).reshape(len(index), self.bins)
+            self.hist[key][0] += np.bincount(flat[~vote_ok], minlength=size).reshape(len(index), self.bins)
+
+    def calibrate(self, min_support: int) -> Dict[str, Dict[str, float]]:
+        """
+        F1-optimal threshold per label over the voted examples.
+
+        Only predicted labels get votes, so there is no evidence below the current default;
+        thresholds are therefore searched from the default upwards.
+        """
+        start_bin = int(EMOTION_THRESHOLD * self.bins)
+        thresholds = {}
+        for key, hist in self.hist.items():
+            negatives, positives = hist[0], hist[1]
+            # Predicting "positive" for every bin >= k: reverse cumulative sums give TP/FP per k
+            tp = np.cumsum(positives[:, ::-1], axis=1)[:, ::-1]
+            fp = np.cumsum(negatives[:, ::-1], axis=1)[:, ::-1]
+            fn = positives.sum(axis=1, keepdims=True) - tp
+            with np.errstate(divide="ignore", invalid="ignore"):
+                f1 = np.where(2 * tp + fp + fn > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+            best = start_bin + np.argmax(f1[:, start_bin:], axis=1)
+            support = hist.sum(axis=(0, 2))
+            thresholds[key] = {
+                label: round(float(best[i]) / self.bins, 4)
+                for i, label in enumerate(emotion_labels_map[key])
+                if support[i] >= min_support
+            }
+        return thresholds
+
+    def vote_summary(self) -> Dict[str, Dict[str, Dict]]:
+        return {
+            key: {
+                label: {"correct": int(hist[1, i].sum()), "incorrect": int(hist[0, i].sum())}
+                for i, label in enumerate(emotion_labels_map[key])
+                if hist[:, i].sum() > 0
+            }
+            for key, hist in self.hist.items()
+        }
+
+
+async def stream(query, chunk_size: int):
+    async with reader_engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions(chunk_size):
+            yield partition
+
+
+async def evaluate(args) -> Dict:
+    feedback_stats = FeedbackStats()
+    histograms = VoteHistograms(args.bins)
+
+    feedback_query = (
+        select(Feedback.predicted_emotions, Feedback.suggested_emotions, Language.code.label("language"))
+        .outerjoin(Language, Feedback.language_id == Language.id)
+        .where(Feedback.suggested_emotions.isnot(None))
+    )
+    async for rows in stream(feedback_query, args.chunk_size):
+        feedback_stats.add_chunk(rows)
+    print(f"✓ Feedback: {sum(feedback_stats.rows.values())} rows")
+
+    vote_query = (
+        select(EmotionVote.label, EmotionVote.score, EmotionVote.vote, Language.code.label("language"))
+        .join(Feedback, EmotionVote.feedback_id == Feedback.id)
+        .outerjoin(Language, Feedback.language_id == Language.id)
+    )
+    vote_rows = 0
+    async for rows in stream(vote_query, args.chunk_size):
+        histograms.add_chunk(rows)
+        vote_rows += len(rows)
+    print(f"✓ Votes: {vote_rows} rows")
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "feedback": feedback_stats.report(args.top_confusions),
+        "votes": histograms.vote_summary(),
+        "thresholds": histograms.calibrate(args.min_support),
+    }
+
+
+def write_json_atomic(path: str, data: Dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", help="write calibrated thresholds here (EMOTION_THRESHOLDS_FILE)")
+    parser.add_argument("--report", help="write the full evaluation report here")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="rows fetched per round trip")
+    parser.add_argument("--bins", type=int, default=100, help="score histogram resolution")
+    parser.add_argument("--min-support", type=int, default=30, help="votes a label needs before it is calibrated")
+    parser.add_argument("--top-confusions", type=int, default=10)
+    args = parser.parse_args()
+
+    report = asyncio.run(evaluate(args))
+
+    print("\n=== Per-label metrics (all languages) ===")
+    for label, metrics in sorted(report["feedback"]["labels"].items(), key=lambda item: -item[1]["support"]):
+        print(f"  {label:<16} P={metrics['precision']}  R={metrics['recall']}  F1={metrics['f1']}  n={metrics['support']}")
+
+    if args.thresholds:
+        version = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        write_json_atomic(args.thresholds, {
+            "version": version,
+            "default": EMOTION_THRESHOLD,
+            "labels": report["thresholds"],
+        })
+        print(f"\n✓ Thresholds {version} written to {args.thresholds}")
+    if args.report:
+        write_json_atomic(args.report, report)
+        print(f"✓ Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
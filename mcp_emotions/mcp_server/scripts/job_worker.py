@@ -0,0 +1,40 @@
+"""
+Run bulk-analysis job workers outside the API processes.
+
+Workers share the job queue in Postgres with the workers started by the API (JOB_WORKERS),
+so capacity can be added by running more of these. Stop with Ctrl+C / SIGTERM: chunks in
+progress are re-claimed by another worker after JOB_CLAIM_TIMEOUT_SECONDS.
+
+Usage (from the mcp_server directory):
+    JOB_WORKERS=0 uvicorn mcp_server:app ...      # API only
+    python -m scripts.job_worker --concurrency 2   # dedicated worker
+"""
+import argparse
+import asyncio
+import os
+import signal
+
+from services.job_worker import run_worker
+
+
+async def run(concurrency: int):
+    from services.emotion_detector import preload_models
+    preload_models()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await asyncio.gather(*(run_worker(f"{os.getpid()}-{i}", stop) for i in range(concurrency)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=2,
+                        help="chunks in flight; they share one micro-batching inference thread")
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Snapshot every model used by the server into a versioned local directory.
+
+Each model is downloaded once, re-saved as safetensors and hashed into the snapshot's
+manifest.json. The CURRENT pointer is only switched after the whole snapshot is written,
+so a running fleet never sees a half-written snapshot.
+
+Usage (from the mcp_server directory):
+    python -m scripts.prefetch_models --model-dir /opt/models                 # new snapshot
+    python -m scripts.prefetch_models --model-dir /opt/models --version v3    # named snapshot
+    python -m scripts.prefetch_models --model-dir /opt/models --verify        # check CURRENT
+
+Serve from it with MODEL_DIR=/opt/models MODEL_LOCAL_ONLY=true.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from services.emotion_detector import MODEL_MAP, PYSENTIMIENTO_MODEL_ES
+from services.model_store import (
+    CURRENT_FILE, MANIFEST_FILE, local_dir_name, file_sha256, read_manifest, verify_model
+)
+from utils.sarcasm import MODEL_MAP_SARCASM
+
+
+def all_model_names():
+    names = list(MODEL_MAP.values()) + list(MODEL_MAP_SARCASM.values()) + [PYSENTIMIENTO_MODEL_ES]
+    return list(dict.fromkeys(names))
+
+
+def hash_files(model_path: str) -> dict:
+    files = {}
+    for dirpath, _, filenames in os.walk(model_path):
+        for filename in sorted(filenames):
+            full_path = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(full_path, model_path)
+            files[rel_path] = {"sha256": file_sha256(full_path), "size": os.path.getsize(full_path)}
+    return files
+
+
+def prefetch(model_dir: str, version: str) -> str:
+    root = os.path.join(model_dir, version)
+    if os.path.exists(os.path.join(root, MANIFEST_FILE)):
+        raise SystemExit(f"Snapshot {root} already exists")
+    os.makedirs(root, exist_ok=True)
+
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "models": {}
+    }
+    for name in all_model_names():
+        target = os.path.join(root, local_dir_name(name))
+        print(f"Fetching {name} -> {target}")
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        model = AutoModelForSequenceClassification.from_pretrained(name)
+        tokenizer.save_pretrained(target)
+        # One model.safetensors file: the server memory-maps it instead of unpickling
+        model.save_pretrained(target, safe_serialization=True, max_shard_size="10GB")
+        manifest["models"][name] = {
+            "dir": local_dir_name(name),
+            "revision": getattr(model.config, "_commit_hash", None),
+            "files": hash_files(target)
+        }
+
+    with open(os.path.join(root, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    # Atomically point CURRENT at the finished snapshot
+    pointer_tmp = os.path.join(model_dir, CURRENT_FILE + ".tmp")
+    with open(pointer_tmp, "w") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(model_dir, CURRENT_FILE))
+    print(f"✓ {len(manifest['models'])} models saved to {root} (now CURRENT)")
+    return root
+
+
+def verify(model_dir: str, version: str = None) -> bool:
+    if not version:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+            version = f.read().strip()
+    root = os.path.join(model_dir, version)
+    ok = True
+    for name in read_manifest(root)["models"]:
+        try:
+            verify_model(root, name)
+            print(f"✓ {name}")
+        except (ValueError, OSError) as e:
+            print(f"❌ {e}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=os.getenv("MODEL_DIR", "models_cache"))
+    parser.add_argument("--version", help="snapshot name (default: UTC timestamp)")
+    parser.add_argument("--verify", action="store_true", help="verify a snapshot against its manifest instead of fetching")
+    args = parser.parse_args()
+
+    if args.verify:
+        sys.exit(0 if verify(args.model_dir, args.version) else 1)
+    prefetch(args.model_dir, args.version or datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"))
+
+
+if __name__ == "__main__":
+    main()
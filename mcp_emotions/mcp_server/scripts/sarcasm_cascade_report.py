@@ -0,0 +1,148 @@
+"""
+Measure what SARCASM_MODE=cascade costs in accuracy and saves in compute on a message corpus.
+
+Every message runs through emotion detection and the sarcasm model (the always-on baseline).
+The cascade pre-screen is then applied, and the sarcasm model is timed again on only the
+texts the pre-screen could not settle. The report shows:
+
+  - agreement of the sarcasm flag and of the recommendation with the baseline
+  - share of texts that skip the sarcasm model, and why
+  - sarcasm-model and whole-pipeline time, baseline vs. cascade
+
+Usage (from the mcp_server directory):
+    python -m scripts.sarcasm_cascade_report messages.jsonl --limit 5000 --report cascade.json
+"""
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Dict, List
+
+from scripts.analyze_corpus import detect_format, iter_rows
+from utils.preprocessing import preprocess_input
+from utils.sarcasm_cues import match_cues
+
+
+def load_texts(path: str, fmt: str, text_field: str, limit: int) -> List[str]:
+    texts = []
+    for row in iter_rows(path, fmt):
+        try:
+            texts.append(preprocess_input(row.get(text_field) or ""))
+        except ValueError:
+            continue
+        if limit and len(texts) >= limit:
+            break
+    return texts
+
+
+def timed_sarcasm(texts: List[str], languages: List[str], indices: List[int], batch_size: int):
+    from services.emotion_detector import _group_indices
+    from utils.sarcasm import detect_sarcasm_batch
+
+    flags: Dict[int, bool] = {}
+    start = time.perf_counter()
+    for language, group in _group_indices([languages[i] for i in indices]).items():
+        subset = [indices[j] for j in group]
+        for i, flag in zip(subset, detect_sarcasm_batch([texts[i] for i in subset], lang=language, batch_size=batch_size)):
+            flags[i] = flag
+    return flags, time.perf_counter() - start
+
+
+def skip_reason(text: str) -> str:
+    """Why sarcasm_prescreen() skipped ``text``; texts with a cue are never skipped."""
+    from core.config import get_settings
+
+    if len(text.split()) < get_settings().SARCASM_MIN_WORDS:
+        return "short_text"
+    return "no_sarcasm_sensitive_emotion"
+
+
+def run(args) -> Dict:
+    from services import emotion_detector
+    from services.recommender import generate_recommendation
+
+    texts = load_texts(args.input, args.format or detect_format(args.input), args.text_field, args.limit)
+    if not texts:
+        raise SystemExit("No usable messages in the input")
+    print(f"Scoring {len(texts)} messages")
+
+    # Warm up so model loading is not billed to the first timed stage
+    emotion_detector.analyze_text("warm up", strict=True)
+
+    start = time.perf_counter()
+    languages = [emotion_detector.detect_language(text) for text in texts]
+    model_langs = [emotion_detector.model_language(language) for language in languages]
+    emotions = emotion_detector.detect_emotions_batch(texts, model_langs)
+    emotion_seconds = time.perf_counter() - start
+
+    everything = list(range(len(texts)))
+    baseline, baseline_seconds = timed_sarcasm(texts, languages, everything, args.batch_size)
+
+    start = time.perf_counter()
+    ambiguous = [
+        i for i in everything
+        if emotion_detector.sarcasm_prescreen(
+            texts[i], match_cues(texts[i], languages[i]), emotions[i]["detected_emotions"]
+        ) is None
+    ]
+    prescreen_seconds = time.perf_counter() - start
+    checked, cascade_seconds = timed_sarcasm(texts, languages, ambiguous, args.batch_size)
+    cascade = {i: checked.get(i, False) for i in everything}
+
+    skipped = Counter()
+    flag_agree = recommendation_agree = 0
+    missed = Counter()
+    ambiguous_set = set(ambiguous)
+    for i in everything:
+        detected = emotions[i]["detected_emotions"]
+        if i not in ambiguous_set:
+            reason = skip_reason(texts[i])
+            skipped[reason] += 1
+            if baseline[i]:
+                missed[reason] += 1
+        flag_agree += baseline[i] == cascade[i]
+        recommendation_agree += generate_recommendation(detected, baseline[i]) == generate_recommendation(detected, cascade[i])
+
+    n = len(texts)
+    baseline_total = emotion_seconds + baseline_seconds
+    cascade_total = emotion_seconds + prescreen_seconds + cascade_seconds
+    return {
+        "messages": n,
+        "sarcasm_model_runs": {"baseline": n, "cascade": len(ambiguous)},
+        "skipped": {"total": n - len(ambiguous), "share": round((n - len(ambiguous)) / n, 4), "by_reason": dict(skipped)},
+        "agreement": {
+            "sarcasm_flag": round(flag_agree / n, 4),
+            "recommendation": round(recommendation_agree / n, 4),
+            "baseline_sarcastic": sum(baseline.values()),
+            "missed_by_reason": dict(missed)
+        },
+        "seconds": {
+            "emotion": round(emotion_seconds, 3),
+            "sarcasm_baseline": round(baseline_seconds, 3),
+            "sarcasm_cascade": round(cascade_seconds + prescreen_seconds, 3),
+            "pipeline_baseline": round(baseline_total, 3),
+            "pipeline_cascade": round(cascade_total, 3),
+            "pipeline_saved_share": round(1 - cascade_total / baseline_total, 4) if baseline_total else 0.0
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL, CSV or Parquet file")
+    parser.add_argument("--format", choices=["jsonl", "csv", "parquet"], help="input format (default: from extension)")
+    parser.add_argument("--text-field", default="message")
+    parser.add_argument("--limit", type=int, default=0, help="score at most this many messages (0: all)")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--report", help="also write the report as JSON here")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Startup-time report for the serverless build.
+
+Measures, in fresh interpreters, the import cost of the Lambda entry point (what every cold
+start pays) and of the inference pipeline (what the first detector call adds), broken down
+per top-level module with ``python -X importtime``. With --with-models it also loads every
+model from MODEL_DIR and reports the load time of each.
+
+Usage (from the mcp_server directory):
+    python -m scripts.startup_report --with-models --output startup_report.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+HEAVY_MODULES = ("torch", "transformers", "pysentimiento")
+
+
+def measure_imports(statement: str) -> dict:
+    """Run ``statement`` under ``-X importtime`` and aggregate self time per top-level module."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    wall_seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{proc.stderr[-2000:]}")
+
+    per_module = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) != 3 or not parts[0].isdigit():
+            continue
+        self_us, _, name = parts
+        per_module[name.split(".")[0]] += int(self_us)
+
+    modules = sorted(per_module.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "statement": statement,
+        "wall_seconds": round(wall_seconds, 3),
+        "import_seconds": round(sum(per_module.values()) / 1e6, 3),
+        "heavy_modules_imported": [m for m in HEAVY_MODULES if m in per_module],
+        "modules": [{"module": name, "self_ms": round(us / 1000, 1)} for name, us in modules],
+    }
+
+
+def measure_model_loads() -> list:
+    """Load every model in-process and return the per-model load times from the registry."""
+    from services import emotion_detector
+    from services.model_registry import model_registry
+
+    emotion_detector.load_model("en")
+    if emotion_detector.get_spanish_analyzer() == "fallback":
+        emotion_detector.load_model("es")
+    for lang in ["en", "es"]:
+        emotion_detector.load_sarcasm_model(lang)
+    return [
+        {"key": m["key"], "identifier": m["identifier"], "load_seconds": m["load_seconds"], "size_bytes": m["size_bytes"]}
+        for m in model_registry.snapshot()
+    ]
+
+
+def print_section(title: str, section: dict, top: int):
+    print(f"\n=== {title} ===")
+    print(f"{section['statement']}: {section['import_seconds']:.3f}s imports, {section['wall_seconds']:.3f}s wall")
+    print(f"heavy modules imported: {', '.join(section['heavy_modules_imported']) or 'none'}")
+    for entry in section["modules"][:top]:
+        print(f"  {entry['module']:<30} {entry['self_ms']:>10.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--with-models", action="store_true", help="also load every model and time it")
+    parser.add_argument("--top", type=int, default=15, help="modules to list per section")
+    parser.add_argument("--output", help="write the full report as JSON to this file")
+    args = parser.parse_args()
+
+    report = {
+        "cold_start": measure_imports("import serverless"),
+        "first_detector_call": measure_imports("import services.emotion_detector"),
+    }
+    print_section("Cold start (serverless entry point)", report["cold_start"], args.top)
+    print_section("First detector call (inference pipeline)", report["first_detector_call"], args.top)
+
+    if args.with_models:
+        report["model_loads"] = measure_model_loads()
+        print("\n=== Model loads ===")
+        for entry in report["model_loads"]:
+            print(f"  {entry['key']:<30} {entry['load_seconds']:>8.3f} s  {entry['size_bytes'] / 1e6:>8.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+    if report["cold_start"]["heavy_modules_imported"]:
+        print("\n❌ The serverless entry point imports heavy modules at cold start")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""
+AWS Lambda entry point (API Gateway HTTP API / v2 events, see test_event.json).
+
+The ASGI lifespan is disabled, so the startup hook never preloads models or touches the
+database. Auth, feedback and history routes therefore run without importing torch; the
+detector routes import the inference pipeline on their first call and load the models
+from MODEL_DIR (prebaked into the image by scripts/prefetch_models.py).
+"""
+from mangum import Mangum
+from mcp_server import app
+
+handler = Mangum(app, lifespan="off")
@@ -0,0 +1,213 @@
+# services/api_keys.py
+#
+# In-memory table of service API keys.
+#
+# A key looks like ``mcp_<key_id>_<secret>``. Postgres stores the key_id and an HMAC-SHA256 of
+# the secret (keyed with API_KEY_SECRET), never the secret itself. Every process keeps all
+# active keys in a dict keyed by key_id, so authenticating a request is a dict lookup and a
+# constant-time digest comparison, without a database round trip.
+#
+# The table is reloaded when it changes: every API_KEY_REFRESH_SECONDS a background task reads
+# the key count and the newest updated_at of the keys and their owners, and rebuilds the dict
+# only when that fingerprint moved. Where no background task runs (serverless, lifespan off),
+# requests re-check the fingerprint once it is older than API_KEY_REFRESH_SECONDS. A revoked key
+# (or deactivated owner) therefore stops working within API_KEY_REFRESH_SECONDS. Rate limit
+# buckets are per process.
+
+import asyncio
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import get_settings
+from models.api_key import ApiKey
+from models.user import User
+
+settings = get_settings()
+
+KEY_PREFIX = "mcp_"
+
+
+def _hmac_key() -> bytes:
+    return (settings.API_KEY_SECRET or settings.JWT_SECRET_KEY).encode()
+
+
+def hash_secret(secret: str) -> str:
+    return hmac.new(_hmac_key(), secret.encode(), hashlib.sha256).hexdigest()
+
+
+def generate_key() -> Tuple[str, str, str]:
+    """A new key as ``(full_key, key_id, key_hash)``; the full key is shown once and never stored."""
+    key_id = secrets.token_hex(6)
+    secret = secrets.token_urlsafe(32)
+    return f"{KEY_PREFIX}{key_id}_{secret}", key_id, hash_secret(secret)
+
+
+def is_api_key(value: str) -> bool:
+    return value.startswith(KEY_PREFIX)
+
+
+def parse_key(key: str) -> Optional[Tuple[str, str]]:
+    if not is_api_key(key):
+        return None
+    key_id, _, secret = key[len(KEY_PREFIX):].partition("_")
+    if not key_id or not secret:
+        return None
+    return key_id, secret
+
+
+class TokenBucket:
+    """``rate_per_minute`` requests per minute, with bursts up to one minute's worth."""
+
+    def __init__(self, rate_per_minute: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> Optional[float]:
+        """None when the request may proceed, otherwise the seconds until a token is available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return (1 - self.tokens) / self.rate if self.rate else 60.0
+
+
+class ApiKeyEntry:
+    __slots__ = ("key_id", "key_hash", "name", "user", "scopes", "rate_limit", "expires_at", "bucket")
+
+    def __init__(self, key_id: str, key_hash: str, name: str, user: User, scopes: FrozenSet[str],
+                 rate_limit: int, expires_at: Optional[datetime], bucket: Optional[TokenBucket] = None):
+        self.key_id = key_id
+        self.key_hash = key_hash
+        self.name = name
+        self.user = user  # detached User: never added to a session, only its id is used
+        self.scopes = scopes
+        self.rate_limit = rate_limit
+        self.expires_at = expires_at
+        self.bucket = bucket or TokenBucket(rate_limit)
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and self.expires_at <= datetime.now(timezone.utc)
+
+
+class ApiKeyStore:
+    def __init__(self):
+        self._entries: Dict[str, ApiKeyEntry] = {}
+        self._fingerprint = None
+        self._refreshed_at: Optional[float] = None  # time.monotonic() of the last fingerprint check
+        self._lock = asyncio.Lock()
+        # Digest compared against when the key_id is unknown, so a miss costs the same as a hit
+        self._dummy_hash = hash_secret(secrets.token_urlsafe(32))
+
+    @property
+    def loaded(self) -> bool:
+        return self._fingerprint is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stale(self, max_age: float) -> bool:
+        """Whether the fingerprint was last checked more than ``max_age`` seconds ago (or never)."""
+        return self._refreshed_at is None or time.monotonic() - self._refreshed_at > max_age
+
+    async def refresh(self, db: AsyncSession, max_age: Optional[float] = None) -> bool:
+        """
+        Reload the table if the keys or their owners changed; True when it was rebuilt. With
+        ``max_age``, skip the check when another caller made it within the last ``max_age`` seconds.
+        """
+        async with self._lock:
+            if max_age is not None and not self.stale(max_age):
+                return False
+            result = await db.execute(
+                select(func.count(ApiKey.id), func.max(ApiKey.updated_at), func.max(User.updated_at))
+                .select_from(ApiKey)
+                .join(User, User.id == ApiKey.user_id)
+            )
+            fingerprint = tuple(result.one())
+            if fingerprint == self._fingerprint:
+                self._refreshed_at = time.monotonic()
+                return False
+
+            result = await db.execute(
+                select(ApiKey, User.email, User.name, User.role_id)
+                .join(User, User.id == ApiKey.user_id)
+                .where(ApiKey.is_active.is_(True), User.is_active.is_(True))
+            )
+            entries = {}
+            for key, email, name, role_id in result.all():
+                rate_limit = key.rate_limit_per_minute or settings.API_KEY_DEFAULT_RATE_LIMIT
+                previous = self._entries.get(key.key_id)
+                # Keep the bucket of an unchanged limit so a reload does not reset it
+                bucket = previous.bucket if previous is not None and previous.rate_limit == rate_limit else None
+                user = User(id=key.user_id, email=email, name=name, role_id=role_id, is_active=True)
+                entries[key.key_id] = ApiKeyEntry(
+                    key.key_id, key.key_hash, key.name, user, frozenset(key.scopes or []),
+                    rate_limit, key.expires_at, bucket
+                )
+            self._entries = entries
+            self._fingerprint = fingerprint
+            self._refreshed_at = time.monotonic()
+            print(f"✓ Loaded {len(entries)} API keys")
+            return True
+
+    def verify(self, key: str) -> Optional[ApiKeyEntry]:
+        """The entry for a well-formed, known key whose secret matches; None otherwise."""
+        parsed = parse_key(key)
+        if parsed is None:
+            return None
+        key_id, secret = parsed
+        entry = self._entries.get(key_id)
+        expected = entry.key_hash if entry is not None else self._dummy_hash
+        if not hmac.compare_digest(hash_secret(secret), expected) or entry is None:
+            return None
+        return entry
+
+
+api_key_store = ApiKeyStore()
+
+_refresh_task: Optional[asyncio.Task] = None
+
+
+async def run_refresh(interval: float) -> None:
+    from db.session import AsyncSessionLocal
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await api_key_store.refresh(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep serving the last loaded table
+            print(f"❌ API key refresh failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_api_key_refresh() -> None:
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.get_running_loop().create_task(run_refresh(settings.API_KEY_REFRESH_SECONDS))
+
+
+async def stop_api_key_refresh() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
@@ -0,0 +1,282 @@
+# services/batch_scheduler.py
+#
+# Admission control and micro-batching in front of the inference pipeline.
+#
+# Callers on the event loop submit one item with a priority class and await its result:
+#
+#   interactive  authenticated detector requests and WebSocket messages
+#   batch        bulk-analysis job items
+#   public       anonymous detector requests
+#
+# Each class has its own bounded queue. A single collector task fills batches of at most
+# max_batch_size items, always taking interactive items first, then batch, then public, and
+# waits at most max_wait_ms for a batch to fill. Batches run in a one-thread executor so model
+# forward passes never block the event loop or run concurrently.
+#
+# Overload is answered early instead of late:
+#   - a full interactive or public queue rejects the item at once (Overloaded -> 503)
+#   - an item whose deadline is shorter than the estimated queueing delay is rejected at once
+#   - an item still queued when its deadline passes is dropped and its caller gets Overloaded
+# Batch items have no deadline; when their queue is full the submitter waits, which pushes
+# back on the job workers instead of failing job items.
+
+import asyncio
+import math
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.config import get_settings
+from services.singleflight import SingleFlight
+from services.thresholds import threshold_store
+from utils.metrics import metrics
+from utils.segmentation import SegmentOptions
+
+settings = get_settings()
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_PUBLIC = 2
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BATCH: "batch", PRIORITY_PUBLIC: "public"}
+
+admission_total = metrics.counter(
+    "admission_requests_total", "Inference requests by priority and outcome (admitted, queue_full, deadline, expired)"
+)
+
+
+class Overloaded(Exception):
+    """The item was not (or would not be) served in time; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Inference overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class _Entry:
+    __slots__ = ("item", "future", "priority", "queued", "timer")
+
+    def __init__(self, item: Any, future: asyncio.Future, priority: int):
+        self.item = item
+        self.future = future
+        self.priority = priority
+        self.queued = True
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class BatchScheduler:
+    def __init__(self, run_batch: Callable[[List[Any]], List[Any]], max_batch_size: int,
+                 max_wait_ms: float, queue_limits: Dict[int, int], name: str = "batch"):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue_limits = queue_limits
+        self.name = name
+        # Ordered by priority so _take() drains the most urgent class first
+        self._queues: Dict[int, Deque[_Entry]] = {priority: deque() for priority in sorted(queue_limits)}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._notifiers: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._throughput: Optional[float] = None  # items per second, moving average
+        self.batches = 0
+        self.items = 0
+
+        for priority in self._queues:
+            label = PRIORITY_NAMES[priority]
+            metrics.gauge("admission_queue_depth", "Queued inference items").set_function(
+                lambda priority=priority: len(self._queues[priority]), scheduler=name, priority=label
+            )
+            metrics.gauge("admission_estimated_wait_seconds", "Estimated queueing delay for a new item").set_function(
+                lambda priority=priority: self.estimated_wait(priority), scheduler=name, priority=label
+            )
+
+    def _ensure_started(self) -> None:
+        # Created lazily so the event, condition and task belong to the loop that serves
+        # requests (a new loop, e.g. one per serverless invocation, gets its own)
+        loop = asyncio.get_running_loop()
+        if self._collector is None or self._collector.done() or self._collector.get_loop() is not loop:
+            for queue in self._queues.values():
+                queue.clear()
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Condition()
+            self._collector = loop.create_task(self._collect())
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def estimated_wait(self, priority: int) -> float:
+        """Seconds before an item of ``priority`` submitted now would start, from recent throughput."""
+        if not self._throughput:
+            return 0.0
+        ahead = sum(len(queue) for p, queue in self._queues.items() if p <= priority)
+        return ahead / self._throughput
+
+    def _reject(self, priority: int, reason: str) -> Overloaded:
+        admission_total.inc(scheduler=self.name, priority=PRIORITY_NAMES[priority], outcome=reason)
+        return Overloaded(reason, self.estimated_wait(priority) or 1.0)
+
+    async def submit(self, item: Any, priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> Any:
+        """
+        Queue ``item`` and await its result; raises Overloaded when it cannot be served in time.
+
+        ``timeout`` (seconds) is how long the item may stay queued; None waits as long as
+        needed. Batch-priority items wait for queue space instead of being rejected.
+        """
+        self._ensure_started()
+        queue = self._queues[priority]
+        limit = self.queue_limits[priority]
+        if len(queue) >= limit:
+            if priority != PRIORITY_BATCH:
+                raise self._reject(priority, "queue_full")
+            async with self._space:
+                await self._space.wait_for(lambda: len(queue) < limit)
+        if timeout is not None and self.estimated_wait(priority) > timeout:
+            raise self._reject(priority, "deadline")
+
+        loop = asyncio.get_running_loop()
+        entry = _Entry(item, loop.create_future(), priority)
+        if timeout is not None:
+            entry.timer = loop.call_later(timeout, self._expire, entry)
+        queue.append(entry)
+        self._wakeup.set()
+        admission_total.inc(scheduler=self.name, priority=PRIORITY_NAMES[priority], outcome="admitted")
+        try:
+            return await entry.future
+        except asyncio.CancelledError:
+            # Caller gone: free its slot now rather than when the collector reaches it
+            self._dequeue(entry)
+            raise
+
+    def _dequeue(self, entry: _Entry) -> None:
+        if not entry.queued:
+            return
+        entry.queued = False
+        if entry.timer is not None:
+            entry.timer.cancel()
+        try:
+            self._queues[entry.priority].remove(entry)
+        except ValueError:
+            return
+        # Called from timers and cancellation handlers, which cannot take the condition's lock
+        task = asyncio.get_running_loop().create_task(self._notify_space())
+        self._notifiers.add(task)
+        task.add_done_callback(self._notifiers.discard)
+
+    async def _notify_space(self) -> None:
+        # Wake batch-priority submitters waiting for room in their queue
+        async with self._space:
+            self._space.notify_all()
+
+    def _expire(self, entry: _Entry) -> None:
+        # Deadline reached while still queued: drop it rather than serve it late
+        if not entry.queued or entry.future.done():
+            return
+        self._dequeue(entry)
+        entry.future.set_exception(self._reject(entry.priority, "expired"))
+
+    def _take(self, count: int) -> List[_Entry]:
+        taken: List[_Entry] = []
+        for queue in self._queues.values():
+            while queue and len(taken) < count:
+                entry = queue.popleft()
+                entry.queued = False
+                if entry.timer is not None:
+                    entry.timer.cancel()
+                if not entry.future.done():
+                    taken.append(entry)
+        if not any(self._queues.values()):
+            self._wakeup.clear()
+        return taken
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            batch = self._take(self.max_batch_size)
+            deadline = time.monotonic() + self.max_wait
+            while batch and len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.extend(self._take(self.max_batch_size - len(batch)))
+            await self._notify_space()
+
+            # Callers that gave up (client disconnected) do not need a forward pass
+            batch = [entry for entry in batch if not entry.future.done()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.run_batch, [entry.item for entry in batch])
+            except Exception as e:
+                print(f"❌ {self.name} batch of {len(batch)} failed: {e}")
+                for entry in batch:
+                    if not entry.future.done():
+                        entry.future.set_exception(e)
+                continue
+            rate = len(batch) / max(time.perf_counter() - start, 1e-6)
+            self._throughput = rate if self._throughput is None else 0.8 * self._throughput + 0.2 * rate
+            self.batches += 1
+            self.items += len(batch)
+            for entry, result in zip(batch, results):
+                if not entry.future.done():
+                    entry.future.set_result(result)
+
+
+def _analyze(items: List[Tuple[str, bool, Optional[SegmentOptions]]]) -> List[Any]:
+    """Items are ``(cleaned_text, strict_sarcasm, segment_options)``."""
+    # Imported here so importing the scheduler never pulls in torch
+    from services.emotion_detector import analyze_batch
+    return analyze_batch([text for text, _, _ in items], [strict for _, strict, _ in items], [options for _, _, options in items])
+
+
+detection_scheduler = BatchScheduler(
+    _analyze,
+    max_batch_size=settings.DETECTION_BATCH_SIZE,
+    max_wait_ms=settings.DETECTION_BATCH_WAIT_MS,
+    queue_limits={
+        PRIORITY_INTERACTIVE: settings.ADMISSION_QUEUE_INTERACTIVE,
+        PRIORITY_BATCH: settings.ADMISSION_QUEUE_BATCH,
+        PRIORITY_PUBLIC: settings.ADMISSION_QUEUE_PUBLIC
+    },
+    name="detection"
+)
+
+
+detection_flights = SingleFlight("detection")
+
+
+def detection_version() -> str:
+    """Everything besides the input that changes a detection result."""
+    return f"{settings.MODEL_SNAPSHOT or settings.MODEL_DIR or 'hub'}|{threshold_store.current_version()}|{settings.SARCASM_MODE}"
+
+
+async def submit_detection(cleaned_text: str, strict: bool = False, segmentation: Optional[SegmentOptions] = None,
+                           priority: int = PRIORITY_INTERACTIVE, timeout: Optional[float] = None) -> Any:
+    """
+    Detection through admission control and the micro-batching scheduler, coalescing identical
+    concurrent requests.
+
+    Requests for the same whitespace-normalized text, options, priority and model/threshold
+    version that overlap in time share one inference (and the first caller's deadline). The
+    result dict is shared between them and must not be modified; each caller still stores its
+    own log. Raises Overloaded when the request cannot be served in time.
+    """
+    text = " ".join(cleaned_text.split())
+    item = (text, strict, segmentation)
+    if not settings.DETECTION_COALESCE:
+        return await detection_scheduler.submit(item, priority, timeout)
+    key = (text, strict, segmentation, priority, detection_version())
+    return await detection_flights.do(key, lambda: detection_scheduler.submit(item, priority, timeout))
@@ -0,0 +1,376 @@
+# services/emotion_detector.py
+#
+# Emotion inference pipeline. This is the only module (together with utils/sarcasm.py) that
+# imports torch and transformers, so routers import it lazily inside the detector handlers.
+
+from typing import Dict, List, Optional, Tuple
+from langdetect import detect
+import torch
+import threading
+import time
+from core.config import get_settings
+from utils.sarcasm import detect_sarcasm_batch, load_sarcasm_model, unload_sarcasm_model, MODEL_MAP_SARCASM
+from utils.sarcasm_cues import match_cues
+from services.recommender import SARCASM_SENSITIVE_EMOTIONS
+from services.model_registry import model_registry
+from services.model_store import load_sequence_classifier
+from services.spanish_emotion import spanish_engine, SpanishEngineUnavailable, PYSENTIMIENTO_MODEL_ES
+from services.emotion_labels import emotion_labels_map
+from services.thresholds import threshold_store
+from utils.batching import length_sorted_batches
+from utils.segmentation import SegmentOptions, segment_text, aggregate_scores, aggregate_flags
+
+settings = get_settings()
+
+MODEL_MAP = {
+    "en": "bhadresh-savani/bert-base-go-emotion",
+    "es": "finiteautomata/beto-emotion-analysis"
+}
+
+# Cached models and tokenizers. Loads and unloads come from the inference executor thread and
+# from /debug/models (in a threadpool), so they are serialized by _models_lock; a model is
+# published only once it is ready, and a forward pass keeps the objects it fetched alive
+# even if the model is unloaded in the meantime.
+tokenizers = {}
+models = {}
+_models_lock = threading.Lock()
+
+def load_model(lang: str = "en"):
+    lang = lang.lower()
+    if lang not in MODEL_MAP:
+        lang = "en"
+
+    with _models_lock:
+        if lang not in models:
+            print(f"Loading model for language: {lang}")
+            start = time.perf_counter()
+            tokenizer, model = load_sequence_classifier(MODEL_MAP[lang])
+            model.eval()
+            if torch.cuda.is_available():
+                model = model.cuda()
+            dummy_input = tokenizer("test", return_tensors="pt", truncation=True, max_length=512)
+            if torch.cuda.is_available():
+                dummy_input = {k: v.cuda() for k, v in dummy_input.items()}
+            with torch.no_grad():
+                model(**dummy_input)
+            tokenizers[lang], models[lang] = tokenizer, model
+            model_registry.register(f"emotion:{lang}:transformers", MODEL_MAP[lang], "transformers", model, time.perf_counter() - start)
+
+        return tokenizers[lang], models[lang]
+
+def unload_model(lang: str = "en") -> bool:
+    lang = lang.lower()
+    with _models_lock:
+        if lang not in models:
+            return False
+        tokenizers.pop(lang, None)
+        models.pop(lang, None)
+        model_registry.unregister(f"emotion:{lang}:transformers")
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+    return True
+
+# Default emotion labels for backward compatibility
+emotion_labels = emotion_labels_map["en"]
+
+def get_spanish_analyzer():
+    """The pysentimiento analyzer, or "fallback" while the Spanish engine is unavailable."""
+    try:
+        return spanish_engine.get()
+    except SpanishEngineUnavailable:
+        return "fallback"
+
+def unload_spanish_analyzer() -> bool:
+    """Drop the Spanish analyzer (and any backoff) so the next call re-selects a backend."""
+    return spanish_engine.unload()
+
+def detect_emotion_pysentimiento_batch(texts: List[str]) -> List[Dict]:
+    """Detect emotions for Spanish texts using pysentimiento with fallback to transformers."""
+    try:
+        predictions = spanish_engine.predict(texts)
+    except SpanishEngineUnavailable:
+        # Only this batch falls back; the engine retries pysentimiento after its backoff
+        return detect_emotion_transformers_batch(texts, "es")
+    return [
+        {
+            "detected_emotions": [result.output],
+            "confidence_scores": {k: int(round(v * 100)) for k, v in result.probas.items()},
+            "score_labels": "es",
+            "scores": [float(result.probas.get(label, 0.0)) for label in emotion_labels_map["es"]],
+            "backend": "pysentimiento"
+        }
+        for result in predictions
+    ]
+
+def detect_emotion_pysentimiento(text: str):
+    """Detect emotions using pysentimiento with fallback to transformers."""
+    result = detect_emotion_pysentimiento_batch([text])[0]
+    return result["detected_emotions"], result["confidence_scores"]
+
+def predict_emotion_probs(texts: List[str], model_lang: str = "en", batch_size: int = 32) -> List[List[float]]:
+    """Per-label sigmoid probabilities from the transformers model for ``model_lang``, one row per text."""
+    tokenizer, model = load_model(lang=model_lang)
+    rows: List[List[float]] = [[] for _ in texts]
+    for indices, chunk in length_sorted_batches(texts, batch_size):
+        inputs = tokenizer(chunk, return_tensors="pt", truncation=True, max_length=512, padding=True)
+        if torch.cuda.is_available():
+            inputs = {k: v.cuda() for k, v in inputs.items()}
+        with torch.no_grad(), model_registry.track(f"emotion:{model_lang}:transformers", len(chunk)):
+            probs = torch.sigmoid(model(**inputs).logits).cpu().tolist()
+        for i, row in zip(indices, probs):
+            rows[i] = row
+    return rows
+
+def probs_to_emotions(probs: List[float], model_emotion_labels: List[str], thresholds: List[float]) -> Tuple[List[str], Dict[str, int]]:
+    """Threshold one probability row (per-label thresholds) into detected labels and percentage confidence scores."""
+    # More robust bounds checking
+    if len(probs) == 0:
+        return [], {}
+
+    # Ensure we have the right number of labels for the model output
+    effective_labels = min(len(probs), len(model_emotion_labels))
+
+    # Safe indexing with bounds checking
+    detected = []
+    for i in range(effective_labels):
+        if probs[i] > thresholds[i]:
+            detected.append((model_emotion_labels[i], float(probs[i])))
+
+    detected_emotions = [label for label, _ in detected]
+    confidence_scores = {label: int(round(score * 100)) for label, score in detected}
+    return detected_emotions, confidence_scores
+
+def detect_emotion_transformers_batch(texts: List[str], model_lang: str = "en") -> List[Dict]:
+    """Multi-label emotion detection with the transformers model for ``model_lang``."""
+    label_key = model_lang if model_lang in emotion_labels_map else "en"
+    model_emotion_labels = emotion_labels_map[label_key]
+    thresholds = threshold_store.for_label_set(label_key)
+    results = []
+    for row in predict_emotion_probs(texts, model_lang):
+        detected_emotions, confidence_scores = probs_to_emotions(row, model_emotion_labels, thresholds)
+        results.append({
+            "detected_emotions": detected_emotions,
+            "confidence_scores": confidence_scores,
+            "score_labels": label_key,
+            "scores": row[:len(model_emotion_labels)],
+            "backend": "transformers"
+        })
+    return results
+
+def detect_emotion_transformers(text: str, model_lang: str = "en") -> Tuple[List[str], Dict[str, int]]:
+    result = detect_emotion_transformers_batch([text], model_lang)[0]
+    return result["detected_emotions"], result["confidence_scores"]
+
+def detect_language(text: str) -> str:
+    try:
+        return detect(text)
+    except Exception:
+        return "en"
+
+def model_language(language: str) -> str:
+    """Emotion model used for a detected language."""
+    return language if language in ["en", "es"] else "en"
+
+def detect_emotions_batch(cleaned_texts: List[str], model_langs: List[str]) -> List[Dict]:
+    """
+    Emotion detection only, grouped by model language so each model runs batched forward passes.
+
+    Every result carries the full probability vector (``scores``) and its label set
+    (``score_labels``) next to the thresholded labels.
+    """
+    emotions: List[Dict] = [None] * len(cleaned_texts)
+    for model_lang, indices in _group_indices(model_langs).items():
+        texts = [cleaned_texts[i] for i in indices]
+        # Use pysentimiento for Spanish, transformers for English
+        if model_lang == "es":
+            detected = detect_emotion_pysentimiento_batch(texts)
+        else:
+            detected = detect_emotion_transformers_batch(texts, model_lang)
+        for i, result in zip(indices, detected):
+            emotions[i] = result
+    return emotions
+
+def sarcasm_prescreen(text: str, cues: List[str], detected_emotions: List[str]) -> Optional[bool]:
+    """
+    Cheap first stage of the sarcasm cascade: ``False`` when the sarcasm model can be skipped,
+    ``None`` when it has to run.
+
+    Without a cue the model alone decides, and its answer only matters for the response when
+    an emotion with a sarcasm branch in generate_recommendation was detected; texts shorter
+    than SARCASM_MIN_WORDS words are never sent to the model without a cue.
+    """
+    if cues:
+        return None
+    if len(text.split()) < settings.SARCASM_MIN_WORDS:
+        return False
+    if SARCASM_SENSITIVE_EMOTIONS.intersection(detected_emotions):
+        return None
+    return False
+
+def scores_to_emotions(scores: List[float], model_lang: str, backend: str) -> Tuple[List[str], Dict[str, int]]:
+    """Detected labels and confidence scores for a probability row (e.g. an aggregated one) from ``backend``."""
+    if backend == "pysentimiento":
+        # pysentimiento is single-label: the top class, with the probability of every class
+        labels = emotion_labels_map["es"]
+        top = max(range(len(scores)), key=scores.__getitem__)
+        return [labels[top]], {label: int(round(score * 100)) for label, score in zip(labels, scores)}
+    label_key = model_lang if model_lang in emotion_labels_map else "en"
+    return probs_to_emotions(scores, emotion_labels_map[label_key], threshold_store.for_label_set(label_key))
+
+def analyze_batch(cleaned_texts: List[str], strict: Optional[List[bool]] = None,
+                  segmentation: Optional[List[Optional[SegmentOptions]]] = None) -> List[Dict]:
+    """
+    Run language detection, emotion detection and sarcasm detection on preprocessed texts.
+
+    Texts are grouped by language so each model runs batched forward passes. With
+    SARCASM_MODE=cascade the sarcasm model only runs for texts the pre-screen cannot settle,
+    unless ``strict`` is set for the text.
+
+    A text with SegmentOptions in ``segmentation`` is split into segments (utils/segmentation.py)
+    that join the same forward passes as every other input; its result holds the aggregated
+    scores and, with ``include_segments``, the per-segment results under ``segments``.
+    """
+    n = len(cleaned_texts)
+    languages = [detect_language(text) for text in cleaned_texts]
+    # Determine model language and get appropriate labels
+    model_langs = [model_language(language) for language in languages]
+    strict = strict or [False] * n
+    segmentation = segmentation or [None] * n
+
+    # Model inputs: the text itself, or its segments; owner[j] is the text of input j
+    segments = [segment_text(text, options.mode) if options else [text] for text, options in zip(cleaned_texts, segmentation)]
+    inputs = [segment for text_segments in segments for segment in text_segments]
+    owner = [i for i, text_segments in enumerate(segments) for _ in text_segments]
+    spans, position = [], 0
+    for text_segments in segments:
+        spans.append(range(position, position + len(text_segments)))
+        position += len(text_segments)
+
+    input_emotions = detect_emotions_batch(inputs, [model_langs[i] for i in owner])
+    emotions: List[Dict] = []
+    for i in range(n):
+        if len(spans[i]) == 1:
+            emotions.append(input_emotions[spans[i][0]])
+            continue
+        first = input_emotions[spans[i][0]]
+        scores = aggregate_scores([input_emotions[j]["scores"] for j in spans[i]], segmentation[i].aggregation)
+        detected_emotions, confidence_scores = scores_to_emotions(scores, model_langs[i], first["backend"])
+        emotions.append({
+            "detected_emotions": detected_emotions,
+            "confidence_scores": confidence_scores,
+            "score_labels": first["score_labels"],
+            "scores": scores,
+            "backend": first["backend"]
+        })
+    cues = [match_cues(text, language) for text, language in zip(cleaned_texts, languages)]
+
+    sarcasm_model = [True] * n
+    if settings.SARCASM_MODE == "cascade":
+        for i, text in enumerate(cleaned_texts):
+            if not strict[i]:
+                sarcasm_model[i] = sarcasm_prescreen(text, cues[i], emotions[i]["detected_emotions"]) is None
+
+    input_sarcasm = [False] * len(inputs)
+    to_check = [j for j in range(len(inputs)) if sarcasm_model[owner[j]]]
+    for language, group in _group_indices([languages[owner[j]] for j in to_check]).items():
+        indices = [to_check[k] for k in group]
+        flags = detect_sarcasm_batch([inputs[j] for j in indices], lang=language)
+        for j, flag in zip(indices, flags):
+            input_sarcasm[j] = flag
+
+    results = []
+    for i in range(n):
+        result = {
+            "language": languages[i],
+            "model_lang": model_langs[i],
+            "sarcasm_detected": input_sarcasm[spans[i][0]],
+            "sarcasm_model": sarcasm_model[i],
+            "sarcasm_cues": cues[i],
+            "segments": None,
+            **emotions[i]
+        }
+        if segmentation[i] is not None:
+            flags = [input_sarcasm[j] for j in spans[i]]
+            result["sarcasm_detected"] = aggregate_flags(flags, segmentation[i].aggregation)
+            if segmentation[i].include_segments:
+                result["segments"] = [
+                    {
+                        "text": inputs[j],
+                        "detected_emotions": input_emotions[j]["detected_emotions"],
+                        "confidence_scores": input_emotions[j]["confidence_scores"],
+                        "sarcasm_detected": input_sarcasm[j]
+                    }
+                    for j in spans[i]
+                ]
+        results.append(result)
+    return results
+
+def analyze_text(cleaned_text: str, strict: bool = False, segmentation: Optional[SegmentOptions] = None) -> Dict:
+    """
+    Run language detection, emotion detection and sarcasm detection on preprocessed text.
+    """
+    return analyze_batch([cleaned_text], [strict], [segmentation])[0]
+
+def _group_indices(keys: List[str]) -> Dict[str, List[int]]:
+    groups: Dict[str, List[int]] = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    return groups
+
+def preload_models():
+    """Load and warm up every emotion and sarcasm model."""
+    print("\n=== Starting Model Preloading ===")
+    print("\nLoading emotion detection models...")
+
+    # Load English transformers model
+    print("Loading en emotion model...")
+    try:
+        tokenizer, model = load_model("en")
+        # Warm up the model with a dummy text
+        inputs = tokenizer("Hello", return_tensors="pt", truncation=True, max_length=512)
+        if torch.cuda.is_available():
+            inputs = {k: v.cuda() for k, v in inputs.items()}
+        with torch.no_grad():
+            _ = model(**inputs)
+        print("✓ en emotion model loaded and warmed up")
+    except Exception as e:
+        print(f"❌ Error loading en emotion model: {str(e)}")
+        raise
+
+    # Try to load Spanish model (pysentimiento with fallback)
+    print("Loading es emotion model...")
+    try:
+        analyzer = get_spanish_analyzer()
+        if analyzer != "fallback":
+            # Warm up pysentimiento model
+            _ = analyzer.predict("Hola")
+            print("✓ es emotion model (pysentimiento) loaded and warmed up")
+        else:
+            # Warm up Spanish transformers fallback
+            tokenizer, model = load_model("es")
+            inputs = tokenizer("Hola", return_tensors="pt", truncation=True, max_length=512)
+            if torch.cuda.is_available():
+                inputs = {k: v.cuda() for k, v in inputs.items()}
+            with torch.no_grad():
+                _ = model(**inputs)
+            print("✓ es emotion model (transformers fallback) loaded and warmed up")
+    except Exception as e:
+        print(f"❌ Error loading es emotion model: {str(e)}")
+        raise
+
+    print("\nLoading sarcasm detection models...")
+    for lang in ["en", "es"]:
+        print(f"Loading {lang} sarcasm model...")
+        try:
+            tokenizer, model = load_sarcasm_model(lang)
+            # Warm up the sarcasm model with a dummy text
+            inputs = tokenizer("Hello", return_tensors="pt", truncation=True, max_length=512)
+            if torch.cuda.is_available():
+                inputs = {k: v.cuda() for k, v in inputs.items()}
+            with torch.no_grad():
+                _ = model(**inputs)
+            print(f"✓ {lang} sarcasm model loaded and warmed up")
+        except Exception as e:
+            print(f"❌ Error loading {lang} sarcasm model: {str(e)}")
+            raise
+    print("\n=== All Models Loaded Successfully! ===\n")
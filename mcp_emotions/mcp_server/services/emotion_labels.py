@@ -0,0 +1,39 @@
+# services/emotion_labels.py
+#
+# Label sets of the emotion models. Kept free of torch so history endpoints can turn stored
+# score vectors back into labels without importing the inference pipeline.
+
+from typing import Dict, List, Optional
+
+# Model-specific emotion labels, keyed by the label set stored in EmotionLog.score_labels
+emotion_labels_map = {
+    "en": [
+        "admiration", "amusement", "anger", "annoyance", "approval", "caring", "confusion", "curiosity",
+        "desire", "disappointment", "disapproval", "disgust", "embarrassment", "excitement", "fear", "gratitude",
+        "grief", "joy", "love", "nervousness", "optimism", "pride", "realization", "relief", "remorse", "sadness",
+        "surprise", "neutral"
+    ],
+    "es": [
+        "others", "joy", "sadness", "anger", "surprise", "disgust", "fear"
+    ]
+}
+
+# Probability above which a multi-label (English) emotion counts as detected
+EMOTION_THRESHOLD = 0.15
+
+def scores_to_confidence(scores: List[float], label_key: str, thresholds: Optional[List[float]] = None) -> Dict[str, int]:
+    """
+    Percentage confidence scores as returned by the detector for this label set.
+
+    English is multi-label, so only labels above their threshold are reported; the Spanish
+    label set is single-label, so every class probability is reported.
+    """
+    labels = emotion_labels_map.get(label_key, emotion_labels_map["en"])
+    if label_key == "es":
+        return {label: int(round(score * 100)) for label, score in zip(labels, scores)}
+    thresholds = thresholds or [EMOTION_THRESHOLD] * len(labels)
+    return {
+        label: int(round(score * 100))
+        for label, score, threshold in zip(labels, scores, thresholds)
+        if score > threshold
+    }
@@ -0,0 +1,208 @@
+# services/emotion_log_partitions.py
+#
+# Monthly range partitions of emotion_logs on created_at.
+#
+# Partitions are named emotion_logs_pYYYYMM and hold [first of the month, first of the next
+# month) in UTC. ensure_partitions() keeps the current month and the next
+# EMOTION_LOG_PARTITIONS_AHEAD months created; it runs at startup and every
+# EMOTION_LOG_PARTITION_CHECK_SECONDS, and concurrent callers (several workers, the retention
+# job) are serialized with an advisory lock.
+#
+# There is deliberately no default partition: PostgreSQL refuses DETACH PARTITION ...
+# CONCURRENTLY while one exists, and retention relies on it to remove a month without
+# blocking inserts and reads on emotion_logs. created_at is the insert time, so rows only
+# need the partitions kept ahead. Where maintenance does not run (serverless without the cron
+# job), an insert for a month without a partition fails with a check violation; the detector
+# routes then create the partitions themselves (create_missing_partitions()) and retry once.
+#
+# Retention never deletes rows: scripts/archive_emotion_logs.py detaches whole partitions that
+# fell out of the retention window, archives and drops them.
+
+import asyncio
+import re
+from datetime import date, datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from core.config import get_settings
+
+settings = get_settings()
+
+TABLE = "emotion_logs"
+PARTITION_PATTERN = re.compile(r"^emotion_logs_p(\d{4})(\d{2})$")
+# Advisory lock key: one partition change at a time per database
+LOCK_KEY = 7248913
+CHECK_VIOLATION = "23514"
+COLUMNS = ("id", "session_id", "message", "emotions", "context", "user_id", "created_at",
+           "sarcasm_detected", "emotion_scores", "score_labels")
+
+
+def month_start(value) -> date:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = PARTITION_PATTERN.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def month_bound(month: date) -> str:
+    """Partition bound literal for the first instant of ``month`` in UTC."""
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    # Compared in SQL: asyncpg returns the "char" relkind column as bytes
+    partitioned = (await conn.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+                                      {"table": TABLE})).scalar()
+    return bool(partitioned)
+
+
+async def list_partitions(conn: AsyncConnection) -> List[date]:
+    """Months that have a partition attached, oldest first."""
+    rows = await conn.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:table)"),
+        {"table": TABLE}
+    )
+    return sorted(month for month in (partition_month(name) for name, in rows) if month is not None)
+
+
+async def list_detaching(conn: AsyncConnection) -> List[date]:
+    """Months whose partition was left half-detached by an interrupted DETACH ... CONCURRENTLY."""
+    rows = await conn.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:table) AND i.inhdetachpending"),
+        {"table": TABLE}
+    )
+    return sorted(month for month in (partition_month(name) for name, in rows) if month is not None)
+
+
+async def list_detached(conn: AsyncConnection) -> List[date]:
+    """Months whose partition table exists but is no longer attached (detached, not yet dropped)."""
+    rows = await conn.execute(
+        text("SELECT c.relname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+             "WHERE n.nspname = current_schema() AND c.relkind = 'r' AND c.relname LIKE :pattern "
+             "AND NOT c.relispartition"),
+        {"pattern": f"{TABLE}\\_p%"}
+    )
+    return sorted(month for month in (partition_month(name) for name, in rows) if month is not None)
+
+
+async def create_partition(conn: AsyncConnection, month: date) -> str:
+    """
+    Create and attach the partition for ``month``.
+
+    Built as a plain table and attached afterwards: ATTACH PARTITION only takes a SHARE UPDATE
+    EXCLUSIVE lock on emotion_logs, where CREATE TABLE ... PARTITION OF blocks every query on it.
+    """
+    name = partition_name(month)
+    lower, upper = month_bound(month), month_bound(add_months(month, 1))
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    return name
+
+
+async def detach_partition(conn: AsyncConnection, month: date) -> str:
+    """
+    Detach the partition for ``month`` without blocking queries on emotion_logs.
+
+    ``conn`` must be in autocommit mode: DETACH PARTITION ... CONCURRENTLY runs as two
+    transactions of its own and waits for the queries already using the partition. A detach
+    interrupted between them is completed with FINALIZE.
+    """
+    name = partition_name(month)
+    mode = "FINALIZE" if month in await list_detaching(conn) else "CONCURRENTLY"
+    # Session-level lock: conflicts with ensure_partitions() in other sessions
+    await conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": LOCK_KEY})
+    try:
+        await conn.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {name} {mode}"))
+    finally:
+        await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": LOCK_KEY})
+    return name
+
+
+async def ensure_partitions(conn: AsyncConnection, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Create the missing partitions from this month to ``months_ahead`` months ahead.
+
+    Must run inside a transaction; returns the names of the partitions it created. Does
+    nothing while emotion_logs is not partitioned yet (before the migration).
+    """
+    if months_ahead is None:
+        months_ahead = settings.EMOTION_LOG_PARTITIONS_AHEAD
+    if not await is_partitioned(conn):
+        return []
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+    existing = set(await list_partitions(conn))
+    current = month_start(datetime.now(timezone.utc))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month not in existing:
+            created.append(await create_partition(conn, month))
+    return created
+
+
+def is_missing_partition(error: Exception) -> bool:
+    """Whether a failed insert was rejected because no partition holds its created_at."""
+    orig = getattr(error, "orig", None)
+    return getattr(orig, "sqlstate", None) == CHECK_VIOLATION and "no partition of relation" in str(orig)
+
+
+async def create_missing_partitions() -> List[str]:
+    """ensure_partitions() in a transaction of its own on the writer."""
+    from db.session import writer_engine
+
+    async with writer_engine.begin() as conn:
+        created = await ensure_partitions(conn)
+    if created:
+        print(f"✓ Created emotion_logs partitions {', '.join(created)}")
+    return created
+
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+
+async def run_maintenance(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await create_missing_partitions()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Partitions are kept months ahead, so the next attempt is usually in time
+            print(f"❌ emotion_logs partition maintenance failed: {e}")
+
+
+def start_partition_maintenance() -> None:
+    global _maintenance_task
+    if _maintenance_task is None or _maintenance_task.done():
+        _maintenance_task = asyncio.get_running_loop().create_task(
+            run_maintenance(settings.EMOTION_LOG_PARTITION_CHECK_SECONDS)
+        )
+
+
+async def stop_partition_maintenance() -> None:
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        try:
+            await _maintenance_task
+        except asyncio.CancelledError:
+            pass
+        _maintenance_task = None
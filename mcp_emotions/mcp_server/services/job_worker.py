@@ -0,0 +1,188 @@
+# services/job_worker.py
+#
+# Background workers for bulk-analysis jobs (routers/jobs.py).
+#
+# All job state lives in Postgres. A worker claims up to JOB_CHUNK_SIZE unfinished items
+# with SELECT .. FOR UPDATE SKIP LOCKED, so any number of workers (in the API process or
+# scripts/job_worker.py) can share the queue without coordination. Claimed items are marked
+# running with a timestamp; items whose claim is older than JOB_CLAIM_TIMEOUT_SECONDS (the
+# worker died or was restarted) are claimed again, so jobs resume after a restart.
+#
+# Messages go through the shared micro-batching scheduler, i.e. the same batched inference
+# path as the streaming endpoint.
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update, and_, or_, case
+
+from core.config import get_settings
+from db.session import AsyncSessionLocal
+from models.analysis_job import (
+    AnalysisJob, AnalysisJobItem,
+    JOB_RUNNING, JOB_COMPLETED, ITEM_PENDING, ITEM_RUNNING, ITEM_DONE, ITEM_FAILED
+)
+from services.batch_scheduler import submit_detection, PRIORITY_BATCH
+from services.recommender import generate_recommendation
+from utils.preprocessing import preprocess_input
+
+settings = get_settings()
+
+
+async def claim_chunk(size: int) -> Tuple[list, datetime]:
+    """Claim up to ``size`` items; the claim timestamp identifies this claim when writing back."""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.JOB_CLAIM_TIMEOUT_SECONDS)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(AnalysisJobItem.id, AnalysisJobItem.job_id, AnalysisJobItem.message)
+            .where(or_(
+                AnalysisJobItem.status == ITEM_PENDING,
+                and_(AnalysisJobItem.status == ITEM_RUNNING, AnalysisJobItem.claimed_at < stale)
+            ))
+            .order_by(AnalysisJobItem.id)
+            .limit(size)
+            .with_for_update(skip_locked=True)
+        )
+        items = result.all()
+        if items:
+            await db.execute(
+                update(AnalysisJobItem)
+                .where(AnalysisJobItem.id.in_([item.id for item in items]))
+                .values(status=ITEM_RUNNING, claimed_at=now)
+            )
+            await db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id.in_({item.job_id for item in items}), AnalysisJob.started_at.is_(None))
+                .values(status=JOB_RUNNING, started_at=now)
+            )
+        await db.commit()
+    return items, now
+
+
+async def analyze_message(message: str) -> dict:
+    cleaned = preprocess_input(message)
+    analysis = await submit_detection(cleaned, priority=PRIORITY_BATCH)
+    return {
+        "language": analysis["language"],
+        "detected_emotions": analysis["detected_emotions"],
+        "confidence_scores": analysis["confidence_scores"],
+        "sarcasm_detected": analysis["sarcasm_detected"],
+        "sarcasm_cues": analysis["sarcasm_cues"],
+        "recommendation": generate_recommendation(analysis["detected_emotions"], analysis["sarcasm_detected"])
+    }
+
+
+async def process_chunk(items, claimed_at: datetime) -> None:
+    outcomes = await asyncio.gather(*(analyze_message(item.message) for item in items), return_exceptions=True)
+
+    rows, counts = [], {}
+    for item, outcome in zip(items, outcomes):
+        processed, failed = counts.get(item.job_id, (0, 0))
+        if isinstance(outcome, Exception):
+            rows.append({"id": item.id, "status": ITEM_FAILED, "result": None, "error": str(outcome) or type(outcome).__name__})
+            counts[item.job_id] = (processed + 1, failed + 1)
+        else:
+            rows.append({"id": item.id, "status": ITEM_DONE, "result": outcome, "error": None})
+            counts[item.job_id] = (processed + 1, failed)
+
+    async with AsyncSessionLocal() as db:
+        # Only items still held by this claim are written, so a chunk that was taken over by
+        # another worker after a stall is not counted twice
+        result = await db.execute(
+            select(AnalysisJobItem.id)
+            .where(
+                AnalysisJobItem.id.in_([row["id"] for row in rows]),
+                AnalysisJobItem.status == ITEM_RUNNING,
+                AnalysisJobItem.claimed_at == claimed_at
+            )
+            .with_for_update()
+        )
+        still_claimed = set(result.scalars().all())
+        rows = [row for row in rows if row["id"] in still_claimed]
+        if not rows:
+            await db.rollback()
+            return
+        if len(rows) != len(items):
+            counts = {}
+            by_id = {item.id: item.job_id for item in items}
+            for row in rows:
+                processed, failed = counts.get(by_id[row["id"]], (0, 0))
+                counts[by_id[row["id"]]] = (processed + 1, failed + (row["status"] == ITEM_FAILED))
+
+        await db.execute(update(AnalysisJobItem), rows)
+        now = datetime.now(timezone.utc)
+        for job_id, (processed, failed) in counts.items():
+            await db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id)
+                .values(
+                    processed=AnalysisJob.processed + processed,
+                    failed=AnalysisJob.failed + failed,
+                    status=case((AnalysisJob.processed + processed >= AnalysisJob.total, JOB_COMPLETED), else_=AnalysisJob.status),
+                    completed_at=case((AnalysisJob.processed + processed >= AnalysisJob.total, now), else_=AnalysisJob.completed_at)
+                )
+            )
+        await db.commit()
+
+
+async def run_worker(name: str, stop: Optional[asyncio.Event] = None) -> None:
+    """Claim and process chunks until ``stop`` is set; sleeps JOB_POLL_SECONDS when idle."""
+    stop = stop or asyncio.Event()
+    print(f"✓ Job worker {name} started")
+    while not stop.is_set():
+        try:
+            items, claimed_at = await claim_chunk(settings.JOB_CHUNK_SIZE)
+            if items:
+                await process_chunk(items, claimed_at)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Job worker {name} error: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), settings.JOB_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+    print(f"Job worker {name} stopped")
+
+
+_stop_event: Optional[asyncio.Event] = None
+_worker_tasks: List[asyncio.Task] = []
+
+
+def start_job_workers(count: int) -> None:
+    global _stop_event
+    _stop_event = asyncio.Event()
+    for i in range(count):
+        _worker_tasks.append(asyncio.create_task(run_worker(f"api-{i}", _stop_event)))
+
+
+async def stop_job_workers() -> None:
+    # Items of an interrupted chunk stay claimed and are picked up again after the timeout
+    if _stop_event is not None:
+        _stop_event.set()
+    for task in _worker_tasks:
+        task.cancel()
+    await asyncio.gather(*_worker_tasks, return_exceptions=True)
+    _worker_tasks.clear()
+
+
+async def job_progress(db, job_id) -> Optional[dict]:
+    job = await db.get(AnalysisJob, job_id, populate_existing=True)
+    return None if job is None else job_to_dict(job)
+
+
+def job_to_dict(job: AnalysisJob) -> dict:
+    return {
+        "job_id": str(job.id),
+        "status": job.status,
+        "total": job.total,
+        "processed": job.processed,
+        "failed": job.failed,
+        "progress": round(job.processed / job.total, 4) if job.total else 1.0,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "completed_at": job.completed_at
+    }
@@ -0,0 +1,52 @@
+# services/languages.py
+#
+# Language detection and the languages.code -> languages.id map used when storing feedback.
+#
+# The languages table holds a handful of rows that only change through migrations, so it is
+# read once per process and kept in memory. A code that is not in the map triggers a reload,
+# at most every LANGUAGE_MAP_REFRESH_SECONDS, so a language added later is picked up without a
+# restart and unknown codes do not cost a query each.
+
+import time
+from typing import Dict, Iterable, Optional
+from langdetect import detect
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.config import get_settings
+from models.language import Language
+
+settings = get_settings()
+
+
+def detect_language_code(text: str) -> str:
+    """Language code of ``text``, English when it cannot be detected."""
+    try:
+        return detect(text)
+    except Exception:
+        return "en"
+
+
+class LanguageMap:
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._ids: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+
+    async def _load(self, db: AsyncSession) -> None:
+        rows = (await db.execute(select(Language.code, Language.id))).all()
+        self._ids = {code.lower(): language_id for code, language_id in rows}
+        self._loaded_at = time.monotonic()
+
+    async def resolve(self, db: AsyncSession, codes: Iterable[str]) -> Dict[str, Optional[int]]:
+        """language_id for each code (None for unknown codes), querying only on a stale miss."""
+        codes = {code.lower() for code in codes if code}
+        stale = self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+        if stale and (self._loaded_at is None or not codes <= self._ids.keys()):
+            try:
+                await self._load(db)
+            except Exception as e:
+                print(f"❌ Could not load languages: {e}")
+        return {code: self._ids.get(code) for code in codes}
+
+
+language_map = LanguageMap(settings.LANGUAGE_MAP_REFRESH_SECONDS)
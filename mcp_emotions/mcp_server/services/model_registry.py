@@ -0,0 +1,119 @@
+# services/model_registry.py
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+
+def _model_footprint(model) -> Dict:
+    """Return device, parameter count and byte size for a torch module (or a wrapper holding one)."""
+    module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+    if module is None or not hasattr(module, "parameters"):
+        return {"device": "unknown", "parameters": 0, "size_bytes": 0}
+
+    parameters = 0
+    size_bytes = 0
+    device = "cpu"
+    for i, param in enumerate(module.parameters()):
+        if i == 0:
+            device = str(param.device)
+        parameters += param.numel()
+        size_bytes += param.numel() * param.element_size()
+    for buffer in module.buffers():
+        size_bytes += buffer.numel() * buffer.element_size()
+
+    return {"device": device, "parameters": parameters, "size_bytes": size_bytes}
+
+
+class ModelRecord:
+    """Runtime bookkeeping for one resident model."""
+
+    def __init__(self, key: str, identifier: str, backend: str, model, load_seconds: float):
+        self.key = key
+        self.identifier = identifier
+        self.backend = backend
+        self.load_seconds = load_seconds
+        self.loaded_at = datetime.now(timezone.utc)
+        self.last_used_at: Optional[datetime] = None
+        self.request_count = 0  # texts inferred (a forward pass covers a whole batch of them)
+        self.batch_count = 0  # forward passes
+        self.total_inference_seconds = 0.0
+        self.footprint = _model_footprint(model)
+
+    def to_dict(self) -> Dict:
+        avg_ms = (self.total_inference_seconds / self.request_count * 1000) if self.request_count else None
+        avg_batch_ms = (self.total_inference_seconds / self.batch_count * 1000) if self.batch_count else None
+        return {
+            "key": self.key,
+            "identifier": self.identifier,
+            "backend": self.backend,
+            "device": self.footprint["device"],
+            "parameters": self.footprint["parameters"],
+            "size_bytes": self.footprint["size_bytes"],
+            "load_seconds": round(self.load_seconds, 3),
+            "loaded_at": self.loaded_at.isoformat(),
+            "last_used_at": self.last_used_at.isoformat() if self.last_used_at else None,
+            "request_count": self.request_count,
+            "avg_inference_ms": round(avg_ms, 2) if avg_ms is not None else None,
+            "batch_count": self.batch_count,
+            "avg_batch_ms": round(avg_batch_ms, 2) if avg_batch_ms is not None else None,
+        }
+
+
+class ModelRegistry:
+    """Thread-safe registry of loaded models and their usage statistics."""
+
+    def __init__(self):
+        self._records: Dict[str, ModelRecord] = {}
+        self._backends: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: str, identifier: str, backend: str, model, load_seconds: float) -> None:
+        record = ModelRecord(key, identifier, backend, model, load_seconds)
+        with self._lock:
+            self._records[key] = record
+
+    def unregister(self, key: str) -> bool:
+        with self._lock:
+            return self._records.pop(key, None) is not None
+
+    def record_inference(self, key: str, seconds: float, items: int = 1) -> None:
+        """Attribute one forward pass over ``items`` texts, taking ``seconds``, to ``key``."""
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                return
+            record.request_count += items
+            record.batch_count += 1
+            record.total_inference_seconds += seconds
+            record.last_used_at = datetime.now(timezone.utc)
+
+    @contextmanager
+    def track(self, key: str, items: int = 1):
+        """Time the wrapped inference call over ``items`` texts and attribute it to ``key``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_inference(key, time.perf_counter() - start, items)
+
+    def set_backend(self, name: str, backend: Optional[str]) -> None:
+        """Remember which backend serves ``name`` (e.g. pysentimiento vs. the transformers fallback)."""
+        with self._lock:
+            if backend is None:
+                self._backends.pop(name, None)
+            else:
+                self._backends[name] = backend
+
+    def get_backend(self, name: str, default: str = "not_loaded") -> str:
+        with self._lock:
+            return self._backends.get(name, default)
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return [record.to_dict() for record in self._records.values()]
+
+
+model_registry = ModelRegistry()
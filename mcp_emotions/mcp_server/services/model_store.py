@@ -0,0 +1,185 @@
+# services/model_store.py
+#
+# Local model snapshots. scripts/prefetch_models.py materializes every hub model into
+#
+#   MODEL_DIR/
+#     CURRENT                      <- name of the active snapshot
+#     <version>/
+#       manifest.json              <- sha256 and size of every file, per model
+#       <org>--<name>/             <- save_pretrained() output, weights as model.safetensors
+#
+# Loaders resolve hub names through this directory. In strict local-only mode a missing
+# model is an error instead of a hub download, and safetensors weights are memory-mapped
+# copy-on-write, so the read-only pages are shared by every worker on the host.
+
+import hashlib
+import json
+import os
+import re
+import struct
+from typing import Dict, Optional, Tuple
+from core.config import get_settings
+
+settings = get_settings()
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+SAFETENSORS_FILE = "model.safetensors"
+# State dict keys that may differ between a checkpoint and a freshly built model without
+# affecting it: position_ids buffers are rebuilt at init and were saved by older transformers
+IGNORABLE_KEYS = (r"\.position_ids$",)
+
+
+def local_dir_name(model_name: str) -> str:
+    """Directory name used for a hub model inside a snapshot (``org/name`` -> ``org--name``)."""
+    return model_name.replace("/", "--")
+
+
+def snapshot_dir() -> Optional[str]:
+    """Active snapshot directory: MODEL_SNAPSHOT, else the CURRENT pointer, else MODEL_DIR itself."""
+    if not settings.MODEL_DIR:
+        return None
+    if settings.MODEL_SNAPSHOT:
+        return os.path.join(settings.MODEL_DIR, settings.MODEL_SNAPSHOT)
+    pointer = os.path.join(settings.MODEL_DIR, CURRENT_FILE)
+    if os.path.isfile(pointer):
+        with open(pointer) as f:
+            return os.path.join(settings.MODEL_DIR, f.read().strip())
+    return settings.MODEL_DIR
+
+
+def resolve_model_source(model_name: str) -> Tuple[str, bool]:
+    """
+    Return ``(source, local_only)`` for ``from_pretrained``.
+
+    When the active snapshot contains ``model_name`` the local path is used and hub lookups
+    are disabled; otherwise the hub name is returned unchanged, unless MODEL_LOCAL_ONLY is
+    set, in which case a missing model raises FileNotFoundError.
+    """
+    root = snapshot_dir()
+    if root:
+        path = os.path.join(root, local_dir_name(model_name))
+        if os.path.isdir(path):
+            return path, True
+    if settings.MODEL_LOCAL_ONLY:
+        raise FileNotFoundError(f"Model {model_name} not found in local snapshot {root or '(MODEL_DIR not set)'}")
+    return model_name, False
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(root: str) -> Dict:
+    with open(os.path.join(root, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def verify_model(root: str, model_name: str) -> None:
+    """Raise ValueError if any file of ``model_name`` differs from the snapshot manifest."""
+    entry = read_manifest(root)["models"].get(model_name)
+    if entry is None:
+        raise ValueError(f"{model_name} is not listed in the manifest of {root}")
+    model_path = os.path.join(root, entry["dir"])
+    for rel_path, expected in entry["files"].items():
+        actual = file_sha256(os.path.join(model_path, rel_path))
+        if actual != expected["sha256"]:
+            raise ValueError(f"Hash mismatch for {model_name}/{rel_path}: {actual} != {expected['sha256']}")
+
+
+# safetensors dtype codes -> torch dtype names
+_SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def mmap_safetensors(path: str) -> Dict:
+    """
+    Map a safetensors file copy-on-write and return tensors that are views into the mapping.
+
+    Nothing is read eagerly: pages are faulted in from the page cache on first use and stay
+    shared with every other process mapping the same file until someone writes to them.
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_len))
+    data_start = 8 + header_len
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        begin, end = info["data_offsets"]
+        byte_offset = data_start + begin
+        itemsize = torch.empty(0, dtype=dtype).element_size()
+        if byte_offset % itemsize:
+            # Misaligned tensor (not produced by save_pretrained): copy it out of the mapping
+            raw = torch.empty(0, dtype=torch.uint8).set_(storage, byte_offset, (end - begin,))
+            tensors[name] = raw.clone().view(dtype).reshape(tuple(info["shape"]))
+        else:
+            tensors[name] = torch.empty(0, dtype=dtype).set_(storage, byte_offset // itemsize, tuple(info["shape"]))
+    return tensors
+
+
+def unexplained_keys(keys, patterns) -> list:
+    return [key for key in keys if not any(re.search(pattern, key) for pattern in patterns)]
+
+
+def check_state_dict_keys(model, model_name: str, weights: str, missing, unexpected) -> None:
+    """
+    Raise ValueError unless the keys ``load_state_dict`` could not match are known to be
+    harmless: with weight initialization skipped, a missing tensor would stay uninitialized.
+    """
+    missing_ok = (list(IGNORABLE_KEYS) + list(getattr(model, "_keys_to_ignore_on_load_missing", None) or [])
+                  + [re.escape(key) + "$" for key in getattr(model, "_tied_weights_keys", None) or []])
+    unexpected_ok = list(IGNORABLE_KEYS) + list(getattr(model, "_keys_to_ignore_on_load_unexpected", None) or [])
+    missing = unexplained_keys(missing, missing_ok)
+    unexpected = unexplained_keys(unexpected, unexpected_ok)
+    if missing or unexpected:
+        raise ValueError(
+            f"{model_name}: {weights} does not match the model config "
+            f"(missing: {missing[:5]}, unexpected: {unexpected[:5]})"
+        )
+
+
+def load_sequence_classifier(model_name: str):
+    """
+    Load ``(tokenizer, model)`` for a sequence-classification model.
+
+    Models found in the local snapshot with a single safetensors file are built without
+    weight initialization and then bound to the memory-mapped tensors; everything else goes
+    through the regular ``from_pretrained`` path.
+    """
+    from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+    from transformers.modeling_utils import no_init_weights
+
+    source, local_only = resolve_model_source(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=local_only)
+
+    weights = os.path.join(source, SAFETENSORS_FILE)
+    if local_only and os.path.isfile(weights):
+        if settings.MODEL_VERIFY_HASHES:
+            root = os.path.dirname(source)
+            if os.path.isfile(os.path.join(root, MANIFEST_FILE)):
+                verify_model(root, model_name)
+            else:
+                # Plain MODEL_DIR layout, not written by scripts/prefetch_models.py
+                print(f"⚠️ {root} has no {MANIFEST_FILE}; loading {model_name} without hash verification")
+        config = AutoConfig.from_pretrained(source, local_files_only=True)
+        with no_init_weights():
+            model = AutoModelForSequenceClassification.from_config(config)
+        missing, unexpected = model.load_state_dict(mmap_safetensors(weights), strict=False, assign=True)
+        check_state_dict_keys(model, model_name, weights, missing, unexpected)
+        model.tie_weights()
+    else:
+        model = AutoModelForSequenceClassification.from_pretrained(source, local_files_only=local_only)
+    return tokenizer, model
@@ -0,0 +1,214 @@
+# services/recent_history.py
+#
+# Write-through cache of the latest emotion logs per user and per session, so the first page of
+# a history (what a client reads right after sending a message) is served without a query, and
+# so is a whole history (no limit) that still fits in one buffer.
+#
+# Each key, ("user", user_id) or ("session", session_id), holds a ring buffer of the latest
+# RECENT_HISTORY_SIZE logs as compact RecentEntry tuples (raw columns, decoded only when a page
+# is rendered), plus the total row count and newest created_at behind it, which is all a page
+# and its ETag validator need. Detections append to the buffers of their user and session after
+# they commit; the history endpoints fill a buffer from the database when it is missing or
+# stale. Buffers unused for RECENT_HISTORY_IDLE_SECONDS are evicted, and at most
+# RECENT_HISTORY_MAX_KEYS are kept (least recently used go first).
+#
+# Consistency rules:
+#   - A worker sees its own writes on its next read, including writes that commit while a
+#     buffer is being loaded (they are merged into the loaded rows).
+#   - Writes made by other workers reach a buffer only through the database. A buffer is
+#     served without a query for RECENT_HISTORY_TTL seconds after it was loaded or checked;
+#     after that the next read runs the index-only validator query (row count, newest
+#     created_at), keeps serving the buffer if it matches and reloads it otherwise. Staleness
+#     across workers is therefore bounded by RECENT_HISTORY_TTL; 0 checks on every read.
+#   - Buffers are loaded with the history endpoints' read session, i.e. from the replica when
+#     DATABASE_REPLICA_URL is set, so a reload is as fresh as the replica.
+#   - Rows updated in place (scripts/backfill_emotion_scores.py) keep their cached version until
+#     the buffer is reloaded or evicted; the history ETags share this caveat. Dropping old
+#     partitions changes the row count, so it is picked up by the next check.
+
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from datetime import datetime
+from typing import Deque, Hashable, List, Optional, Tuple
+
+from core.config import get_settings
+from models.emotion_log import EmotionLog
+from utils.metrics import metrics
+
+settings = get_settings()
+
+RecentEntry = namedtuple("RecentEntry", [
+    "id", "session_id", "message", "emotions", "context", "sarcasm_detected", "created_at",
+    "emotion_scores", "score_labels"
+])
+# Columns to select for rows that are turned into RecentEntry tuples
+RECENT_COLUMNS = tuple(getattr(EmotionLog, name) for name in RecentEntry._fields)
+
+history_cache_requests = metrics.counter(
+    "recent_history_requests_total",
+    "First-page and whole-history reads by result (hit, checked: validated by a query, loaded: read from "
+    "the database, too_long: whole history longer than RECENT_HISTORY_SIZE, changed: whole history that "
+    "changed during the load; both read from the database)"
+)
+
+
+def user_key(user_id) -> Tuple[str, Hashable]:
+    return ("user", user_id)
+
+
+def session_key(session_id: str) -> Tuple[str, Hashable]:
+    return ("session", session_id)
+
+
+class RecentBuffer:
+    __slots__ = ("entries", "count", "last_modified", "checked_at", "used_at", "loading", "pending")
+
+    def __init__(self, size: int):
+        self.entries: Deque[RecentEntry] = deque(maxlen=size)  # oldest first
+        self.count: Optional[int] = None  # None: rows written before the buffer existed are unknown
+        self.last_modified: Optional[datetime] = None
+        self.checked_at: Optional[float] = None
+        self.used_at = time.monotonic()
+        self.loading = 0
+        self.pending: List[RecentEntry] = []  # writes recorded while loads are running
+
+
+def newest(buffer: RecentBuffer, limit: Optional[int]) -> Optional[List[RecentEntry]]:
+    """Latest ``limit`` entries, newest first; without a limit, all of them if the buffer holds the whole history."""
+    if limit is None:
+        if buffer.count is None or buffer.count > len(buffer.entries):
+            return None
+        limit = len(buffer.entries)
+    return [buffer.entries[-index] for index in range(1, min(limit, len(buffer.entries)) + 1)]
+
+
+class RecentHistoryCache:
+    def __init__(self, size: int, max_keys: int, ttl: float, idle_seconds: float):
+        self.size = size
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.idle_seconds = idle_seconds
+        self._buffers: "OrderedDict[Hashable, RecentBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def cacheable(self, limit: Optional[int], before: Optional[datetime]) -> bool:
+        """
+        Whether this cache may answer a page request: a first page of at most ``size`` entries,
+        or a whole history (no limit), which it answers only while that fits in a buffer.
+        """
+        return bool(self.size) and before is None and (limit is None or limit <= self.size)
+
+    def _use(self, key: Hashable, create: bool) -> Optional[RecentBuffer]:
+        # Called with the lock held: touch ``key`` and evict idle or surplus buffers
+        now = time.monotonic()
+        buffer = self._buffers.get(key)
+        if buffer is None and create:
+            buffer = self._buffers[key] = RecentBuffer(self.size)
+        if buffer is not None:
+            buffer.used_at = now
+            self._buffers.move_to_end(key)
+        while self._buffers:
+            oldest_key, oldest = next(iter(self._buffers.items()))
+            if len(self._buffers) <= self.max_keys and now - oldest.used_at < self.idle_seconds:
+                break
+            del self._buffers[oldest_key]
+        return buffer
+
+    def record(self, log: EmotionLog) -> None:
+        """Append a committed log to its user's and session's buffers."""
+        if not self.size:
+            return
+        entry = RecentEntry(*(getattr(log, name) for name in RecentEntry._fields))
+        with self._lock:
+            for key in (user_key(log.user_id), session_key(log.session_id)):
+                buffer = self._use(key, create=True)
+                if buffer.entries and entry.created_at < buffer.entries[-1].created_at:
+                    # created_at is the transaction start: concurrent commits can arrive out of order
+                    merged = sorted([*buffer.entries, entry], key=lambda cached: cached.created_at)
+                    buffer.entries = deque(merged[-self.size:], maxlen=self.size)
+                else:
+                    buffer.entries.append(entry)
+                if buffer.count is not None:
+                    buffer.count += 1
+                if buffer.last_modified is None or entry.created_at > buffer.last_modified:
+                    buffer.last_modified = entry.created_at
+                if buffer.loading:
+                    buffer.pending.append(entry)
+
+    def page(self, key: Hashable, limit: Optional[int]) -> Optional[Tuple[List[RecentEntry], int, Optional[datetime]]]:
+        """Latest ``limit`` entries (newest first), row count and newest created_at; None unless fresh."""
+        with self._lock:
+            buffer = self._use(key, create=False)
+            if buffer is None or buffer.count is None or buffer.checked_at is None:
+                return None
+            if time.monotonic() - buffer.checked_at > self.ttl:
+                return None
+            entries = newest(buffer, limit)
+            return None if entries is None else (entries, buffer.count, buffer.last_modified)
+
+    def check(self, key: Hashable, count: int, last_modified: Optional[datetime],
+              limit: Optional[int]) -> Optional[List[RecentEntry]]:
+        """
+        Compare a buffer with the database's row count and newest created_at; on a match the
+        buffer is marked fresh and its latest ``limit`` entries (newest first) are returned.
+        """
+        with self._lock:
+            buffer = self._use(key, create=False)
+            if buffer is None or buffer.loading:
+                return None
+            # A buffer created by writes is complete once the database holds no other rows
+            known = buffer.count if buffer.count is not None else len(buffer.entries)
+            if known != count or buffer.last_modified != last_modified:
+                return None
+            buffer.count = count
+            buffer.checked_at = time.monotonic()
+            return newest(buffer, limit)
+
+    def begin_load(self, key: Hashable) -> None:
+        with self._lock:
+            self._use(key, create=True).loading += 1
+
+    def abort_load(self, key: Hashable) -> None:
+        """Undo begin_load() after a failed read."""
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is not None and buffer.loading:
+                buffer.loading -= 1
+                if not buffer.loading:
+                    buffer.pending = []
+
+    def finish_load(self, key: Hashable, rows, count: int, last_modified: Optional[datetime]) -> None:
+        """
+        Install the latest rows (RECENT_COLUMNS, any order) read after begin_load(): up to
+        ``size`` + 1 of them, so a whole history can be told from a longer one. Row count and
+        newest created_at are taken from the rows; the validator query's ``count`` that preceded
+        them, which a concurrent insert may have outdated, is only used for longer histories.
+        """
+        entries = [RecentEntry(*row) for row in rows]
+        complete = len(entries) <= self.size
+        with self._lock:
+            buffer = self._use(key, create=True)
+            if buffer.loading:
+                buffer.loading -= 1
+            loaded = {entry.id for entry in entries}
+            # Writes that committed during the load may be missing from the rows read
+            extra = [entry for entry in buffer.pending if entry.id not in loaded]
+            if not buffer.loading:
+                buffer.pending = []
+            merged = sorted(entries + extra, key=lambda entry: entry.created_at)
+            buffer.entries = deque(merged[-self.size:], maxlen=self.size)
+            buffer.count = len(merged) if complete else max(count + len(extra), len(merged))
+            buffer.last_modified = merged[-1].created_at if merged else None
+            buffer.checked_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+
+recent_history = RecentHistoryCache(
+    settings.RECENT_HISTORY_SIZE,
+    settings.RECENT_HISTORY_MAX_KEYS,
+    settings.RECENT_HISTORY_TTL,
+    settings.RECENT_HISTORY_IDLE_SECONDS
+)
@@ -2,6 +2,10 @@
 
 from typing import List, Optional
 
+# Emotions for which the recommendation depends on the sarcasm flag (see the is_sarcastic
+# branches below); the sarcasm cascade in services/emotion_detector.py relies on this set
+SARCASM_SENSITIVE_EMOTIONS = {"admiration", "gratitude", "approval", "anger", "annoyance", "disappointment", "amusement"}
+
 def generate_recommendation(detected_emotions: List[str], is_sarcastic: bool, language: str = "en") -> Optional[str]:
     """
     Generate an intuitive, supportive recommendation based on emotional tone, sarcasm, and language.
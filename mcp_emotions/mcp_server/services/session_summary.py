@@ -0,0 +1,182 @@
+# services/session_summary.py
+#
+# Running per-session aggregates, so polling a session's mood does not re-read its history.
+#
+# Every EmotionLog write folds the new message into the session's summary row in the same
+# transaction: label counts, an exponentially-weighted moving average of the per-label
+# scores (SESSION_SUMMARY_ALPHA), the sarcasm count and the last SESSION_SUMMARY_RECENT
+# messages. The cost of an update does not depend on the session length.
+#
+# Reads go through an in-process LRU. Entries are refreshed by writes made in this process
+# and expire after SESSION_SUMMARY_CACHE_TTL seconds, which bounds how stale a summary can be
+# when the write landed on another worker.
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import get_settings
+from models.emotion_log import EmotionLog
+from models.session_summary import SessionSummary
+from services.emotion_labels import emotion_labels_map
+from utils.score_codec import decode_scores
+
+settings = get_settings()
+
+
+def fold_message(summary: SessionSummary, message: str, emotions: List[str], scores: List[float],
+                 label_key: Optional[str], sarcasm_detected: bool, timestamp: datetime) -> None:
+    """Apply one message to ``summary``; JSON columns are reassigned so the ORM sees the change."""
+    alpha = settings.SESSION_SUMMARY_ALPHA
+    first = not summary.message_count
+
+    label_counts = dict(summary.label_counts or {})
+    for emotion in emotions:
+        label_counts[emotion] = label_counts.get(emotion, 0) + 1
+
+    current = dict(zip(emotion_labels_map.get(label_key or "en", []), scores)) if scores else {}
+    ewma = dict(summary.ewma_scores or {})
+    if current:
+        for label in set(ewma) | set(current):
+            score = current.get(label, 0.0)
+            ewma[label] = round(score if first else alpha * score + (1 - alpha) * ewma.get(label, 0.0), 4)
+
+    recent = list(summary.recent_messages or [])
+    recent.append({
+        "message": message,
+        "emotions": emotions,
+        "sarcasm_detected": sarcasm_detected,
+        "timestamp": timestamp.isoformat()
+    })
+
+    summary.message_count = (summary.message_count or 0) + 1
+    summary.sarcasm_count = (summary.sarcasm_count or 0) + int(bool(sarcasm_detected))
+    summary.label_counts = label_counts
+    summary.ewma_scores = ewma
+    summary.recent_messages = recent[-settings.SESSION_SUMMARY_RECENT:]
+    summary.updated_at = timestamp
+
+
+def summary_to_dict(summary: SessionSummary) -> Dict:
+    ewma = summary.ewma_scores or {}
+    return {
+        "session_id": summary.session_id,
+        "message_count": summary.message_count,
+        "label_counts": summary.label_counts,
+        "ewma_scores": ewma,
+        "dominant_emotion": max(ewma, key=ewma.get) if ewma else None,
+        "sarcasm_ratio": round(summary.sarcasm_count / summary.message_count, 4) if summary.message_count else 0.0,
+        "recent_messages": summary.recent_messages,
+        "updated_at": summary.updated_at
+    }
+
+
+class SummaryCache:
+    """LRU of serialized summaries with a per-entry TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            stored_at, user_id, data = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[session_id]
+                return None
+            self._entries.move_to_end(session_id)
+            return {"user_id": user_id, **data}
+
+    def put(self, summary: SessionSummary) -> None:
+        with self._lock:
+            self._entries[summary.session_id] = (time.monotonic(), summary.user_id, summary_to_dict(summary))
+            self._entries.move_to_end(summary.session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+summary_cache = SummaryCache(settings.SESSION_SUMMARY_CACHE_SIZE, settings.SESSION_SUMMARY_CACHE_TTL)
+
+
+async def _lock_summary(db: AsyncSession, session_id: str, user_id) -> SessionSummary:
+    # Create the row if needed without racing a concurrent first message, then lock it
+    await db.execute(
+        insert(SessionSummary)
+        .values(session_id=session_id, user_id=user_id, message_count=0, sarcasm_count=0,
+                label_counts={}, ewma_scores={}, recent_messages=[])
+        .on_conflict_do_nothing(index_elements=["session_id"])
+    )
+    result = await db.execute(
+        select(SessionSummary)
+        .where(SessionSummary.session_id == session_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def _fold_history(db: AsyncSession, summary: SessionSummary) -> None:
+    """Fold the already stored logs of a session that predates this table (one pass, once)."""
+    result = await db.execute(
+        select(EmotionLog.message, EmotionLog.emotions, EmotionLog.emotion_scores, EmotionLog.score_labels,
+               EmotionLog.sarcasm_detected, EmotionLog.created_at)
+        .where(EmotionLog.session_id == summary.session_id, EmotionLog.user_id == summary.user_id)
+        .order_by(EmotionLog.created_at)
+    )
+    for row in result.all():
+        try:
+            emotions = json.loads(row.emotions)
+        except json.JSONDecodeError:
+            emotions = []
+        fold_message(summary, row.message, emotions, decode_scores(row.emotion_scores), row.score_labels,
+                     row.sarcasm_detected, row.created_at)
+
+
+async def record_message(db: AsyncSession, log: EmotionLog, emotions: List[str], scores: List[float]) -> Optional[SessionSummary]:
+    """
+    Fold a new log into its session summary; call before adding the log, the caller commits.
+    """
+    summary = await _lock_summary(db, log.session_id, log.user_id)
+    if summary.user_id != log.user_id:
+        # Session id already taken by another user: never mix their messages
+        return None
+    if not summary.message_count:
+        await _fold_history(db, summary)
+    fold_message(summary, log.message, emotions, scores, log.score_labels,
+                 log.sarcasm_detected, datetime.now(timezone.utc))
+    return summary
+
+
+async def get_summary(db: AsyncSession, session_id: str, user_id) -> Optional[Dict]:
+    """Summary of one of ``user_id``'s sessions, from the cache, the table, or rebuilt from logs."""
+    cached = summary_cache.get(session_id)
+    if cached is not None:
+        return cached if cached.pop("user_id") == user_id else None
+
+    summary = await db.get(SessionSummary, session_id)
+    if summary is None or not summary.message_count:
+        has_logs = await db.scalar(
+            select(EmotionLog.id).where(EmotionLog.session_id == session_id, EmotionLog.user_id == user_id).limit(1)
+        )
+        if has_logs is None:
+            return None
+        summary = await _lock_summary(db, session_id, user_id)
+        if summary.user_id == user_id and not summary.message_count:
+            await _fold_history(db, summary)
+        await db.commit()
+        if not summary.message_count:
+            return None
+    summary_cache.put(summary)
+    return summary_to_dict(summary) if summary.user_id == user_id else None
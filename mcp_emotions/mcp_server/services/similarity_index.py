@@ -0,0 +1,251 @@
+# services/similarity_index.py
+#
+# In-process "similar moments" index over the stored emotion probability vectors.
+#
+# Each user gets their own partition: a contiguous float32 matrix of L2-normalized vectors
+# (one row per emotion log) that grows by doubling. Small partitions are searched by brute
+# force (one matrix-vector product); once a partition reaches SIMILARITY_ANN_MIN_ROWS an
+# inverted-file index is trained on it (spherical k-means, rows bucketed by nearest
+# centroid) and only the SIMILARITY_NPROBE closest buckets plus the rows added since the
+# last training are scored. Training runs on a background thread and the finished index is
+# swapped in: appends stay O(1) on the request path, and until the first index is ready a
+# partition is searched by brute force.
+#
+# Partitions are loaded from emotion_logs on first query and kept in an LRU of
+# SIMILARITY_MAX_USERS users. New logs are appended by the detector route, so a loaded
+# partition never needs to go back to the database.
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.config import get_settings
+from services.emotion_labels import emotion_labels_map
+
+settings = get_settings()
+
+# Every label set is projected into the GoEmotions space so English and Spanish logs of the
+# same user are comparable. pysentimiento's "others" is the closest thing to "neutral".
+VECTOR_LABELS = emotion_labels_map["en"]
+_LABEL_ALIASES = {"others": "neutral"}
+_PROJECTIONS = {
+    key: np.array([VECTOR_LABELS.index(_LABEL_ALIASES.get(label, label)) for label in labels])
+    for key, labels in emotion_labels_map.items()
+}
+DIM = len(VECTOR_LABELS)
+
+# One training at a time per worker; numpy releases the GIL for the matrix products
+_trainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="similarity-train")
+
+
+def to_vector(blob: bytes, label_key: Optional[str]) -> Optional[np.ndarray]:
+    """Stored float16 scores (utils/score_codec.py) -> normalized float32 vector, or None."""
+    if not blob:
+        return None
+    scores = np.frombuffer(blob, dtype="<f2").astype(np.float32)
+    columns = _PROJECTIONS.get(label_key or "en")
+    if columns is None or len(columns) != len(scores):
+        return None
+    vector = np.zeros(DIM, dtype=np.float32)
+    vector[columns] = scores
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+
+class _InvertedFile:
+    """Rows of a partition bucketed by their nearest k-means centroid."""
+
+    def __init__(self, matrix: np.ndarray, iterations: int = 10, sample_size: int = 20000, seed: int = 0):
+        n = len(matrix)
+        nlist = max(2, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = matrix[rng.choice(n, min(n, sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+        assignment = np.argmax(matrix @ centroids.T, axis=1)
+        self.centroids = centroids
+        self.order = np.argsort(assignment, kind="stable")
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(nlist + 1))
+        self.size = n
+
+    def candidates(self, query: np.ndarray, nprobe: int, total_rows: int) -> np.ndarray:
+        probe = np.argsort(self.centroids @ query)[::-1][:nprobe]
+        parts = [self.order[self.offsets[c]:self.offsets[c + 1]] for c in probe]
+        # Rows appended after training are not bucketed yet: always score them
+        parts.append(np.arange(self.size, total_rows))
+        return np.concatenate(parts)
+
+
+class UserPartition:
+    def __init__(self, capacity: int = 64):
+        self.matrix = np.zeros((capacity, DIM), dtype=np.float32)
+        self.ids: List[uuid.UUID] = []
+        self.rows: Dict[uuid.UUID, int] = {}
+        self.ivf: Optional[_InvertedFile] = None
+        self.training = False
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, log_id: uuid.UUID, vector: np.ndarray) -> None:
+        if log_id in self.rows:
+            return
+        n = len(self.ids)
+        if n == len(self.matrix):
+            grown = np.zeros((2 * len(self.matrix), DIM), dtype=np.float32)
+            grown[:n] = self.matrix[:n]
+            self.matrix = grown
+        self.matrix[n] = vector
+        self.rows[log_id] = n
+        self.ids.append(log_id)
+        self._maybe_train()
+
+    def extend(self, log_ids: List[uuid.UUID], vectors: np.ndarray) -> None:
+        """Bulk load (one copy and at most one training instead of one per row)."""
+        n = len(self.ids)
+        if n + len(log_ids) > len(self.matrix):
+            grown = np.zeros((max(2 * len(self.matrix), n + len(log_ids)), DIM), dtype=np.float32)
+            grown[:n] = self.matrix[:n]
+            self.matrix = grown
+        self.matrix[n:n + len(log_ids)] = vectors
+        for i, log_id in enumerate(log_ids):
+            self.rows[log_id] = n + i
+        self.ids.extend(log_ids)
+        self._maybe_train()
+
+    def _maybe_train(self) -> None:
+        n = len(self.ids)
+        if n < settings.SIMILARITY_ANN_MIN_ROWS or self.training:
+            return
+        # Retrain whenever the partition doubled since the last training
+        if self.ivf is None or n >= 2 * self.ivf.size:
+            self.training = True
+            # Rows [0, n) are never written again (growing copies them into a new matrix), so
+            # the view stays valid while appends continue
+            _trainer.submit(self._train, self.matrix[:n])
+
+    def _train(self, rows: np.ndarray) -> None:
+        try:
+            # Rows appended meanwhile are scored exhaustively until the next training
+            self.ivf = _InvertedFile(rows)
+        except Exception as e:
+            print(f"❌ Similarity index training failed: {e}")
+        finally:
+            self.training = False
+
+    def vector(self, log_id: uuid.UUID) -> Optional[np.ndarray]:
+        row = self.rows.get(log_id)
+        return None if row is None else self.matrix[row]
+
+    def search(self, query: np.ndarray, k: int, exclude: Optional[uuid.UUID] = None) -> List[Tuple[uuid.UUID, float]]:
+        n, matrix, ivf = len(self.ids), self.matrix, self.ivf
+        if ivf is None:
+            candidates = None
+            scores = matrix[:n] @ query
+        else:
+            candidates = ivf.candidates(query, settings.SIMILARITY_NPROBE, n)
+            scores = matrix[candidates] @ query
+        if exclude is not None and exclude in self.rows:
+            excluded_row = self.rows[exclude]
+            if candidates is None:
+                scores[excluded_row] = -np.inf
+            else:
+                scores[candidates == excluded_row] = -np.inf
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return [(self.ids[row], float(scores[i])) for row, i in zip(rows, top) if np.isfinite(scores[i])]
+
+
+class SimilarityIndex:
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._partitions: "OrderedDict[uuid.UUID, UserPartition]" = OrderedDict()
+        # Logs written while a partition is being loaded from the database, and the number of
+        # loads running per user
+        self._pending: Dict[uuid.UUID, List[Tuple[uuid.UUID, np.ndarray]]] = {}
+        self._loads: Dict[uuid.UUID, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID) -> Optional[UserPartition]:
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is not None:
+                self._partitions.move_to_end(user_id)
+            return partition
+
+    def begin_load(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            self._pending.setdefault(user_id, [])
+            self._loads[user_id] = self._loads.get(user_id, 0) + 1
+
+    def _end_load(self, user_id: uuid.UUID) -> List[Tuple[uuid.UUID, np.ndarray]]:
+        # Called with the lock held: the writes recorded during the load, dropped with the last one
+        remaining = self._loads.get(user_id, 1) - 1
+        if remaining > 0:
+            self._loads[user_id] = remaining
+            return list(self._pending.get(user_id, []))
+        self._loads.pop(user_id, None)
+        return self._pending.pop(user_id, [])
+
+    def abort_load(self, user_id: uuid.UUID) -> None:
+        """Undo begin_load() after a failed read."""
+        with self._lock:
+            self._end_load(user_id)
+
+    def finish_load(self, user_id: uuid.UUID, rows) -> UserPartition:
+        """Install a partition built from ``(log_id, emotion_scores, score_labels)`` rows."""
+        log_ids, vectors = [], []
+        for log_id, blob, label_key in rows:
+            vector = to_vector(blob, label_key)
+            if vector is not None:
+                log_ids.append(log_id)
+                vectors.append(vector)
+        partition = UserPartition(capacity=max(64, len(log_ids)))
+        if log_ids:
+            partition.extend(log_ids, np.stack(vectors))
+        with self._lock:
+            for log_id, vector in self._end_load(user_id):
+                partition.add(log_id, vector)
+            self._partitions[user_id] = partition
+            self._partitions.move_to_end(user_id)
+            while len(self._partitions) > self.max_users:
+                self._partitions.popitem(last=False)
+        return partition
+
+    def add(self, user_id: uuid.UUID, log_id: uuid.UUID, blob: bytes, label_key: Optional[str]) -> None:
+        """Append a freshly written log; users that are not loaded pick it up on first query."""
+        vector = to_vector(blob, label_key)
+        if vector is None:
+            return
+        with self._lock:
+            if user_id in self._pending:
+                self._pending[user_id].append((log_id, vector))
+            partition = self._partitions.get(user_id)
+            if partition is not None:
+                partition.add(log_id, vector)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            partitions = list(self._partitions.values())
+        return {
+            "users": len(partitions),
+            "rows": sum(len(p) for p in partitions),
+            "ann_users": sum(1 for p in partitions if p.ivf is not None),
+        }
+
+
+similarity_index = SimilarityIndex(settings.SIMILARITY_MAX_USERS)
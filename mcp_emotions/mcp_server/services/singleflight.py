@@ -0,0 +1,65 @@
+# services/singleflight.py
+#
+# Coalescing of identical concurrent work ("single flight").
+#
+# The first caller for a key starts the computation; callers arriving with the same key while
+# it runs await the same task instead of starting their own. The key is forgotten as soon as
+# the task finishes, so this never serves stale results: it only merges requests that
+# overlap in time. A caller that is cancelled (client gone) does not cancel the shared task
+# while other callers still wait for it.
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from utils.metrics import metrics
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Tuple[asyncio.Task, list]] = {}
+        self._requests = metrics.counter(
+            "singleflight_requests_total", "Calls by role: leader computed, coalesced awaited a leader"
+        )
+        metrics.gauge("singleflight_inflight_keys", "Distinct keys being computed").set_function(
+            lambda: len(self._calls), name=name
+        )
+        metrics.gauge("singleflight_coalesced_ratio", "Share of calls served by another call's computation").set_function(
+            self.coalesced_ratio, name=name
+        )
+
+    def coalesced_ratio(self) -> float:
+        leaders = self._requests.value(name=self.name, role="leader")
+        coalesced = self._requests.value(name=self.name, role="coalesced")
+        total = leaders + coalesced
+        return coalesced / total if total else 0.0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = (task, [0])
+            task.add_done_callback(lambda _, key=key, task=task: self._forget(key, task))
+            self._requests.inc(name=self.name, role="leader")
+        else:
+            self._requests.inc(name=self.name, role="coalesced")
+
+        task, waiters = call
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if waiters[0] == 1 and not task.done():
+                # Last waiter gone: stop the work, and let the next caller start afresh
+                task.cancel()
+                self._forget(key, task)
+            raise
+        finally:
+            waiters[0] -= 1
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if task.done() and not task.cancelled():
+            task.exception()  # retrieved: waiters that saw it have re-raised it already
+        call = self._calls.get(key)
+        if call is not None and call[0] is task:
+            del self._calls[key]
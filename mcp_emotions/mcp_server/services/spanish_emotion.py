@@ -0,0 +1,159 @@
+# services/spanish_emotion.py
+#
+# Spanish emotion engine (pysentimiento).
+#
+# The analyzer is built at most once at a time, under a lock, on first use. Failures do not
+# switch Spanish to the transformers fallback for good: a failed load, or SPANISH_ENGINE_MAX_FAILURES
+# failed predictions in a row, put the engine into backoff (SPANISH_ENGINE_RETRY_SECONDS, doubling up
+# to SPANISH_ENGINE_MAX_RETRY_SECONDS). While it backs off, callers get SpanishEngineUnavailable
+# and use the fallback; the first call after the backoff rebuilds the analyzer.
+#
+# pysentimiento is imported on load, so importing this module never pulls in torch.
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from core.config import get_settings
+from services.model_registry import model_registry
+from services.model_store import resolve_model_source
+
+settings = get_settings()
+
+# Model behind pysentimiento's create_analyzer(task="emotion", lang="es")
+PYSENTIMIENTO_MODEL_ES = "pysentimiento/robertuito-emotion-analysis"
+REGISTRY_KEY = "emotion:es:pysentimiento"
+
+
+class SpanishEngineUnavailable(Exception):
+    pass
+
+
+class SpanishEmotionEngine:
+    def __init__(self, retry_seconds: float, max_retry_seconds: float, max_failures: int):
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.max_failures = max(1, max_failures)
+        self._analyzer = None
+        self._lock = threading.Lock()
+        self._failures = 0  # consecutive load or prediction failures
+        self._backoffs = 0  # consecutive backoff periods, for the doubling delay
+        self._retry_at = 0.0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._analyzer is not None
+
+    def get(self) -> Any:
+        """The analyzer, building it if needed; raises SpanishEngineUnavailable while backing off."""
+        analyzer = self._analyzer
+        if analyzer is not None:
+            return analyzer
+        with self._lock:
+            if self._analyzer is not None:
+                return self._analyzer
+            if time.monotonic() < self._retry_at:
+                raise SpanishEngineUnavailable(self.last_error or "Spanish engine is backing off")
+            try:
+                self._analyzer = self._load()
+            except Exception as e:
+                print(f"❌ Failed to load pysentimiento analyzer: {str(e)}")
+                self._back_off(e)
+                raise SpanishEngineUnavailable(str(e)) from e
+            self._failures = 0
+            self._backoffs = 0
+            model_registry.set_backend("emotion:es", "pysentimiento")
+            return self._analyzer
+
+    def _load(self) -> Any:
+        from pysentimiento import create_analyzer
+
+        start = time.perf_counter()
+        source, local_only = resolve_model_source(PYSENTIMIENTO_MODEL_ES)
+        if local_only:
+            analyzer = create_analyzer(task="emotion", lang="es", model_name=source)
+        else:
+            analyzer = create_analyzer(task="emotion", lang="es")
+        model_registry.register(
+            REGISTRY_KEY,
+            getattr(getattr(analyzer, "model", None), "name_or_path", PYSENTIMIENTO_MODEL_ES),
+            "pysentimiento",
+            analyzer,
+            time.perf_counter() - start
+        )
+        print("✓ Spanish pysentimiento analyzer loaded successfully")
+        return analyzer
+
+    def predict(self, texts: List[str]) -> List[Any]:
+        """pysentimiento predictions for ``texts`` in one list call (the analyzer batches internally)."""
+        analyzer = self.get()
+        try:
+            with model_registry.track(REGISTRY_KEY, len(texts)):
+                predictions = analyzer.predict(texts)
+        except Exception as e:
+            print(f"❌ pysentimiento prediction failed: {str(e)}")
+            with self._lock:
+                self._failures += 1
+                if self._failures >= self.max_failures and self._analyzer is analyzer:
+                    # Persistent failures: drop the analyzer and rebuild it after the backoff
+                    self._drop()
+                    self._back_off(e)
+                else:
+                    self._record_error(e)
+            raise SpanishEngineUnavailable(str(e)) from e
+        self._failures = 0
+        return predictions
+
+    def _record_error(self, error: Exception) -> None:
+        self.last_error = str(error)
+        self.last_error_at = datetime.now(timezone.utc)
+
+    def _back_off(self, error: Exception) -> None:
+        # Called with the lock held
+        self._record_error(error)
+        delay = min(self.max_retry_seconds, self.retry_seconds * 2 ** self._backoffs)
+        self._backoffs += 1
+        self._retry_at = time.monotonic() + delay
+        model_registry.set_backend("emotion:es", "fallback")
+        print(f"🔄 Spanish emotion requests use the transformers fallback; retrying pysentimiento in {delay:.0f}s")
+
+    def _drop(self) -> None:
+        self._analyzer = None
+        model_registry.unregister(REGISTRY_KEY)
+
+    def unload(self) -> bool:
+        """Drop the analyzer and any backoff so the next call selects a backend again."""
+        with self._lock:
+            had_state = self._analyzer is not None or self._retry_at > 0
+            self._drop()
+            self._failures = 0
+            self._backoffs = 0
+            self._retry_at = 0.0
+            model_registry.set_backend("emotion:es", None)
+            return had_state
+
+    def health(self) -> Dict:
+        retry_in = max(0.0, self._retry_at - time.monotonic())
+        if self._analyzer is not None:
+            state = "degraded" if self._failures else "ready"
+        elif retry_in > 0:
+            state = "backoff"
+        else:
+            state = "not_loaded"
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "retry_in_seconds": round(retry_in, 1) if state == "backoff" else None,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at.isoformat() if self.last_error_at else None
+        }
+
+
+spanish_engine = SpanishEmotionEngine(
+    retry_seconds=settings.SPANISH_ENGINE_RETRY_SECONDS,
+    max_retry_seconds=settings.SPANISH_ENGINE_MAX_RETRY_SECONDS,
+    max_failures=settings.SPANISH_ENGINE_MAX_FAILURES
+)
@@ -0,0 +1,73 @@
+# services/thresholds.py
+#
+# Per-label decision thresholds, hot-loaded from the JSON file written by
+# scripts/evaluate_feedback.py:
+#
+#   {"version": "...", "default": 0.15, "labels": {"en": {"joy": 0.22, ...}, "es": {...}}}
+#
+# The file is re-checked at most every THRESHOLDS_RELOAD_SECONDS; a missing or invalid file
+# keeps the last good thresholds (or the built-in default), so a bad deploy of the file can
+# never take detection down.
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from core.config import get_settings
+from services.emotion_labels import emotion_labels_map, EMOTION_THRESHOLD
+
+settings = get_settings()
+
+
+class ThresholdStore:
+    def __init__(self, path: str, reload_seconds: float):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.version: Optional[str] = None
+        self._mtime: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._by_label_set: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if not self.path or (self._checked_at is not None and now - self._checked_at < self.reload_seconds):
+            return
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.reload_seconds:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+                if mtime == self._mtime:
+                    return
+                with open(self.path) as f:
+                    data = json.load(f)
+                default = float(data.get("default", EMOTION_THRESHOLD))
+                self._by_label_set = {
+                    key: [float(data.get("labels", {}).get(key, {}).get(label, default)) for label in labels]
+                    for key, labels in emotion_labels_map.items()
+                }
+                self._mtime = mtime
+                self.version = data.get("version")
+                print(f"✓ Loaded emotion thresholds {self.version} from {self.path}")
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"❌ Ignoring invalid thresholds file {self.path}: {e}")
+
+    def current_version(self) -> Optional[str]:
+        self._maybe_reload()
+        return self.version
+
+    def for_label_set(self, label_key: str) -> List[float]:
+        """Threshold per label, in the label order of ``label_key``."""
+        self._maybe_reload()
+        thresholds = self._by_label_set.get(label_key)
+        if thresholds is None:
+            return [EMOTION_THRESHOLD] * len(emotion_labels_map.get(label_key, emotion_labels_map["en"]))
+        return thresholds
+
+
+threshold_store = ThresholdStore(settings.EMOTION_THRESHOLDS_FILE, settings.THRESHOLDS_RELOAD_SECONDS)
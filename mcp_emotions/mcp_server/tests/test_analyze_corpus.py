@@ -0,0 +1,46 @@
+import pytest
+
+from scripts.analyze_corpus import ParquetWriter
+
+pq = pytest.importorskip("pyarrow.parquet")
+pa = pytest.importorskip("pyarrow")
+
+
+def result_row(row_id):
+    return {
+        "id": row_id,
+        "language": "en",
+        "detected_emotions": ["joy"],
+        "confidence_scores": {"joy": 91},
+        "score_labels": "en",
+        "scores": [0.91, 0.02],
+        "sarcasm_detected": False,
+        "sarcasm_cues": [],
+        "recommendation": "Keep it up!",
+    }
+
+
+def error_row(row_id):
+    return {"id": row_id, "error": "Message is empty"}
+
+
+def test_parquet_parts_share_one_schema_with_mixed_error_rows(tmp_path):
+    writer = ParquetWriter(str(tmp_path))
+    # A part starting with an error row, a part with results only and a part with errors only
+    writer.write(0, [error_row("0"), result_row("1")])
+    writer.write(1, [result_row("2"), result_row("3")])
+    writer.write(2, [error_row("4")])
+
+    schemas = [pq.read_schema(str(part)) for part in sorted(tmp_path.glob("part-*.parquet"))]
+    assert len(schemas) == 3
+    assert all(schema.equals(writer.schema) for schema in schemas)
+
+    rows = pq.read_table(str(tmp_path)).sort_by("id").to_pylist()
+    assert [row["id"] for row in rows] == ["0", "1", "2", "3", "4"]
+    assert rows[0]["error"] == "Message is empty"
+    assert rows[0]["detected_emotions"] is None and rows[0]["confidence_scores"] is None
+    assert rows[1]["error"] is None
+    assert rows[1]["detected_emotions"] == ["joy"]
+    assert rows[1]["confidence_scores"] == '{"joy": 91}'
+    assert rows[1]["scores"] == [0.91, 0.02]
+    assert rows[1]["sarcasm_detected"] is False
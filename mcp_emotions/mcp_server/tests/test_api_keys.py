@@ -0,0 +1,89 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from auth import api_key as api_key_auth
+from models.api_key import ApiKey
+from services import api_keys
+from services.api_keys import ApiKeyStore, generate_key
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def one(self):
+        return self.value
+
+    def all(self):
+        return self.value
+
+
+class FakeDb:
+    """Answers the fingerprint query, then the key query, from ``keys``."""
+
+    def __init__(self):
+        self.keys = []
+        self.version = 0
+        self.fingerprints = 0
+
+    async def execute(self, query):
+        if "count" in str(query):
+            self.fingerprints += 1
+            moment = datetime(2026, 10, 19, tzinfo=timezone.utc)
+            return FakeResult((len(self.keys), moment, self.version))
+        return FakeResult([(key, "svc@example.com", "svc", None) for key in self.keys])
+
+
+def add_key(db, scopes=("detect",)):
+    full_key, key_id, key_hash = generate_key()
+    db.keys.append(ApiKey(key_id=key_id, key_hash=key_hash, user_id=uuid.uuid4(), name="svc",
+                          scopes=list(scopes), rate_limit_per_minute=None, expires_at=None))
+    db.version += 1
+    return full_key
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = ApiKeyStore()
+    monkeypatch.setattr(api_key_auth, "api_key_store", store)
+    monkeypatch.setattr(api_key_auth.settings, "API_KEY_REFRESH_SECONDS", 10.0)
+    return store
+
+
+def test_revoked_key_stops_working_once_the_table_is_stale(store, monkeypatch):
+    db = FakeDb()
+    key = add_key(db)
+    now = [1000.0]
+    monkeypatch.setattr(api_keys.time, "monotonic", lambda: now[0])
+
+    assert asyncio.run(api_key_auth.verify_api_key(key, "detect", db)).key_id
+    db.keys.clear()
+    db.version += 1
+
+    # Within API_KEY_REFRESH_SECONDS the loaded table is trusted without a query
+    now[0] += 5
+    asyncio.run(api_key_auth.verify_api_key(key, "detect", db))
+    assert db.fingerprints == 1
+
+    now[0] += 6
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(api_key_auth.verify_api_key(key, "detect", db))
+    assert raised.value.status_code == 401
+    assert db.fingerprints == 2
+
+
+def test_unchanged_fingerprint_keeps_the_table(store, monkeypatch):
+    db = FakeDb()
+    key = add_key(db)
+    now = [1000.0]
+    monkeypatch.setattr(api_keys.time, "monotonic", lambda: now[0])
+
+    entry = asyncio.run(api_key_auth.verify_api_key(key, "detect", db))
+    now[0] += 11
+    assert asyncio.run(api_key_auth.verify_api_key(key, "detect", db)) is entry
+    assert db.fingerprints == 2
+    assert not store.stale(10.0)
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+from services.batch_scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, BatchScheduler
+
+
+def test_cancelled_entry_frees_space_for_waiting_batch_submitters():
+    release = threading.Event()
+
+    def run_batch(items):
+        release.wait(5)
+        return items
+
+    async def scenario():
+        scheduler = BatchScheduler(run_batch, max_batch_size=1, max_wait_ms=0,
+                                   queue_limits={PRIORITY_INTERACTIVE: 10, PRIORITY_BATCH: 1}, name="test-space")
+        batch_queue = scheduler._queues[PRIORITY_BATCH]
+        # Keeps the collector inside run_batch, so nothing else leaves the queues
+        running = asyncio.create_task(scheduler.submit("running", PRIORITY_INTERACTIVE))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(scheduler.submit("queued", PRIORITY_BATCH))
+        await asyncio.sleep(0.05)
+        waiting = asyncio.create_task(scheduler.submit("waiting", PRIORITY_BATCH))
+        await asyncio.sleep(0.05)
+        assert [entry.item for entry in batch_queue] == ["queued"]
+
+        queued.cancel()
+        await asyncio.sleep(0.05)
+        assert [entry.item for entry in batch_queue] == ["waiting"]
+
+        release.set()
+        assert await asyncio.wait_for(waiting, 5) == "waiting"
+        assert await running == "running"
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import WebSocketDisconnect
+
+from routers import emotion
+
+
+class FakeWebSocket:
+    def __init__(self, frames, expected_replies):
+        self.query_params = {"token": "token"}
+        self.headers = {}
+        self.frames = list(frames)
+        self.expected_replies = expected_replies
+        self.sent = []
+        self.replied = asyncio.Event()
+
+    async def accept(self):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        pass
+
+    async def send_json(self, frame):
+        self.sent.append(frame)
+        if len(self.sent) >= self.expected_replies:
+            self.replied.set()
+
+    async def receive_json(self):
+        if self.frames:
+            return self.frames.pop(0)
+        await asyncio.wait_for(self.replied.wait(), 5)
+        raise WebSocketDisconnect()
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_inference_failure_sends_an_error_frame(monkeypatch):
+    async def get_user_from_token(token, db):
+        return SimpleNamespace(id="user")
+
+    async def submit_detection(*args, **kwargs):
+        raise RuntimeError("CUDA out of memory")
+
+    monkeypatch.setattr(emotion, "AsyncSessionLocal", FakeSession)
+    monkeypatch.setattr(emotion, "get_user_from_token", get_user_from_token)
+    monkeypatch.setattr(emotion, "jwt", SimpleNamespace(get_unverified_claims=lambda token: {}))
+    monkeypatch.setattr(emotion, "submit_detection", submit_detection)
+
+    websocket = FakeWebSocket([{"id": "1", "message": "I am so happy today"}], expected_replies=1)
+    asyncio.run(emotion.detect_emotion_ws(websocket))
+
+    assert websocket.sent == [{"id": "1", "type": "error", "status": 500,
+                               "detail": "Error processing emotion detection request"}]
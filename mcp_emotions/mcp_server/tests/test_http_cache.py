@@ -0,0 +1,68 @@
+import json
+import uuid
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+
+from utils.http_cache import Validator, accepted_encodings, dumps, json_response
+
+
+def history_payload():
+    created_at = datetime(2026, 10, 19, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    return {
+        "user_id": str(uuid.UUID("11111111-1111-1111-1111-111111111111")),
+        "history": [
+            {"message": "¡Qué alegría verte, mañana será mejor! 😀🎉", "emotions": ["joy"],
+             "sarcasm_detected": False, "timestamp": created_at},
+            {"message": "Je suis fatigué… 😴", "emotions": [], "sarcasm_detected": True,
+             "timestamp": created_at, "log_id": uuid.UUID("22222222-2222-2222-2222-222222222222")},
+        ],
+    }
+
+
+def previous_encoding(content) -> bytes:
+    # What json_response produced before it switched to orjson
+    return json.dumps(jsonable_encoder(content), separators=(",", ":")).encode("utf-8")
+
+
+def test_dumps_decodes_to_the_previous_payload_for_non_ascii_messages():
+    payload = history_payload()
+    body = dumps(payload)
+    assert orjson.loads(body) == json.loads(previous_encoding(payload))
+    # Not byte-identical: raw UTF-8 instead of \u escapes
+    assert "¡Qué alegría".encode("utf-8") in body and "😀".encode("utf-8") in body
+    assert b"\\u" not in body
+    assert body != previous_encoding(payload)
+
+
+def test_json_response_content_length_matches_the_utf8_body():
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+    payload = history_payload()
+    validator = Validator(2, payload["history"][0]["timestamp"], "variant")
+    response = json_response(request, payload, validator)
+    assert json.loads(response.body) == json.loads(previous_encoding(payload))
+    assert int(response.headers["content-length"]) == len(response.body)
+    assert response.headers["etag"] == validator.etag
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", {"gzip", "br"}),
+    ("gzip;q=0, br", {"br"}),
+    ("gzip;q=0.0, br; q=0", set()),
+    ("gzip ; q=0.000, br;q=0.5", {"br"}),
+    ("GZIP;Q=1", {"gzip"}),
+    ("br;q=nope, gzip", {"gzip"}),
+    ("", set()),
+])
+def test_accepted_encodings_drop_codings_refused_with_zero_quality(header, expected):
+    assert accepted_encodings(header) == expected
+
+
+def test_json_response_does_not_compress_for_refused_codings():
+    headers = [(b"accept-encoding", b"gzip;q=0.0, br; q=0")]
+    request = Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+    response = json_response(request, {"history": ["x" * 4096]})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,23 @@
+from services.model_registry import ModelRegistry
+
+
+def test_batched_inference_counts_texts_and_forward_passes():
+    registry = ModelRegistry()
+    registry.register("emotion:en:transformers", "model", "transformers", object(), 1.0)
+    registry.record_inference("emotion:en:transformers", 0.080, items=8)
+    registry.record_inference("emotion:en:transformers", 0.040, items=2)
+
+    record, = registry.snapshot()
+    assert record["request_count"] == 10
+    assert record["avg_inference_ms"] == 12.0
+    assert record["batch_count"] == 2
+    assert record["avg_batch_ms"] == 60.0
+
+
+def test_track_attributes_its_items():
+    registry = ModelRegistry()
+    registry.register("sarcasm:en:transformers", "model", "transformers", object(), 1.0)
+    with registry.track("sarcasm:en:transformers", 5):
+        pass
+    record, = registry.snapshot()
+    assert (record["request_count"], record["batch_count"]) == (5, 1)
@@ -0,0 +1,75 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from services.recent_history import RecentHistoryCache, RecentEntry, session_key
+
+START = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def rows(count):
+    return [
+        RecentEntry(uuid.uuid4(), "s1", f"message {index}", ["joy"], None, False,
+                    START + timedelta(seconds=index), None, None)
+        for index in range(count)
+    ]
+
+
+def loaded_cache(count, size=5):
+    cache = RecentHistoryCache(size=size, max_keys=10, ttl=60.0, idle_seconds=60.0)
+    loaded = rows(count)
+    key = session_key("s1")
+    cache.begin_load(key)
+    # Loads read one row more than a buffer holds
+    cache.finish_load(key, loaded[-(size + 1):], count, loaded[-1].created_at)
+    return cache, key, loaded
+
+
+def test_requests_without_limit_are_cacheable_first_pages():
+    cache, _, _ = loaded_cache(3)
+    assert cache.cacheable(None, None)
+    assert cache.cacheable(5, None)
+    assert not cache.cacheable(6, None)
+    assert not cache.cacheable(None, START)
+
+
+def test_whole_history_is_served_when_it_fits_in_the_buffer():
+    cache, key, loaded = loaded_cache(3)
+    entries, count, last_modified = cache.page(key, None)
+    assert [entry.id for entry in entries] == [row.id for row in reversed(loaded)]
+    assert (count, last_modified) == (3, loaded[-1].created_at)
+    assert [entry.id for entry in cache.check(key, 3, loaded[-1].created_at, None)] == [row.id for row in reversed(loaded)]
+
+
+def test_whole_history_longer_than_the_buffer_is_not_served():
+    cache, key, loaded = loaded_cache(8)
+    assert cache.page(key, None) is None
+    assert cache.check(key, 8, loaded[-1].created_at, None) is None
+    # Pages within the buffer still are
+    entries, count, _ = cache.page(key, 5)
+    assert [entry.id for entry in entries] == [row.id for row in reversed(loaded[-5:])]
+    assert count == 8
+
+
+def test_load_racing_an_insert_takes_count_and_newest_from_the_rows_read():
+    cache = RecentHistoryCache(size=5, max_keys=10, ttl=60.0, idle_seconds=60.0)
+    key = session_key("s1")
+    loaded = rows(4)
+    # The validator saw 3 rows; a fourth was inserted before the rows were read
+    cache.begin_load(key)
+    cache.finish_load(key, loaded, 3, loaded[-2].created_at)
+    entries, count, last_modified = cache.page(key, None)
+    assert len(entries) == count == 4
+    assert last_modified == loaded[-1].created_at
+
+
+def test_load_racing_an_insert_past_the_buffer_size_is_not_a_whole_history():
+    cache = RecentHistoryCache(size=5, max_keys=10, ttl=60.0, idle_seconds=60.0)
+    key = session_key("s1")
+    loaded = rows(6)
+    # The validator saw a history of exactly 5 rows; the load read 6
+    cache.begin_load(key)
+    cache.finish_load(key, loaded, 5, loaded[-2].created_at)
+    assert cache.page(key, None) is None
+    entries, count, _ = cache.page(key, 5)
+    assert [entry.id for entry in entries] == [row.id for row in reversed(loaded[1:])]
+    assert count == 6
@@ -0,0 +1,19 @@
+from utils.sarcasm_cues import CueMatcher, match_cues
+
+
+def test_cue_inside_a_longer_cue_is_reported():
+    assert match_cues("Oh right... great", "en")[:2] == ["right...", "..."]
+
+
+def test_overlapping_spanish_cues_are_both_reported():
+    assert match_cues("Sí, seguro que sí", "es") == ["sí, seguro", "seguro que sí"]
+
+
+def test_shorter_cue_starting_a_longer_one_is_reported():
+    matcher = CueMatcher(["so", "so the", "yeah", "yeah right"])
+    assert matcher.find("so the thing, yeah, right") == ["so", "so the", "yeah", "yeah right"]
+
+
+def test_word_cues_still_need_word_boundaries():
+    matcher = CueMatcher(["so", "so the", "the end"])
+    assert matcher.find("also soothe them endlessly") == []
@@ -0,0 +1,70 @@
+import threading
+import uuid
+
+import numpy as np
+
+from services import similarity_index as module
+from services.similarity_index import DIM, SimilarityIndex, UserPartition
+
+
+def random_vectors(count, seed=0):
+    vectors = np.random.default_rng(seed).random((count, DIM), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def trainer_idle():
+    module._trainer.submit(lambda: None).result(5)
+
+
+def test_training_runs_off_the_appending_thread(monkeypatch):
+    monkeypatch.setattr(module.settings, "SIMILARITY_ANN_MIN_ROWS", 100)
+    release = threading.Event()
+    trained = threading.Event()
+    real_inverted_file = module._InvertedFile
+
+    def slow_inverted_file(rows):
+        release.wait(5)
+        ivf = real_inverted_file(rows)
+        trained.set()
+        return ivf
+
+    monkeypatch.setattr(module, "_InvertedFile", slow_inverted_file)
+    partition = UserPartition()
+    vectors = random_vectors(150)
+    ids = [uuid.uuid4() for _ in vectors]
+    # Training is still blocked here, so these appends must not wait for it
+    for log_id, vector in zip(ids, vectors):
+        partition.add(log_id, vector)
+    assert partition.training and partition.ivf is None
+    # Brute force meanwhile
+    assert partition.search(vectors[120], 1)[0][0] == ids[120]
+
+    release.set()
+    assert trained.wait(5)
+    trainer_idle()
+    assert partition.ivf is not None and partition.ivf.size == 100 and not partition.training
+    # Rows appended after the training snapshot are still found
+    assert partition.search(vectors[140], 1)[0][0] == ids[140]
+
+
+def test_aborted_load_drops_pending_writes():
+    index = SimilarityIndex(max_users=10)
+    user_id = uuid.uuid4()
+    blob = np.full(DIM, 0.5, dtype="<f2").tobytes()
+    index.begin_load(user_id)
+    index.add(user_id, uuid.uuid4(), blob, "en")
+    index.abort_load(user_id)
+    assert index._pending == {} and index._loads == {}
+
+
+def test_pending_writes_survive_until_the_last_concurrent_load():
+    index = SimilarityIndex(max_users=10)
+    user_id, log_id = uuid.uuid4(), uuid.uuid4()
+    blob = np.full(DIM, 0.5, dtype="<f2").tobytes()
+    index.begin_load(user_id)
+    index.begin_load(user_id)
+    index.add(user_id, log_id, blob, "en")
+    index.abort_load(user_id)
+    partition = index.finish_load(user_id, [])
+    assert partition.ids == [log_id]
+    assert index._pending == {}
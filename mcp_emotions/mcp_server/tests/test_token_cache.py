@@ -0,0 +1,73 @@
+import time
+from datetime import timedelta
+
+import pytest
+from jose import JWTError
+
+from auth import token_cache as token_cache_module
+from auth.jwt import create_access_token, decode_token
+from auth.token_cache import VerifiedTokenCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = VerifiedTokenCache(100)
+    monkeypatch.setattr("auth.jwt.token_cache", cache)
+    return cache
+
+
+def test_second_decode_is_a_hit(fresh_cache):
+    token = create_access_token({"sub": "a@b.c"})
+    claims = decode_token(token)
+    assert decode_token(token) == claims
+    assert (fresh_cache.hits, fresh_cache.misses) == (1, 1)
+
+
+def test_entries_expire_at_exp(monkeypatch):
+    cache = VerifiedTokenCache(100)
+    now = time.time()
+    cache.put("token", {"sub": "a@b.c", "exp": now + 60})
+    assert cache.get("token") is not None
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: now + 60)
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_forged_token_misses_and_fails_verification(fresh_cache):
+    token = create_access_token({"sub": "a@b.c"})
+    decode_token(token)
+    header, payload, signature = token.split(".")
+    forged = ".".join([header, payload, ("B" if signature[0] == "A" else "A") + signature[1:]])
+    with pytest.raises(JWTError):
+        decode_token(forged)
+    assert fresh_cache.misses == 2 and len(fresh_cache) == 1
+
+
+def test_revoke_token_denies_only_that_token(fresh_cache):
+    token = create_access_token({"sub": "a@b.c"})
+    other = create_access_token({"sub": "a@b.c"}, expires_delta=timedelta(minutes=5))
+    decode_token(token)
+    fresh_cache.revoke_token(token)
+    with pytest.raises(JWTError, match="revoked"):
+        decode_token(token)
+    assert decode_token(other)["sub"] == "a@b.c"
+
+
+def test_revoke_subject_denies_older_tokens_but_not_a_new_login(fresh_cache, monkeypatch):
+    old = create_access_token({"sub": "a@b.c"})
+    decode_token(old)
+    other_user = create_access_token({"sub": "x@y.z"})
+    # Revoke a second after the old token was issued
+    later = time.time() + 1
+    monkeypatch.setattr(token_cache_module.time, "time", lambda: later)
+    fresh_cache.revoke_subject("a@b.c")
+    with pytest.raises(JWTError, match="revoked"):
+        decode_token(old)
+    assert decode_token(other_user)["sub"] == "x@y.z"
+
+
+def test_token_issued_right_after_revoke_subject_is_accepted(fresh_cache):
+    fresh_cache.revoke_subject("a@b.c")
+    time.sleep(0.05)
+    assert decode_token(create_access_token({"sub": "a@b.c"}))["sub"] == "a@b.c"
+
@@ -0,0 +1,12 @@
+from typing import Iterator, List, Tuple
+
+def length_sorted_batches(texts: List[str], batch_size: int) -> Iterator[Tuple[List[int], List[str]]]:
+    """
+    Yield ``(indices, texts)`` batches of similar length so padding stays small.
+
+    Callers scatter results back with the returned indices.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        yield indices, [texts[i] for i in indices]
@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import orjson
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Set
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from core.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # Optional: responses fall back to gzip
+    brotli = None
+
+settings = get_settings()
+
+# Conditional GET and compression for read-heavy JSON endpoints.
+#
+# A validator is a cheap summary of the rows behind a response (row count and newest
+# created_at), computed with an index-only query before any row is loaded. Emotion logs are
+# append-only (apart from the one-off score backfill), so count + max(created_at) changes
+# whenever the response would. The variant (query parameters, threshold version) is folded
+# into the ETag because it changes the response without touching the rows.
+
+class Validator:
+    def __init__(self, count: int, last_modified: Optional[datetime], variant: str = ""):
+        self.count = count
+        self.last_modified = last_modified
+        stamp = int(last_modified.timestamp() * 1_000_000) if last_modified else 0
+        variant_hash = hashlib.sha1(variant.encode()).hexdigest()[:8]
+        self.etag = f'W/"{count}-{stamp}-{variant_hash}"'
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding, Authorization"}
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(self.last_modified.astimezone(timezone.utc), usegmt=True)
+        return headers
+
+def not_modified(request: Request, validator: Validator) -> bool:
+    """True if the client's cached copy is current. If-None-Match takes precedence over If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison: W/"x" and "x" match
+        return "*" in tags or validator.etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and validator.last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have one-second resolution
+        return validator.last_modified.replace(microsecond=0) <= since
+    return False
+
+def not_modified_response(validator: Validator) -> Response:
+    return Response(status_code=304, headers=validator.headers())
+
+def dumps(content) -> bytes:
+    """
+    Compact JSON straight from dicts, lists, datetimes and UUIDs with orjson, without the
+    jsonable_encoder copy of the whole payload; other types go through jsonable_encoder.
+
+    Decodes to the same values as ``json.dumps(jsonable_encoder(content))``, but not to the
+    same bytes: non-ASCII text (Spanish messages, emoji) is written as raw UTF-8 instead of
+    ``\\uXXXX`` escapes, so bodies are shorter and Content-Length differs. ETags are built from
+    the validator, not the body, and are unaffected.
+    """
+    return orjson.dumps(content, default=jsonable_encoder)
+
+class FastJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also accepts the types jsonable_encoder knows (e.g. Pydantic models)."""
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def accepted_encodings(header: str) -> Set[str]:
+    """Content codings of an Accept-Encoding header, minus those refused with a zero q-value."""
+    accepted = set()
+    for part in header.split(","):
+        coding, *params = part.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value.strip())
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+def json_response(request: Request, content, validator: Optional[Validator] = None) -> Response:
+    """JSON response with validator headers, brotli/gzip compressed when large enough."""
+    body = dumps(content)
+    headers = validator.headers() if validator else {"Vary": "Accept-Encoding"}
+    if len(body) >= settings.COMPRESS_MIN_BYTES:
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=settings.BROTLI_QUALITY)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=settings.GZIP_LEVEL)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
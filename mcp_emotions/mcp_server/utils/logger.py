@@ -3,7 +3,8 @@ import os
 from logging.handlers import RotatingFileHandler
 
 # Create logs directory in the current directory if it doesn't exist
-log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
+# (LOG_DIR overrides it, e.g. /tmp/logs on Lambda where the code directory is read-only)
+log_dir = os.getenv("LOG_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs'))
 os.makedirs(log_dir, exist_ok=True)
 
 # Configure JWT logger
@@ -1,6 +1,7 @@
 import ipaddress
 from typing import Optional
 from fastapi import Request
+from slowapi.util import get_remote_address
 from core.config import get_settings
 from models.user import User
 
@@ -49,4 +50,14 @@ def should_rate_limit(request: Request, user: Optional[User] = None) -> bool:
     if user and is_internal_role(user):
         return False
     
-    return True 
\ No newline at end of file
+    return True
+
+def get_user_identifier(request: Request) -> str:
+    """Get user identifier for rate limiting."""
+    if not hasattr(request.state, 'user'):
+        return get_remote_address(request)
+    return str(request.state.user.id)
+
+def exempt_when(request: Request) -> bool:
+    """Check if request should be exempt from rate limiting."""
+    return not should_rate_limit(request)
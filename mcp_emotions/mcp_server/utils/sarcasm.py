@@ -1,6 +1,11 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
-import re 
+import threading
+import time
+from typing import List
+from services.model_registry import model_registry
+from services.model_store import load_sequence_classifier
+from utils.batching import length_sorted_batches
+from utils.sarcasm_cues import match_cues
 
 # Model map by language
 MODEL_MAP_SARCASM = {
@@ -9,63 +14,76 @@ MODEL_MAP_SARCASM = {
     "default": "helinivan/multilingual-sarcasm-detector"
 }
 
-# Cache for loaded models and tokenizers
+# Cache for loaded models and tokenizers; loads and unloads are serialized like
+# services/emotion_detector.py's
 tokenizers_sarcasm = {}
 models_sarcasm = {}
+_models_lock = threading.Lock()
 
 def load_sarcasm_model(lang="en"):
     lang = lang.lower()
     model_name = MODEL_MAP_SARCASM.get(lang, MODEL_MAP_SARCASM["default"])
 
-    if lang not in models_sarcasm:
-        print(f"Loading sarcasm model for: {lang}")
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        model.eval()  # Set model to evaluation mode
-        if torch.cuda.is_available():
-            model = model.cuda()
-        # Warm up the model with a dummy input
-        dummy_input = tokenizer("test", return_tensors="pt", truncation=True, padding=True)
-        if torch.cuda.is_available():
-            dummy_input = {k: v.cuda() for k, v in dummy_input.items()}
-        with torch.no_grad():
-            model(**dummy_input)
-        tokenizers_sarcasm[lang] = tokenizer
-        models_sarcasm[lang] = model
+    with _models_lock:
+        if lang not in models_sarcasm:
+            print(f"Loading sarcasm model for: {lang}")
+            start = time.perf_counter()
+            tokenizer, model = load_sequence_classifier(model_name)
+            model.eval()  # Set model to evaluation mode
+            if torch.cuda.is_available():
+                model = model.cuda()
+            # Warm up the model with a dummy input
+            dummy_input = tokenizer("test", return_tensors="pt", truncation=True, max_length=512, padding=True)
+            if torch.cuda.is_available():
+                dummy_input = {k: v.cuda() for k, v in dummy_input.items()}
+            with torch.no_grad():
+                model(**dummy_input)
+            tokenizers_sarcasm[lang] = tokenizer
+            models_sarcasm[lang] = model
+            model_registry.register(f"sarcasm:{lang}:transformers", model_name, "transformers", model, time.perf_counter() - start)
 
-    return tokenizers_sarcasm[lang], models_sarcasm[lang]
+        return tokenizers_sarcasm[lang], models_sarcasm[lang]
 
-def detect_sarcasm(text: str, lang="en") -> bool:
-    tokenizer, model = load_sarcasm_model(lang)
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
+def unload_sarcasm_model(lang="en") -> bool:
+    lang = lang.lower()
+    with _models_lock:
+        if lang not in models_sarcasm:
+            return False
+        tokenizers_sarcasm.pop(lang, None)
+        models_sarcasm.pop(lang, None)
+        model_registry.unregister(f"sarcasm:{lang}:transformers")
     if torch.cuda.is_available():
-        inputs = {k: v.cuda() for k, v in inputs.items()}
+        torch.cuda.empty_cache()
+    return True
 
-    with torch.no_grad():
-        outputs = model(**inputs)
-        probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-        predicted_class = torch.argmax(probs, dim=-1).item()
+def heuristic_match(text: str, lang="en") -> bool:
+    """True if any sarcasm cue (phrases, punctuation, emoji; see utils/sarcasm_cues.py) occurs in ``text``."""
+    return bool(match_cues(text, lang))
 
-    lowered = re.sub(r'[^\w\s]', '', text.lower())
+def detect_sarcasm_batch(texts: List[str], lang="en", batch_size: int = 32) -> List[bool]:
+    """Sarcasm detection for many texts of the same language, ``batch_size`` texts per forward pass."""
+    tokenizer, model = load_sarcasm_model(lang)
+    results = [False] * len(texts)
+    for indices, chunk in length_sorted_batches(texts, batch_size):
+        inputs = tokenizer(chunk, return_tensors="pt", truncation=True, max_length=512, padding=True)
+        if torch.cuda.is_available():
+            inputs = {k: v.cuda() for k, v in inputs.items()}
 
-    if lang == "es":
-        sarcasm_cues = [
-            "🤣", "🙄", "😒", "...", "claro", "aja", "como no", "sí, seguro",
-            "otra vez", "perfecto", "ya ni la friegan", "así o más", "seguro que sí"
-        ]
-    else:
-        sarcasm_cues = [
-            "🤣", "🙄", "😒", "...", "yeah right", "as if", "sure they did", "you know the",
-            "great job", "all of a sudden", "oh now", "they care", "so the", "of course",
-            "nice try", "right...", "classic", "totally"
-        ]
+        with torch.no_grad(), model_registry.track(f"sarcasm:{lang.lower()}:transformers", len(chunk)):
+            outputs = model(**inputs)
+            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+            predicted_classes = torch.argmax(probs, dim=-1)
 
-    heuristic_match = any(cue in lowered for cue in sarcasm_cues)
+        for i, text, row, predicted_class in zip(indices, chunk, probs, predicted_classes.tolist()):
+            matched = heuristic_match(text, lang)
+            # Safe access to probabilities with bounds checking
+            if len(row) > 1:
+                sarcastic_prob = row[1].item()
+                results[i] = predicted_class == 1 or (sarcastic_prob > 0.15 and matched)
+            else:
+                # Model only outputs single probability/class
+                results[i] = predicted_class == 1 or matched
+    return results
 
-    # Safe access to probabilities with bounds checking
-    if len(probs) > 1:
-        sarcastic_prob = probs[1].item()
-        return predicted_class == 1 or (sarcastic_prob > 0.15 and heuristic_match)
-    else:
-        # Model only outputs single probability/class
-        return predicted_class == 1 or heuristic_match
\ No newline at end of file
+def detect_sarcasm(text: str, lang="en") -> bool:
+    return detect_sarcasm_batch([text], lang=lang)[0]
@@ -0,0 +1,169 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+from core.config import get_settings
+
+settings = get_settings()
+
+# Sarcasm cue matching.
+#
+# Cue lists live in data/sarcasm_cues/<lang>.txt (one cue per line, "# " comments). Each list
+# is compiled once into a single regex shaped like a trie: cues sharing a prefix share one
+# branch, so at every position of the text the engine follows at most one path per
+# character instead of trying every cue. The cost per character depends on the length of
+# the longest cue, not on how many cues there are.
+#
+# Two passes are made over a text:
+#   raw         lowercased text, punctuation and emoji kept: every cue ("...", "🙄", "right...")
+#   normalized  punctuation replaced by spaces: word cues only, so "yeah, right" hits "yeah right"
+# Word characters at the edge of a cue must not touch other word characters ("so the" does
+# not match inside "also then").
+#
+# Matches may overlap: the regex is wrapped in a lookahead, so it is tried at every position
+# and "right..." also reports the "..." inside it. At one position the trie yields the longest
+# cue; shorter cues it starts with ("yeah" in "yeah right") are added from a table built with
+# the matcher.
+
+DEFAULT_CUES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sarcasm_cues")
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+# Trie tokens for "no word character before / after this point"
+_START = "\x00start"
+_END = "\x00end"
+_TERMINAL = ""
+
+
+def normalize(text: str) -> str:
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _tokens(cue: str) -> List[str]:
+    tokens = list(cue)
+    if _is_word_char(cue[0]):
+        tokens.insert(0, _START)
+    if _is_word_char(cue[-1]):
+        tokens.append(_END)
+    return tokens
+
+
+def _token_regex(token: str) -> str:
+    if token == _START:
+        return r"(?<!\w)"
+    if token == _END:
+        return r"(?!\w)"
+    return re.escape(token)
+
+
+def _trie_regex(node: Dict) -> str:
+    # The end-of-word branch goes last so a longer cue wins over its prefix ("so the" over "so")
+    tokens = sorted((token for token in node if token != _TERMINAL), key=lambda token: (token == _END, token))
+    branches = [_token_regex(token) + _trie_regex(node[token]) for token in tokens]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # A cue ending here that is also the prefix of a longer cue: prefer the longer one
+    return f"(?:{body})?" if _TERMINAL in node else body
+
+
+def compile_cues(cues: List[str], overlapping: bool = False) -> Optional[re.Pattern]:
+    """
+    One trie-shaped regex matching any of ``cues``; None for an empty list. With ``overlapping``
+    it matches zero-width at every position where a cue starts, the cue being group 1.
+    """
+    trie: Dict = {}
+    for cue in cues:
+        node = trie
+        for token in _tokens(cue):
+            node = node.setdefault(token, {})
+        node[_TERMINAL] = {}
+    if not trie:
+        return None
+    pattern = _trie_regex(trie)
+    return re.compile(f"(?=({pattern}))" if overlapping else pattern)
+
+
+def nested_prefixes(cues: List[str]) -> Dict[str, List[str]]:
+    """
+    For every cue, the shorter cues it starts with, shortest first: they match wherever it does.
+    A word cue only counts when the longer cue does not continue it with a word character.
+    """
+    known = set(cues)
+    prefixes: Dict[str, List[str]] = {}
+    for cue in cues:
+        nested = [
+            cue[:length] for length in range(1, len(cue))
+            if cue[:length] in known and not (_is_word_char(cue[length - 1]) and _is_word_char(cue[length]))
+        ]
+        if nested:
+            prefixes[cue] = nested
+    return prefixes
+
+
+class CueMatcher:
+    def __init__(self, cues: List[str]):
+        self.cues = list(dict.fromkeys(cue.strip().lower() for cue in cues if cue.strip()))
+        self._raw = compile_cues(self.cues, overlapping=True)
+        self._raw_prefixes = nested_prefixes(self.cues)
+        # Word cues (no punctuation or emoji at the edges) also match the normalized text;
+        # their normalized form maps back to the cue as written in the list
+        self._by_normalized = {
+            normalize(cue): cue for cue in self.cues
+            if _is_word_char(cue[0]) and _is_word_char(cue[-1]) and normalize(cue)
+        }
+        self._normalized = compile_cues(list(self._by_normalized), overlapping=True)
+        self._normalized_prefixes = nested_prefixes(list(self._by_normalized))
+
+    def find(self, text: str) -> List[str]:
+        """
+        Every cue found in ``text``, overlapping ones included, in order of first occurrence
+        (cues starting at the same position: shortest first).
+        """
+        found = {}
+        if self._raw is not None:
+            for match in self._raw.finditer(text.lower()):
+                cue = match.group(1)
+                for prefix in self._raw_prefixes.get(cue, ()):
+                    found.setdefault(prefix, None)
+                found.setdefault(cue, None)
+        if self._normalized is not None:
+            for match in self._normalized.finditer(normalize(text)):
+                cue = match.group(1)
+                for prefix in self._normalized_prefixes.get(cue, ()):
+                    found.setdefault(self._by_normalized[prefix], None)
+                found.setdefault(self._by_normalized[cue], None)
+        return list(found)
+
+
+def load_cue_file(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    # "# ..." lines are comments; a cue may still start with "#" ("#not")
+    return [line for line in lines if line and line != "#" and not line.startswith("# ")]
+
+
+_matchers: Dict[str, CueMatcher] = {}
+_lock = threading.Lock()
+
+
+def get_matcher(lang: str) -> CueMatcher:
+    """Compiled matcher for ``lang`` (English list for languages without one), built once."""
+    lang = "es" if lang == "es" else "en"
+    matcher = _matchers.get(lang)
+    if matcher is None:
+        with _lock:
+            matcher = _matchers.get(lang)
+            if matcher is None:
+                cues_dir = settings.SARCASM_CUES_DIR or DEFAULT_CUES_DIR
+                matcher = _matchers[lang] = CueMatcher(load_cue_file(os.path.join(cues_dir, f"{lang}.txt")))
+    return matcher
+
+
+def match_cues(text: str, lang: str = "en") -> List[str]:
+    return get_matcher(lang).find(text)
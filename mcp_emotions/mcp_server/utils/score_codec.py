@@ -0,0 +1,13 @@
+import struct
+from typing import List, Optional
+
+# Emotion probability vectors are stored as little-endian IEEE float16:
+# 2 bytes per label (56 bytes for the 28 GoEmotions labels), ~3 significant digits.
+
+def encode_scores(scores: List[float]) -> bytes:
+    return struct.pack(f"<{len(scores)}e", *scores)
+
+def decode_scores(blob: Optional[bytes]) -> List[float]:
+    if not blob:
+        return []
+    return list(struct.unpack(f"<{len(blob) // 2}e", blob))
@@ -0,0 +1,103 @@
+import re
+from typing import List, NamedTuple, Optional
+from core.config import get_settings
+
+settings = get_settings()
+
+# Segment-level analysis of long messages.
+#
+# A message is split into sentences or overlapping word windows, every segment goes through
+# the models as a separate (short) input of the same batch, and the per-segment probability
+# rows are aggregated back into one result:
+#   max   strongest signal of any segment (a single angry sentence makes the entry angry)
+#   mean  average over segments
+#   last  exponentially decaying weights towards the last segment (SEGMENT_LAST_DECAY), for
+#         entries where the closing sentences carry the writer's current state
+
+SEGMENT_MODES = ("off", "sentence", "window")
+AGGREGATIONS = ("max", "mean", "last")
+
+# Sentence end: terminal punctuation (also "...", "?!", "…") followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+
+
+class SegmentOptions(NamedTuple):
+    mode: str
+    aggregation: str
+    include_segments: bool
+
+
+def resolve_options(mode: Optional[str], aggregation: Optional[str], include_segments: bool = False) -> Optional[SegmentOptions]:
+    """Per-request options with the settings as defaults; None when segmentation is off."""
+    mode = mode or settings.SEGMENTATION
+    if mode == "off":
+        return None
+    return SegmentOptions(mode, aggregation or settings.SEGMENT_AGGREGATION, include_segments)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text) if sentence.strip()]
+
+
+def split_windows(text: str, size: int, stride: int) -> List[str]:
+    """Windows of ``size`` words starting every ``stride`` words (overlapping when stride < size)."""
+    words = text.split()
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    windows = []
+    for start in range(0, len(words), stride):
+        windows.append(" ".join(words[start:start + size]))
+        if start + size >= len(words):
+            break
+    return windows
+
+
+def _merge_short(segments: List[str], min_words: int) -> List[str]:
+    # "Ok." or "Sure!" alone says little; attach it to the sentence before (or after, if first)
+    merged: List[str] = []
+    for segment in segments:
+        if merged and (len(segment.split()) < min_words or len(merged[-1].split()) < min_words):
+            merged[-1] = f"{merged[-1]} {segment}"
+        else:
+            merged.append(segment)
+    return merged
+
+
+def segment_text(text: str, mode: str) -> List[str]:
+    """Segments of ``text`` for ``mode``, at most SEGMENT_MAX_SEGMENTS (the tail is joined into the last)."""
+    if mode == "sentence":
+        segments = _merge_short(split_sentences(text), settings.SEGMENT_MIN_WORDS)
+    elif mode == "window":
+        segments = split_windows(text, settings.SEGMENT_WINDOW_WORDS, settings.SEGMENT_WINDOW_STRIDE)
+    else:
+        segments = [text]
+    limit = max(1, settings.SEGMENT_MAX_SEGMENTS)
+    if len(segments) > limit:
+        segments = segments[:limit - 1] + [" ".join(segments[limit - 1:])]
+    return segments or [text]
+
+
+def segment_weights(count: int, aggregation: str) -> List[float]:
+    """Normalized weights of ``count`` segments for the mean and last strategies."""
+    if aggregation == "last":
+        weights = [settings.SEGMENT_LAST_DECAY ** (count - 1 - i) for i in range(count)]
+    else:
+        weights = [1.0] * count
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def aggregate_scores(rows: List[List[float]], aggregation: str) -> List[float]:
+    """Combine per-segment probability rows (same label set) into one row."""
+    if aggregation == "max":
+        return [max(column) for column in zip(*rows)]
+    weights = segment_weights(len(rows), aggregation)
+    return [sum(weight * value for weight, value in zip(weights, column)) for column in zip(*rows)]
+
+
+def aggregate_flags(flags: List[bool], aggregation: str) -> bool:
+    """Combine per-segment sarcasm flags: any segment (max) or a weighted majority (mean, last)."""
+    if aggregation == "max":
+        return any(flags)
+    weights = segment_weights(len(flags), aggregation)
+    return sum(weight for weight, flag in zip(weights, flags) if flag) >= 0.5